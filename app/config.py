@@ -10,6 +10,95 @@ class Settings(BaseSettings):
     CLICKHOUSE_TABLE: str
     CLICKHOUSE_DAYS: int
 
+    # ClickHouse 커넥션 풀 (core/data_loader/pool.py)
+    CLICKHOUSE_USER: str = "default"
+    CLICKHOUSE_PASSWORD: str = ""
+    CLICKHOUSE_POOL_SIZE: int = 8
+    CLICKHOUSE_CONNECT_TIMEOUT: float = 5
+    CLICKHOUSE_QUERY_TIMEOUT: float = 60    # 쿼리별 max_execution_time (초)
+    CLICKHOUSE_COMPRESSION: str = "lz4"     # "" 이면 압축 안 함
+    CLICKHOUSE_STREAM_CHUNK: int = 100000   # 스트리밍 로드 시 블록(행) 크기
+
+    # 학습 데이터 로드 방식
+    #   "dataframe": 이벤트+메타 전체를 DataFrame 으로 로드 (예전 동작)
+    #   "encoded":   필요한 컬럼만 스트리밍하며 정수 코드로 인코딩
+    #   "aggregated": (사용자, 상품) 쌍 집계와 최신 메타(argMax)를 ClickHouse 에서 계산
+    TRAIN_DATA_PATH: str = "dataframe"
+
+    # 인터랙션 가중치 (core/preprocess/transformer.py)
+    #   tracking_type 별 가중치, 표에 없는 타입은 INTERACTION_DEFAULT_WEIGHT
+    INTERACTION_TYPE_WEIGHTS: dict[str, float] = {"view": 1.0, "cart": 3.0, "purchase": 5.0}
+    INTERACTION_DEFAULT_WEIGHT: float = 1.0
+    INTERACTION_HALF_LIFE_DAYS: float = 0   # 0 보다 크면 이 반감기로 오래된 이벤트 가중치 감쇠
+    INTERACTION_WEIGHT_CAP: float = 0       # 0 보다 크면 (사용자, 상품) 합산 가중치 상한
+
+    # 학습 실행기: 언어·사이트별 학습을 프로세스 풀에서 이 코어 수 안에서 나눠 실행 (0 이면 os.cpu_count())
+    TRAIN_CPU_BUDGET: int = 0
+
+    # 학습 작업 큐 (app/services/jobs.py)
+    TRAIN_JOB_DIR: str = ""           # 작업 상태 파일 위치, 비우면 MODEL_BASE_DIR/_jobs
+    TRAIN_JOB_WORKERS: int = 1        # 서버 워커마다 띄우는 학습 프로세스 수
+    TRAIN_JOB_CONCURRENCY: int = 1    # 전체 서버 워커 통틀어 동시에 실행되는 학습 수
+
+    # 전체 사이트 학습 스케줄러 (core/fleet.py, scripts/train_fleet.py)
+    FLEET_MIN_NEW_EVENTS: int = 1000        # 마지막 학습 이후 새 이벤트가 이보다 적으면
+    FLEET_MAX_STALENESS_HOURS: float = 72   # ... 그리고 이 시간 안에 학습했으면 건너뜀
+    FLEET_MEMORY_BUDGET_MB: float = 0       # 동시에 학습할 사이트 묶음의 추정 메모리 상한 (0 이면 제한 없음)
+    FLEET_BYTES_PER_EVENT: int = 200        # 메모리 추정용 이벤트당 바이트
+    FLEET_SUMMARY_DIR: str = ""             # 실행 요약 JSON 위치, 비우면 MODEL_BASE_DIR/_runs
+
+    # 증분 학습: 직전 버전 모델에 워터마크 이후 이벤트만 fit_partial
+    TRAIN_INCREMENTAL: bool = False
+    TRAIN_INCREMENTAL_EPOCHS: int = 3
+    TRAIN_FULL_EVERY: int = 24      # 증분 학습이 이 횟수만큼 이어지면 다음 실행은 전체 재학습
+    # 워터마크 = 학습한 마지막 이벤트 시각(ClickHouse common_ts) - 이 값(초).
+    # 늦게 적재된 이벤트도 다음 증분 학습이 읽도록 겹쳐 읽는 구간 (그 구간 이벤트는 두 번 학습될 수 있음)
+    TRAIN_WATERMARK_LATENESS: int = 600
+
+    # 학습 시 사용자별로 미리 계산해 둘 추천 개수 (0 이면 저장 안 함)
+    TOPN_SIZE: int = 100
+
+    # 학습 시 모델과 함께 저장할 "이미 상호작용한 아이템" CSR 의 tracking_type 목록
+    # (전체 상호작용 "all" 은 항상 저장, 요청의 exclude_interacted 로 골라서 제외)
+    SEEN_ITEM_TYPES: list[str] = ["purchase", "cart"]
+
+    # 학습 시 아이템별로 미리 계산해 둘 유사 아이템 개수 (0 이면 저장 안 함)
+    SIMILAR_ITEMS_SIZE: int = 50
+
+    # 아이템 수가 이 값 이상이면 ANN(IVF) 인덱스를 만들고 서빙에서 사용 (0 이면 사용 안 함)
+    ANN_MIN_ITEMS: int = 50000
+    ANN_NLIST: int = 0      # 0 이면 4·√아이템수
+    ANN_NPROBE: int = 16
+
+    # 세션 fold-in 추천: 모델에 없는 방문자는 최근 본 상품 임베딩의 가중 평균으로 사용자 벡터 생성
+    SESSION_MAX_ITEMS: int = 50             # 사용할 최근 본 상품 최대 개수
+    SESSION_RECENCY_DECAY: float = 0.8      # 최신순 i 번째 상품 가중치 = decay^i (1 이면 단순 평균)
+
+    # 모델 레지스트리가 새 버전을 확인하는 주기(초, 0 이면 확인 안 함)
+    MODEL_POLL_INTERVAL: float = 30.0
+
+    # 시작 시 모델 예열 (요청 수 많은 키부터), 끝나기 전까지 /ready 는 503
+    PRELOAD_ENABLED: bool = True
+    PRELOAD_WORKERS: int = 4
+    PRELOAD_MEMORY_BUDGET_MB: float = 0     # 예열할 모델 추정 크기 합 상한 (0 이면 제한 없음)
+
+    # 사용자별 추천 응답 캐시 (app/services/response_cache.py)
+    RESPONSE_CACHE_SIZE: int = 50000        # 최대 항목 수 (0 이면 끔)
+    RESPONSE_CACHE_TOP_K: int = 100         # 한 번에 계산해 두는 개수 — 더 작은 top_k 는 앞부분을 잘라 응답
+    RESPONSE_CACHE_CONTROL: str = "public, max-age=60"   # /v1/recommendations 의 Cache-Control
+
+    # /metrics 워커 간 합산: 워커마다 이 디렉터리에 자기 값을 기록하고 스크레이프 때 합침
+    # (컨테이너 로컬 경로 — 여러 컨테이너가 공유하는 볼륨이면 안 됨, 비우면 워커별 값만 응답)
+    METRICS_DIR: str = "/tmp/recommender-metrics"
+    METRICS_FLUSH_INTERVAL: float = 5.0     # 워커 값 기록 주기(초)
+
+    # 요청 경로의 상품 메타 출처
+    #   "model":      모델 아티팩트(item_meta)만 사용 — 요청 경로에서 ClickHouse 호출 없음
+    #   "clickhouse": 인기추천 메타를 ClickHouse 에서 조회 (예전 동작)
+    METADATA_SOURCE: str = "model"
+    # 0 보다 크면 이 주기(초)로 ClickHouse 메타를 백그라운드 갱신해 모델 메타 위에 덮어씀
+    METADATA_REFRESH_TTL: float = 0
+
     class Config:
         env_file = ".env"
 
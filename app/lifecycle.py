@@ -1,10 +1,23 @@
 import logging
 from .config import settings
+from .services.registry import model_registry
+from .services.metadata import metadata_refresher
+from .services.jobs import training_jobs
+from .services import metrics
 
 logger = logging.getLogger("uvicorn")
 
 async def on_startup():
     logger.info("🚀 Application startup")
+    model_registry.start()
+    model_registry.warm_up()
+    metrics.registry.start()
+    if settings.METADATA_SOURCE == "model":
+        metadata_refresher.start()
 
 async def on_shutdown():
     logger.info("🛑 Application shutdown")
+    model_registry.stop()
+    metadata_refresher.stop()
+    training_jobs.shutdown()
+    metrics.registry.stop()
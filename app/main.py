@@ -3,7 +3,9 @@ from logging.handlers import RotatingFileHandler
 from fastapi import FastAPI
 from app.config import settings
 from app.lifecycle import on_startup, on_shutdown
-from app.routers.v1 import recommend, train, topK
+from app.services.metrics import RequestLatencyMiddleware, register_routes
+from app.routers import health
+from app.routers.v1 import recommend, train, topK, items
 from fastapi.middleware.cors import CORSMiddleware
 
 # 로깅 설정 (생략 가능)
@@ -30,6 +32,16 @@ app.add_middleware(
 )
 
 # 모델별 라우터 포함
+app.include_router(health.router)
 app.include_router(train.router)
 app.include_router(recommend.router)
-app.include_router(topK.router)
\ No newline at end of file
+app.include_router(topK.router)
+app.include_router(items.router)
+
+# 라우트별 요청 지연 (레이블은 등록된 라우트로 미리 생성)
+register_routes(
+    route.path
+    for router in (health.router, train.router, recommend.router, topK.router, items.router)
+    for route in router.routes
+)
+app.add_middleware(RequestLatencyMiddleware)
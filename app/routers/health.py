@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from app.services import metrics
+from app.services.registry import model_registry
+
+router = APIRouter(tags=["Health"])
+
+@router.get("/ready")
+def ready_endpoint():
+    """
+    로드밸런서 readiness 체크. 시작 시 모델 예열이 끝나야 200, 그 전에는 503.
+    예열이 실패했거나 예열 대상을 하나도 로드하지 못했으면 503, 일부만 실패했으면 200 + degraded.
+    """
+    if not model_registry.ready:
+        return JSONResponse(status_code=503, content={"ready": False, "warmup": model_registry.warmup_summary})
+    return {"ready": True, "degraded": model_registry.degraded, "warmup": model_registry.warmup_summary}
+
+@router.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    """
+    Prometheus 스크레이프용 텍스트 포맷 메트릭.
+    단계별 지연·캐시·폴백 사유·ClickHouse 질의 시간·사이트별 모델 크기 추정치 (app/services/metrics.py)
+    gunicorn 워커들의 값을 METRICS_DIR 로 합산해 응답합니다.
+    """
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Query, Path
+from app.schemas.recommendation import SimilarItemsResponse
+from app.services.recommender import get_similar_items
+from app.utils.payloads import FastJSONResponse, similar_payload
+router = APIRouter(
+    prefix="/v1",
+    tags=["Recommendations"]
+)
+
+@router.get("/items/{product_code}/similar", response_model=SimilarItemsResponse, response_class=FastJSONResponse)
+def similar_items(
+    product_code: str = Path(...),
+    tracking_key: str = Query(...),
+    lang: str = Query("und"),
+    top_k: int = Query(10, ge=1, le=100),
+):
+    """상품 상세 페이지용 유사 상품 (학습 시 계산한 아이템별 이웃 테이블 조회)"""
+    return similar_payload(get_similar_items(tracking_key, product_code, lang, top_k))
@@ -1,9 +1,24 @@
-from fastapi import APIRouter, HTTPException, Query, Path
-from app.schemas.recommendation import RecommendationRequest, RecommendationResponse
+from typing import Iterator
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response
+from fastapi.responses import StreamingResponse
+from app.schemas.recommendation import (
+    RecommendationRequest,
+    RecommendationResponse,
+    BatchRecommendationRequest,
+    ItemFilter,
+    SessionRecommendationRequest,
+)
+from app.config import settings
+from app.services import metrics
 from app.services.recommender import (
     get_recommendations,
-    get_interest_based_recommendations,
+    get_interest_based_recommendations_with_etag,
+    get_batch_recommendations,
+    get_batch_popular_recommendations,
+    get_session_recommendations,
 )
+from app.utils.payloads import FastJSONResponse, recommendation_payload, render_recommendations
 import logging
 router = APIRouter(
     prefix="/v1",
@@ -12,16 +27,93 @@ router = APIRouter(
 
 logger = logging.getLogger(__name__)
 
-@router.get("/recommendations", response_model=RecommendationResponse)
+def _count_fallback(e: Exception) -> None:
+    """
+    예외 폴백 사유 기록: 모델 없음(FileNotFoundError)은 no_model, 그 외는 exception + 경고 로그.
+    HTTPException 은 서비스가 사유를 이미 기록하고 낸 것(예: 모델 없음 404)이라 세지 않습니다.
+    """
+    if isinstance(e, HTTPException):
+        return
+    if isinstance(e, FileNotFoundError):
+        metrics.FALLBACK_NO_MODEL.inc()
+        return
+    metrics.FALLBACK_EXCEPTION.inc()
+    logger.warning(f"추천 실패 → 인기추천 폴백: {type(e).__name__}: {e}", exc_info=True)
+
+@router.get("/recommendations", response_model=RecommendationResponse, response_class=FastJSONResponse)
 def recommend(
+    request: Request,
     tracking_key: str = Query(...),
     anon_id: str = Query(...),
     lang: str = Query("und"),
     top_k: int = Query(10, ge=1, le=100),
+    item_filter: ItemFilter = Depends(),
 ):
     try:
-        # 관심 기반 추천
-        return get_interest_based_recommendations(tracking_key, anon_id, lang, top_k)
+        # 관심 기반 추천 (사용자별 응답 캐시 + ETag, 필터는 점수 마스크로 적용)
+        result, etag = get_interest_based_recommendations_with_etag(tracking_key, anon_id, lang, top_k, item_filter)
+    except Exception as e:
+        # 폴백: 인기 추천
+        _count_fallback(e)
+        return recommendation_payload(get_recommendations(tracking_key, anon_id, lang, top_k))
+
+    headers = None
+    if etag:
+        headers = {"ETag": etag, "Cache-Control": settings.RESPONSE_CACHE_CONTROL}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+    # 미리 직렬화된 상품 조각을 이어 붙여 응답 (response_model 재검증 없음)
+    return recommendation_payload(result, headers)
+
+@router.post("/recommendations:session", response_model=RecommendationResponse, response_class=FastJSONResponse)
+def recommend_session(req: SessionRecommendationRequest):
+    """
+    최근 본 상품(product_codes, 최신순)으로 만든 세션 벡터로 추천합니다.
+    모델에 없는 신규 방문자도 재학습 없이 개인화된 결과를 받습니다.
+    """
+    try:
+        result = get_session_recommendations(
+            req.tracking_key, req.anon_id, req.product_codes, req.lang, req.top_k, req.filters
+        )
+    except Exception as e:
+        # 폴백: 인기 추천
+        _count_fallback(e)
+        result = get_recommendations(req.tracking_key, req.anon_id, req.lang, req.top_k)
+    return recommendation_payload(result)
+
+def _ndjson(req: BatchRecommendationRequest, responses: Iterator[RecommendationResponse]) -> Iterator[bytes]:
+    """
+    응답을 한 줄씩 직렬화합니다. 응답은 anon_ids 입력 순서대로 나오므로,
+    스트리밍 도중 실패하면 아직 못 보낸 anon_id 들을 인기추천으로 채워 줄 수를 맞춥니다.
+    인기추천마저 실패하면 error 줄 하나로 스트림을 끝냅니다. (헤더는 이미 200 으로 나간 상태)
+    """
+    sent = 0
+    try:
+        for resp in responses:
+            yield render_recommendations(resp.tracking_key, resp.anon_id, resp.recommended_items) + b"\n"
+            sent += 1
+        return
+    except Exception as e:
+        _count_fallback(e)
+
+    remaining = req.anon_ids[sent:]
+    try:
+        for resp in get_batch_popular_recommendations(req.tracking_key, remaining, req.lang, req.top_k):
+            yield render_recommendations(resp.tracking_key, resp.anon_id, resp.recommended_items) + b"\n"
+    except Exception as e:
+        logger.error(f"배치 추천 폴백 실패 ({len(remaining)}건 미전송): {type(e).__name__}: {e}", exc_info=True)
+        yield orjson.dumps({"tracking_key": req.tracking_key, "error": "recommendation_failed"}) + b"\n"
+
+@router.post("/recommendations:batch")
+def recommend_batch(req: BatchRecommendationRequest):
+    """
+    여러 anon_id 의 추천을 한 번에 계산해
+    anon_id 하나당 RecommendationResponse 한 줄(NDJSON)로 스트리밍합니다.
+    """
+    try:
+        responses = get_batch_recommendations(req.tracking_key, req.anon_ids, req.lang, req.top_k)
     except Exception as e:
         # 폴백: 인기 추천
-        return get_recommendations(tracking_key, anon_id, lang, top_k)
+        _count_fallback(e)
+        responses = get_batch_popular_recommendations(req.tracking_key, req.anon_ids, req.lang, req.top_k)
+    return StreamingResponse(_ndjson(req, responses), media_type="application/x-ndjson")
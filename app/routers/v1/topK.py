@@ -1,17 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from app.schemas.recommendation import ItemFilter
 from app.schemas.topK import TopKRequest, TopKResponse
 from app.services.topK import get_recommendations_top_k
+from app.utils.payloads import FastJSONResponse, top_k_payload
 router = APIRouter(
     prefix="/v1",
     tags=["Recommendations"]
 )
 
-@router.get("/recommendations/top-k", response_model=TopKResponse)
+@router.get("/recommendations/top-k", response_model=TopKResponse, response_class=FastJSONResponse)
 def recommend(
-    req: TopKRequest = Depends()
+    req: TopKRequest = Depends(),
+    item_filter: ItemFilter = Depends()
 ):
-    return get_recommendations_top_k(
+    # 버전별로 미리 직렬화된 상품 조각을 이어 붙여 응답 (response_model 재검증 없음)
+    return top_k_payload(get_recommendations_top_k(
         tracking_key=req.tracking_key,
         lang=req.lang,
-        top_k=req.top_k
-    )
+        top_k=req.top_k,
+        item_filter=item_filter
+    ))
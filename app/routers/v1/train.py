@@ -1,6 +1,6 @@
-from fastapi import APIRouter
-from app.schemas.train import TrainResponse
-from app.services.trainer import train_models_for_site
+from fastapi import APIRouter, HTTPException
+from app.schemas.train import TrainJobResponse, TrainJobStatus
+from app.services.jobs import training_jobs
 
 router = APIRouter(
     prefix="/v1",
@@ -9,15 +9,32 @@ router = APIRouter(
 
 @router.post(
     "/sites/{tracking_key}/models",
-    response_model=TrainResponse,
+    response_model=TrainJobResponse,
+    status_code=202,
 )
-async def train_site_model_endpoint(tracking_key: str):
+def train_site_model_endpoint(tracking_key: str):
     """
-    언어별로 학습된 모델을 돌려줍니다.
+    사이트 학습 작업을 등록하고 바로 작업 id 를 돌려줍니다.
+    같은 사이트의 작업이 이미 진행 중이면 그 작업을 돌려줍니다. (deduplicated=true)
+    진행 상황과 결과는 GET /v1/jobs/{job_id} 로 확인합니다.
     """
-    results = train_models_for_site(tracking_key)
+    status, deduplicated = training_jobs.submit(tracking_key)
+    return TrainJobResponse(
+        job_id=status["job_id"],
+        tracking_key=tracking_key,
+        status=status["status"],
+        deduplicated=deduplicated,
+    )
 
-    return {
-        "tracking_key": tracking_key,
-        "models": results
-    }
+@router.get(
+    "/jobs/{job_id}",
+    response_model=TrainJobStatus,
+)
+def get_train_job_endpoint(job_id: str):
+    """
+    학습 작업의 상태·단계·단계별 소요 시간과, 끝났으면 언어별 모델 정보를 돌려줍니다.
+    """
+    status = training_jobs.get(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return status
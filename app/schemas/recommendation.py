@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+from typing import List, Optional
 
 class RecommendationRequest(BaseModel):
     tracking_key: str
@@ -26,7 +26,55 @@ class RecommendationItem(BaseModel):
     product_category_3_code: str
     product_category_3_name: str
 
+    # 직렬화된 JSON 조각 캐시 (app/utils/payloads.py) — 응답 필드가 아님
+    _json: Optional[bytes] = PrivateAttr(default=None)
+
+class ItemFilter(BaseModel):
+    """추천 후보 필터 (점수 배열에 마스크로 적용, app/services/filters.py)"""
+    model_config = ConfigDict(frozen=True)
+
+    exclude_sold_out: bool = Field(False, description="품절 상품 제외")
+    category_1_code: Optional[str] = Field(None, description="대분류 코드가 일치하는 상품만")
+    category_2_code: Optional[str] = Field(None, description="중분류 코드가 일치하는 상품만")
+    category_3_code: Optional[str] = Field(None, description="소분류 코드가 일치하는 상품만")
+    min_price: Optional[float] = Field(None, ge=0, description="판매가(할인가 우선) 하한")
+    max_price: Optional[float] = Field(None, ge=0, description="판매가(할인가 우선) 상한")
+    exclude_interacted: Optional[str] = Field(
+        None, description='이미 상호작용한 상품 제외: "all" 또는 tracking_type 목록 (예: "purchase,cart")'
+    )
+
+    @property
+    def active(self) -> bool:
+        return self != _NO_FILTER
+
+    @property
+    def interacted_kinds(self) -> list[str]:
+        if not self.exclude_interacted:
+            return []
+        return [kind.strip() for kind in self.exclude_interacted.split(",") if kind.strip()]
+
+_NO_FILTER = ItemFilter()
+
 class RecommendationResponse(BaseModel):
     tracking_key: str
     anon_id: str
     recommended_items: List[RecommendationItem]
+
+class SimilarItemsResponse(BaseModel):
+    tracking_key: str
+    product_code: str
+    recommended_items: List[RecommendationItem]
+
+class SessionRecommendationRequest(BaseModel):
+    tracking_key: str = Field(..., description="사이트 고유 트래킹 키")
+    anon_id: str = Field(..., description="방문자 anon_id (모델에 있으면 학습된 사용자 벡터 사용)")
+    lang: str = Field("und", description="페이지 언어 코드 (default und)")
+    product_codes: List[str] = Field(default_factory=list, max_length=1000, description="최근 본 상품코드 (최신순)")
+    top_k: int = Field(10, ge=1, le=100, description="추천 개수 (1~100)")
+    filters: ItemFilter = Field(default_factory=ItemFilter, description="품절·카테고리·가격 필터")
+
+class BatchRecommendationRequest(BaseModel):
+    tracking_key: str = Field(..., description="사이트 고유 트래킹 키")
+    lang: str = Field("und", description="페이지 언어 코드 (default und)")
+    anon_ids: List[str] = Field(..., min_length=1, max_length=10000, description="추천 받을 anon_id 목록")
+    top_k: int = Field(10, ge=1, le=100, description="사용자별 추천 개수 (1~100)")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Literal
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import List, Optional, Literal
 
 class TopKRequest(BaseModel):
     tracking_key: str = Field(..., description="사이트 고유 트래킹 키")
@@ -26,6 +26,9 @@ class TopKItem(BaseModel):
     product_category_3_name: str
     product_url: str
 
+    # 직렬화된 JSON 조각 캐시 (app/utils/payloads.py) — 응답 필드가 아님
+    _json: Optional[bytes] = PrivateAttr(default=None)
+
 class TopKResponse(BaseModel):
     tracking_key: str
     recommended_items: List[TopKItem]
\ No newline at end of file
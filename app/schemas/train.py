@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Optional
 from pydantic import BaseModel
 
 class ModelInfo(BaseModel):
@@ -6,7 +6,28 @@ class ModelInfo(BaseModel):
     user_map_path: str
     item_map_path: str
     item_meta_path: str
+    artifact_dir: Optional[str] = None
+    topn_items_path: Optional[str] = None
+    ann_index_dir: Optional[str] = None
 
 class TrainResponse(BaseModel):
     tracking_key: str
     models: Dict[str, ModelInfo]   # 언어 코드 → ModelInfo 매핑
+
+class TrainJobResponse(BaseModel):
+    job_id: str
+    tracking_key: str
+    status: str                    # queued / running / succeeded / failed
+    deduplicated: bool = False     # 같은 사이트의 진행 중 작업을 그대로 돌려준 경우
+
+class TrainJobStatus(BaseModel):
+    job_id: str
+    tracking_key: str
+    status: str
+    stage: Optional[str] = None    # waiting / load / train / finalize / done
+    created_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    timings: Dict[str, float] = {}  # 단계별 소요 시간(초)
+    models: Optional[Dict[str, ModelInfo]] = None
+    error: Optional[str] = None
@@ -0,0 +1,217 @@
+import logging
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from core.model.artifacts import ColumnarMeta, LoadedModel, StringColumn
+from app.schemas.recommendation import ItemFilter
+from app.services.metadata import _OverlayMeta, item_metadata
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_LEVELS = (1, 2, 3)
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "y", "yes")
+    return bool(value)
+
+
+def _as_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _string_values(column) -> np.ndarray:
+    """
+    ColumnarMeta 컬럼 → 문자열 object 배열 (빈 값·NaN 은 None).
+    StringColumn 은 행마다 decode 하지 않고 바이트 조각을 factorize 한 뒤 고유값만 decode 합니다.
+    """
+    if isinstance(column, StringColumn):
+        blob = column.data.tobytes()
+        offsets = column.offsets.tolist()
+        codes, uniques = pd.factorize(pd.Series([blob[a:b] for a, b in zip(offsets[:-1], offsets[1:])], dtype=object))
+        table = np.array([u.decode("utf-8") or None for u in uniques] + [None], dtype=object)
+        return table[codes]
+    values = np.asarray(column)
+    if values.dtype == bool:
+        return np.array([str(v) for v in values.tolist()], dtype=object)
+    return np.array([None if np.isnan(v) else str(v) for v in values.tolist()], dtype=object)
+
+
+def _float_values(column) -> np.ndarray:
+    """ColumnarMeta 컬럼 → float64 배열 (숫자가 아니면 NaN, _as_float 와 같은 규칙)"""
+    if isinstance(column, StringColumn):
+        return pd.to_numeric(pd.Series(_string_values(column), dtype=object), errors="coerce").to_numpy(np.float64)
+    return np.asarray(column, dtype=np.float64)
+
+
+def _bool_values(column) -> np.ndarray:
+    """ColumnarMeta 컬럼 → bool 배열 (_as_bool 과 같은 규칙, NaN 은 False)"""
+    if isinstance(column, StringColumn):
+        values = pd.Series(_string_values(column), dtype=object).fillna("")
+        return values.str.strip().str.lower().isin(("1", "true", "y", "yes")).to_numpy()
+    values = np.asarray(column)
+    if values.dtype == bool:
+        return values.copy()
+    values = values.astype(np.float64)
+    return ~np.isnan(values) & (values != 0)
+
+
+class ItemAttributes:
+    """
+    필터용 아이템 속성 배열 (아이템 인덱스에 정렬).
+
+    - present:  메타가 있는 아이템 (없는 아이템은 필터 요청에서 항상 제외 → top-k 가 줄지 않음)
+    - sold_out: 품절 여부
+    - price:    판매가 (할인가가 0 보다 크면 할인가, 아니면 정가, 모르면 NaN)
+    - categories[level]: 카테고리 코드의 정수 코드 배열 (-1 = 없음) + {코드 문자열: 정수}
+    모델 버전·메타 세대당 한 번 만들고, 요청마다 비교 연산 몇 번으로 마스크를 만듭니다.
+    """
+
+    def __init__(
+        self,
+        present: np.ndarray,
+        sold_out: np.ndarray,
+        price: np.ndarray,
+        categories: Dict[int, tuple],
+    ):
+        self.present = present
+        self.sold_out = sold_out
+        self.price = price
+        self.categories = categories
+
+    @classmethod
+    def build(cls, item_map, item_meta, n_items: int) -> "ItemAttributes":
+        """
+        ColumnarMeta(모델 아티팩트) 는 컬럼 배열에서 한 번에 만들고, 그 위에 덮어쓴
+        백그라운드 갱신 메타(_OverlayMeta)는 덮어쓴 상품만 고칩니다.
+        dict 메타(구버전 pickle 모델)는 아이템마다 조회합니다.
+        """
+        base, overlay = item_meta, None
+        if isinstance(item_meta, _OverlayMeta):
+            base, overlay = item_meta.base, item_meta.overlay
+        if isinstance(base, ColumnarMeta):
+            present, sold_out, price, category_values = cls._columnar_arrays(base, n_items)
+            rows = ((base.item_index.get(code), meta) for code, meta in (overlay or {}).items())
+        else:
+            present = np.zeros(n_items, dtype=bool)
+            sold_out = np.zeros(n_items, dtype=bool)
+            price = np.full(n_items, np.nan, dtype=np.float64)
+            category_values = {level: np.full(n_items, None, dtype=object) for level in CATEGORY_LEVELS}
+            codes = (item_map.get(idx) for idx in range(n_items))
+            rows = ((idx, item_meta.get(code) if code else None) for idx, code in enumerate(codes))
+
+        for idx, meta in rows:
+            if idx is None or not 0 <= idx < n_items:
+                continue
+            present[idx] = bool(meta)
+            if not meta:
+                sold_out[idx], price[idx] = False, np.nan
+                for level in CATEGORY_LEVELS:
+                    category_values[level][idx] = None
+                continue
+            sold_out[idx] = _as_bool(meta.get("product_sold_out", False))
+            dc_price = _as_float(meta.get("product_dc_price"))
+            price[idx] = dc_price if dc_price > 0 else _as_float(meta.get("product_price"))
+            for level in CATEGORY_LEVELS:
+                value = meta.get(f"product_category_{level}_code")
+                category_values[level][idx] = None if value in (None, "") else str(value)
+
+        categories = {}
+        for level, values in category_values.items():
+            codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+            categories[level] = (codes.astype(np.int32), {v: i for i, v in enumerate(uniques)})
+        return cls(present, sold_out, price, categories)
+
+    @staticmethod
+    def _columnar_arrays(item_meta: ColumnarMeta, n_items: int) -> tuple:
+        """ColumnarMeta 의 present·품절·가격·카테고리 컬럼 → (present, sold_out, price, {level: object 배열})"""
+        columns = item_meta.columns
+        present = np.zeros(n_items, dtype=bool)
+        if columns:
+            present[:] = np.asarray(item_meta.present[:n_items], dtype=bool)
+
+        sold_out = np.zeros(n_items, dtype=bool)
+        if "product_sold_out" in columns:
+            sold_out[:] = _bool_values(columns["product_sold_out"])[:n_items]
+        sold_out &= present
+
+        def _prices(name: str) -> np.ndarray:
+            if name not in columns:
+                return np.full(n_items, np.nan, dtype=np.float64)
+            return _float_values(columns[name])[:n_items]
+
+        dc_price = _prices("product_dc_price")
+        price = np.where(dc_price > 0, dc_price, _prices("product_price"))
+        price[~present] = np.nan
+
+        category_values = {}
+        for level in CATEGORY_LEVELS:
+            name = f"product_category_{level}_code"
+            values = np.full(n_items, None, dtype=object)
+            if name in columns:
+                values[:] = _string_values(columns[name])[:n_items]
+                values[~present] = None
+            category_values[level] = values
+        return present, sold_out, price, category_values
+
+    def mask(self, item_filter: ItemFilter) -> np.ndarray:
+        """필터를 통과하는 아이템 bool 배열"""
+        mask = self.present.copy()
+        if item_filter.exclude_sold_out:
+            mask &= ~self.sold_out
+        for level in CATEGORY_LEVELS:
+            wanted = getattr(item_filter, f"category_{level}_code")
+            if wanted is not None:
+                codes, vocab = self.categories[level]
+                mask &= codes == vocab.get(wanted, -2)
+        # NaN 가격은 비교가 항상 False 라 가격 조건이 있으면 자동으로 제외됨
+        if item_filter.min_price is not None:
+            mask &= self.price >= item_filter.min_price
+        if item_filter.max_price is not None:
+            mask &= self.price <= item_filter.max_price
+        return mask
+
+
+def exclude_seen(
+    loaded: LoadedModel,
+    uid: int,
+    mask: Optional[np.ndarray],
+    kinds: list,
+) -> Optional[np.ndarray]:
+    """
+    사용자 uid 가 이미 상호작용한 아이템(seen CSR 의 kinds 행)을 mask 에서 False 로 바꿉니다.
+    fancy-index 대입 한 번이라 비용은 행 nnz 에 비례합니다. (mask 가 None 이면 새로 만듦)
+    seen 이 없는 (구버전) 모델이나 저장되지 않은 종류는 조용히 건너뜁니다.
+    """
+    if not kinds or loaded.seen is None:
+        return mask
+    seen_idxs = loaded.seen.rows(kinds, uid)
+    if mask is None:
+        mask = np.ones(loaded.scorer.n_items, dtype=bool)
+    mask[seen_idxs] = False
+    return mask
+
+
+def item_mask(
+    loaded: LoadedModel,
+    tracking_key: str,
+    lang: str,
+    item_filter: Optional[ItemFilter],
+) -> Optional[np.ndarray]:
+    """
+    필터가 없으면 None, 있으면 점수 배열에 그대로 쓸 수 있는 bool 마스크 (n_items,).
+    속성 배열은 item_metadata() 세대(stamp)별로 LoadedModel 에 캐시합니다.
+    """
+    if item_filter is None or not item_filter.active:
+        return None
+    stamp, item_meta = item_metadata(loaded, tracking_key, lang)
+    attributes = loaded.cached(
+        "item_attributes",
+        lambda: ItemAttributes.build(loaded.item_map, item_meta, loaded.scorer.n_items),
+        stamp,
+    )
+    return attributes.mask(item_filter)
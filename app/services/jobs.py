@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _job_dir() -> str:
+    path = settings.TRAIN_JOB_DIR or os.path.join(settings.MODEL_BASE_DIR or "models", "_jobs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _status_path(job_dir: str, job_id: str) -> str:
+    return os.path.join(job_dir, f"{job_id}.json")
+
+
+def _site_marker(job_dir: str, tracking_key: str) -> str:
+    return os.path.join(job_dir, f"site-{tracking_key}.job")
+
+
+def _read_status(job_dir: str, job_id: str) -> Optional[dict]:
+    try:
+        with open(_status_path(job_dir, job_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_status(job_dir: str, status: dict) -> None:
+    """tmp 파일에 쓰고 rename — 읽는 쪽(다른 서버 워커)은 항상 완성된 JSON 만 봄"""
+    path = _status_path(job_dir, status["job_id"])
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(status, f, ensure_ascii=False, default=str)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _is_active(status: Optional[dict]) -> bool:
+    """상태가 queued/running 이고, 그 상태를 책임지는 프로세스가 살아 있으면 True"""
+    if not status or status.get("status") not in ACTIVE_STATUSES:
+        return False
+    pid = status.get("pid") if status["status"] == "running" else status.get("owner_pid")
+    return _pid_alive(pid)
+
+
+def _acquire_slot(job_dir: str, poll: float = 5.0):
+    """
+    서버 워커 전체에서 동시에 도는 학습 수를 TRAIN_JOB_CONCURRENCY 로 제한하는 슬롯.
+    flock 이라 프로세스가 죽으면 슬롯도 자동으로 풀립니다.
+    """
+    slots = max(1, settings.TRAIN_JOB_CONCURRENCY)
+    while True:
+        for i in range(slots):
+            fd = os.open(os.path.join(job_dir, f"slot-{i}.lock"), os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        time.sleep(poll)
+
+
+def _run_training_job(job_dir: str, job_id: str, tracking_key: str) -> None:
+    """
+    학습 프로세스(서버 워커와 분리된 프로세스 풀)에서 실행되는 작업 본체.
+    상태 파일에 단계·소요 시간을 기록하고, 끝나면 사이트 중복 방지 마커를 지웁니다.
+    """
+    from core.train_user import train_models_for_site
+
+    status = _read_status(job_dir, job_id) or {"job_id": job_id, "tracking_key": tracking_key}
+    slot = None
+    try:
+        # 1) 전역 동시 실행 슬롯 대기
+        status.update(stage="waiting")
+        _write_status(job_dir, status)
+        slot = _acquire_slot(job_dir)
+
+        # 2) 실행 — 단계가 바뀔 때마다 상태 파일 갱신
+        status.update(status="running", pid=os.getpid(), started_at=time.time(), timings={})
+        clock = {"stage": None, "t": time.monotonic()}
+
+        def on_stage(name: str) -> None:
+            now = time.monotonic()
+            if clock["stage"] is not None:
+                status["timings"][clock["stage"]] = round(now - clock["t"], 3)
+            clock.update(stage=name, t=now)
+            status["stage"] = name
+            _write_status(job_dir, status)
+
+        models = train_models_for_site(tracking_key, on_stage=on_stage)
+        on_stage("done")
+        status.update(status="succeeded", models=models)
+    except Exception as e:
+        logger.error(f"학습 작업 실패: {job_id} ({tracking_key}) {e}")
+        status.update(status="failed", error=str(getattr(e, "detail", e)))
+    finally:
+        status["finished_at"] = time.time()
+        _write_status(job_dir, status)
+        _release_site(job_dir, tracking_key, job_id)
+        if slot is not None:
+            os.close(slot)
+
+
+def _release_site(job_dir: str, tracking_key: str, job_id: str) -> None:
+    marker = _site_marker(job_dir, tracking_key)
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            if f.read().strip() != job_id:
+                return
+        os.remove(marker)
+    except OSError:
+        pass
+
+
+class TrainingJobQueue:
+    """
+    학습 작업 큐. 서버 워커는 작업을 등록만 하고, 학습은 별도 프로세스 풀에서 돕니다.
+
+    - submit(): 같은 사이트의 작업이 이미 진행 중이면 그 작업 id 를 그대로 돌려줍니다.
+      (사이트 마커 파일을 O_EXCL 로 만들어, 여러 서버 워커 사이에서도 중복 방지)
+    - get(): 상태 파일(TRAIN_JOB_DIR/{job_id}.json)을 읽으므로 어느 워커로 요청이 가도 같은 결과.
+    - 프로세스 풀 크기는 TRAIN_JOB_WORKERS, 전체 동시 실행 수는 TRAIN_JOB_CONCURRENCY 슬롯으로 제한.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.TRAIN_JOB_WORKERS
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # 서버 프로세스의 스레드·소켓을 물려받지 않도록 spawn
+                self._pool = ProcessPoolExecutor(
+                    max_workers=max(1, self.max_workers),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def submit(self, tracking_key: str) -> Tuple[dict, bool]:
+        """
+        Returns:
+            (작업 상태, 중복 여부) — 중복이면 이미 진행 중인 작업의 상태
+        """
+        job_dir = _job_dir()
+        marker = _site_marker(job_dir, tracking_key)
+        status = {
+            "job_id": uuid.uuid4().hex,
+            "tracking_key": tracking_key,
+            "status": "queued",
+            "stage": "queued",
+            "owner_pid": os.getpid(),
+            "created_at": time.time(),
+        }
+        # 상태 파일을 먼저 기록 — 마커를 본 다른 워커가 항상 상태를 읽을 수 있도록
+        _write_status(job_dir, status)
+        job_id = status["job_id"]
+
+        # 마커는 내용을 먼저 쓴 임시 파일을 link — 빈 마커가 보이는 순간이 없음 (이미 있으면 실패)
+        tmp = f"{marker}.{job_id}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(job_id)
+        try:
+            for _ in range(2):
+                try:
+                    os.link(tmp, marker)
+                    break
+                except FileExistsError:
+                    try:
+                        with open(marker, "r", encoding="utf-8") as f:
+                            existing_id = f.read().strip()
+                    except OSError:
+                        continue
+                    existing = _read_status(job_dir, existing_id)
+                    if _is_active(existing):
+                        os.remove(_status_path(job_dir, job_id))
+                        return existing, True
+                    # 주인 프로세스가 죽은 채 남은 마커 → 치우고 다시 시도
+                    logger.warning(f"오래된 학습 마커 정리: {tracking_key} ({existing_id})")
+                    _release_site(job_dir, tracking_key, existing_id)
+            else:
+                os.remove(_status_path(job_dir, job_id))
+                raise RuntimeError(f"학습 작업 등록 실패: {tracking_key}")
+        finally:
+            os.remove(tmp)
+
+        try:
+            self._executor().submit(_run_training_job, job_dir, job_id, tracking_key)
+        except Exception as e:
+            status.update(status="failed", error=str(e), finished_at=time.time())
+            _write_status(job_dir, status)
+            _release_site(job_dir, tracking_key, job_id)
+            raise
+        logger.info(f"🧵 학습 작업 등록: {tracking_key} → {job_id}")
+        return status, False
+
+    def get(self, job_id: str) -> Optional[dict]:
+        if not job_id.isalnum():
+            return None
+        status = _read_status(_job_dir(), job_id)
+        if status and status.get("status") in ACTIVE_STATUSES and not _is_active(status):
+            # 실행하던 프로세스가 사라졌는데 최종 상태를 못 남긴 경우
+            status = dict(status, status="failed", error="training process exited unexpectedly")
+        return status
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+training_jobs = TrainingJobQueue()
@@ -0,0 +1,164 @@
+import time
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from app.config import settings
+from app.services import metrics
+from core.model.artifacts import LoadedModel
+from core.data_loader.clickhouse import load_item_metadata_full
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]  # (tracking_key, lang)
+
+
+def _fetch_meta(tracking_key: str, lang: str | None = None) -> dict[str, dict]:
+    """
+    ClickHouse에서 tracking_key에 대한 전체 item metadata를 불러와
+    {product_code: {...메타...}} 형태로 반환합니다.
+    """
+    with metrics.METADATA_FETCH.time():
+        df = load_item_metadata_full(tracking_key, lang=lang)
+        df = df.fillna("")  # NaN 방지
+        return df.set_index("product_code").to_dict(orient="index")
+
+
+# ClickHouse 메타 캐시 (METADATA_SOURCE="clickhouse" 모드 전용)
+@lru_cache(maxsize=64)
+def load_full_meta_cached(tracking_key: str, lang: str | None = None) -> dict[str, dict]:
+    return _fetch_meta(tracking_key, lang)
+
+
+def _full_meta_cache_stats() -> dict:
+    info = load_full_meta_cached.cache_info()
+    # lru_cache 는 miss 마다 한 항목을 넣으므로 빠져나간 항목 수 = misses - currsize
+    return {("hit",): info.hits, ("miss",): info.misses, ("eviction",): max(0, info.misses - info.currsize)}
+
+
+metrics.registry.register(metrics.CallbackMetric(
+    "recommender_clickhouse_metadata_cache_total",
+    "METADATA_SOURCE=\"clickhouse\" 메타 캐시(lru_cache) hit/miss/eviction 수",
+    ["result"], _full_meta_cache_stats, kind="counter",
+))
+
+
+class _OverlayMeta:
+    """모델 item_meta 위에 백그라운드로 갱신한 ClickHouse 메타를 덮어쓴 조회용 뷰"""
+
+    def __init__(self, base, overlay: Dict[str, dict]):
+        self.base = base
+        self.overlay = overlay
+
+    def get(self, code: str, default=None):
+        meta = self.overlay.get(code)
+        if meta is not None:
+            return meta
+        return self.base.get(code, default)
+
+
+class MetadataRefresher:
+    """
+    요청 경로 밖에서 ClickHouse 메타를 TTL 주기로 갱신하는 백그라운드 작업.
+
+    - 요청은 lookup() 으로 현재 가진 메타만 읽고, ClickHouse 를 기다리지 않습니다.
+    - 조회된 적 있는 (tracking_key, lang) 만 ttl 초마다 다시 불러옵니다.
+    - 마지막 성공 후 2·ttl 이 지나면 그 메타는 버리고 모델 메타로 돌아갑니다. (staleness 상한)
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else settings.METADATA_REFRESH_TTL
+        self._lock = threading.Lock()
+        self._data: Dict[Key, Tuple[float, int, Dict[str, dict]]] = {}  # key → (fetched_at, generation, meta)
+        self._wanted: set = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def lookup(self, tracking_key: str, lang: str) -> Tuple[int, Optional[Dict[str, dict]]]:
+        """(generation, 메타 dict 또는 None) — 절대 블로킹하지 않음"""
+        key = (tracking_key, lang)
+        with self._lock:
+            self._wanted.add(key)
+            entry = self._data.get(key)
+        if entry is None:
+            metrics.METADATA_MISS.inc()
+            return 0, None
+        fetched_at, generation, meta = entry
+        if time.monotonic() - fetched_at > 2 * self.ttl:
+            metrics.METADATA_STALE.inc()
+            return 0, None
+        metrics.METADATA_HIT.inc()
+        return generation, meta
+
+    def refresh_due(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                key for key in self._wanted
+                if key not in self._data or now - self._data[key][0] >= self.ttl
+            ]
+        for key in due:
+            if self._stop.is_set():
+                return
+            try:
+                meta = _fetch_meta(*key)
+            except Exception as e:
+                logger.error(f"메타 갱신 실패: {key} ({e})")
+                continue
+            with self._lock:
+                prev = self._data.get(key)
+                self._data[key] = (time.monotonic(), (prev[1] if prev else 0) + 1, meta)
+
+    def _run(self) -> None:
+        while not self._stop.wait(min(self.ttl, 60.0)):
+            try:
+                self.refresh_due()
+            except Exception as e:
+                logger.error(f"메타 갱신 루프 오류: {e}")
+
+    def start(self) -> None:
+        if self._thread is not None or not self.enabled:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metadata-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+metadata_refresher = MetadataRefresher()
+
+
+def item_metadata(loaded: LoadedModel, tracking_key: str, lang: str):
+    """
+    요청 경로에서 쓰는 상품 메타 조회 객체와 그 세대(stamp)를 반환합니다.
+    모델 아티팩트의 item_meta 가 기본이고, 백그라운드 갱신된 메타가 있으면 덮어씁니다.
+    ClickHouse 를 직접 호출하지 않습니다.
+
+    Returns:
+        (stamp, meta) — meta 는 .get(code) 를 지원, stamp 가 바뀌면 파생 캐시를 다시 만듭니다.
+    """
+    if metadata_refresher.enabled:
+        generation, overlay = metadata_refresher.lookup(tracking_key, lang)
+        if overlay:
+            return generation, _OverlayMeta(loaded.item_meta, overlay)
+    return 0, loaded.item_meta
+
+
+def popular_metadata(loaded: LoadedModel, tracking_key: str, lang: str):
+    """
+    인기추천 경로의 메타 조회 객체와 세대(stamp).
+    METADATA_SOURCE="clickhouse" 이면 예전처럼 ClickHouse 전체 메타(캐시)를,
+    기본값 "model" 이면 item_metadata() 와 같은 모델 메타를 사용합니다.
+    """
+    if settings.METADATA_SOURCE == "clickhouse":
+        return 0, load_full_meta_cached(tracking_key, lang)
+    return item_metadata(loaded, tracking_key, lang)
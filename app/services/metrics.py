@@ -0,0 +1,483 @@
+import os
+import json
+import math
+import time
+import logging
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prometheus 텍스트 포맷 (GET /metrics)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += seconds
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+
+class _Timer:
+    """with 블록 소요 시간을 observe (예외가 나도 기록)"""
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._child.observe(time.perf_counter() - self._started)
+
+
+class _Metric:
+    """
+    레이블 조합(label set)별 child 를 미리 만들어 두는 메트릭.
+    요청 경로는 모듈 상수로 잡아 둔 child 의 inc()/observe() 만 호출하므로
+    레이블 조회·문자열 처리가 없습니다. labels() 는 등록·드문 경로용입니다.
+    """
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), presets: Iterable[Sequence[str]] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        for values in presets:
+            self.labels(*values)
+        if not self.labelnames:
+            self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: 레이블 {self.labelnames} 에 값 {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def collect(self) -> list:
+        """이 프로세스의 현재 값 (JSON 으로 기록할 수 있는 [[레이블 값들], 값...] 목록)"""
+        raise NotImplementedError
+
+    def merge(self, collected: List[list]) -> dict:
+        """워커별 collect() 결과를 합칩니다. → {레이블 값 튜플: 값}"""
+        raise NotImplementedError
+
+    def _samples(self, merged: dict) -> List[str]:
+        raise NotImplementedError
+
+    def render(self, merged: dict) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples(merged)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def collect(self) -> list:
+        return [[list(key), child.value] for key, child in list(self._children.items())]
+
+    def merge(self, collected: List[list]) -> dict:
+        merged: Dict[tuple, float] = {}
+        for samples in collected:
+            for key, value in samples:
+                key = tuple(key)
+                merged[key] = merged.get(key, 0.0) + value
+        return merged
+
+    def _samples(self, merged: dict) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in merged.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), presets: Iterable[Sequence[str]] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, help, labelnames, presets)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, seconds: float) -> None:
+        self.labels().observe(seconds)
+
+    def collect(self) -> list:
+        samples = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                samples.append([list(key), list(child.counts), child.sum])
+        return samples
+
+    def merge(self, collected: List[list]) -> dict:
+        merged: Dict[tuple, list] = {}
+        for samples in collected:
+            for key, counts, total in samples:
+                if len(counts) != len(self.buckets) + 1:
+                    continue    # 버킷 구성이 다른 (이전 배포의) 워커 기록
+                key = tuple(key)
+                current = merged.setdefault(key, [[0] * len(counts), 0.0])
+                current[0] = [a + b for a, b in zip(current[0], counts)]
+                current[1] += total
+        return merged
+
+    def _samples(self, merged: dict) -> List[str]:
+        lines = []
+        for key, (counts, total) in merged.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    스크레이프 시점에 callback() 이 돌려준 {레이블 값 튜플: 값} 으로 채우는 메트릭.
+    (로드된 모델 메모리, lru_cache 통계처럼 요청 경로에서 갱신할 필요가 없는 값)
+    워커별 값은 aggregate("sum" 또는 "max") 로 합칩니다. gauge 는 살아 있는 워커의 값만 씁니다.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], callback: Callable[[], Dict[tuple, float]],
+                 kind: str = "gauge", aggregate: str = "sum"):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.kind = kind
+        self.aggregate = aggregate
+
+    def collect(self) -> list:
+        return [[list(key), value] for key, value in self.callback().items()]
+
+    def merge(self, collected: List[list]) -> dict:
+        merged: Dict[tuple, float] = {}
+        for samples in collected:
+            for key, value in samples:
+                key = tuple(key)
+                if key not in merged:
+                    merged[key] = value
+                elif self.aggregate == "max":
+                    merged[key] = max(merged[key], value)
+                else:
+                    merged[key] += value
+        return merged
+
+    def render(self, merged: dict) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(merged.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+def _alive(pid) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except PermissionError:
+        return True
+    except (ProcessLookupError, TypeError, ValueError):
+        return False
+    return True
+
+
+class MetricsRegistry:
+    """
+    메트릭 목록 + 워커 간 합산.
+
+    gunicorn 워커마다 값이 따로 쌓이므로, 각 워커가 METRICS_FLUSH_INTERVAL 마다(그리고 스크레이프 때)
+    자기 값을 METRICS_DIR/{master pid}/{pid}.json 에 통째로 기록하고, /metrics 는 같은 master 아래
+    모든 워커 파일을 합쳐 응답합니다. (요청 수 _stats 파일처럼 tmp 에 쓴 뒤 os.replace)
+    - 어느 워커가 스크레이프를 받아도 같은 합계가 나오고, 파일 값은 줄지 않으므로 counter 가 되돌아가지 않습니다.
+    - 종료된 워커의 counter·histogram 은 마지막 기록을 계속 더하고, gauge 는 살아 있는 워커 값만 씁니다.
+    - 다른 워커의 값은 최대 METRICS_FLUSH_INTERVAL 초 늦게 반영됩니다.
+    METRICS_DIR 이 비어 있으면 이 프로세스 값만 응답합니다.
+    """
+
+    def __init__(self):
+        self._metrics: List = []
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._interval = 0.0
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collect(self) -> Dict[str, list]:
+        collected = {}
+        for metric in self._metrics:
+            try:
+                collected[metric.name] = metric.collect()
+            except Exception as e:
+                logger.debug(f"메트릭 수집 실패: {metric.name} ({e})")
+        return collected
+
+    @staticmethod
+    def _worker_dir() -> Optional[str]:
+        if not settings.METRICS_DIR:
+            return None
+        return os.path.join(settings.METRICS_DIR, str(os.getppid()))
+
+    def flush(self) -> None:
+        """이 워커의 현재 값을 METRICS_DIR/{master pid}/{pid}.json 에 기록합니다."""
+        out_dir = self._worker_dir()
+        if out_dir is None:
+            return
+        snapshot = {"pid": os.getpid(), "metrics": self.collect()}
+        with self._flush_lock:
+            os.makedirs(out_dir, exist_ok=True)
+            path = os.path.join(out_dir, f"{os.getpid()}.json")
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, path)
+
+    def _gather(self) -> List[Tuple[bool, Dict[str, list]]]:
+        """워커별 [(살아 있는지, {메트릭 이름: collect()})]"""
+        out_dir = self._worker_dir()
+        if out_dir is None:
+            return [(True, self.collect())]
+        try:
+            self.flush()
+            names = os.listdir(out_dir)
+        except OSError as e:
+            logger.warning(f"메트릭 파일 기록 실패, 이 워커 값만 응답: {e}")
+            return [(True, self.collect())]
+        snapshots = []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(out_dir, name), "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshots.append((_alive(snapshot.get("pid")), snapshot.get("metrics", {})))
+        return snapshots
+
+    def render(self) -> str:
+        snapshots = self._gather()
+        lines: List[str] = []
+        for metric in self._metrics:
+            live_only = metric.kind == "gauge"
+            collected = [
+                values[metric.name] for alive, values in snapshots
+                if metric.name in values and (alive or not live_only)
+            ]
+            try:
+                lines.extend(metric.render(metric.merge(collected)))
+            except Exception as e:
+                lines.append(f"# {metric.name} 수집 실패: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"메트릭 파일 기록 실패: {e}")
+
+    def start(self) -> None:
+        if self._thread is not None or not settings.METRICS_DIR or settings.METRICS_FLUSH_INTERVAL <= 0:
+            return
+        self._interval = settings.METRICS_FLUSH_INTERVAL
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"메트릭 파일 기록 실패: {e}")
+
+
+registry = MetricsRegistry()
+
+# ------------------------------------------------------------------ 요청 경로 단계별 지연
+
+STAGES = ("find_version", "model_load", "score", "hydrate", "fill", "metadata_fetch")
+
+stage_seconds = registry.register(Histogram(
+    "recommender_stage_seconds",
+    "추천 요청 단계별 소요 시간 (find_version: 최신 버전 디렉터리 탐색, model_load: 모델 로드, "
+    "score: top-N 조회·점수 계산, hydrate: 상품 메타 채우기, fill: 인기추천 부족분 채우기, "
+    "metadata_fetch: ClickHouse 메타 조회)",
+    ["stage"], [(s,) for s in STAGES],
+))
+FIND_VERSION = stage_seconds.labels("find_version")
+MODEL_LOAD = stage_seconds.labels("model_load")
+SCORE = stage_seconds.labels("score")
+HYDRATE = stage_seconds.labels("hydrate")
+FILL = stage_seconds.labels("fill")
+METADATA_FETCH = stage_seconds.labels("metadata_fetch")
+
+request_seconds = registry.register(Histogram(
+    "recommender_http_request_seconds",
+    "라우트별 HTTP 요청 처리 시간 (등록되지 않은 경로는 route=\"other\")",
+    ["route"], [("other",)],
+))
+
+# ------------------------------------------------------------------ 캐시
+
+CACHE_RESULTS = {
+    "model": ("hit", "miss", "eviction"),
+    "response": ("hit", "miss", "eviction"),
+    "metadata_overlay": ("hit", "miss", "stale"),
+}
+
+cache_events = registry.register(Counter(
+    "recommender_cache_events_total",
+    "캐시별 조회 결과 수 (model: 모델 레지스트리, eviction 은 교체된 이전 버전 해제 / "
+    "response: 사용자별 응답 캐시 / metadata_overlay: 백그라운드 갱신 메타, stale 은 2·TTL 지나 버린 조회)",
+    ["cache", "result"], [(c, r) for c, results in CACHE_RESULTS.items() for r in results],
+))
+MODEL_HIT = cache_events.labels("model", "hit")
+MODEL_MISS = cache_events.labels("model", "miss")
+MODEL_EVICTION = cache_events.labels("model", "eviction")
+RESPONSE_HIT = cache_events.labels("response", "hit")
+RESPONSE_MISS = cache_events.labels("response", "miss")
+RESPONSE_EVICTION = cache_events.labels("response", "eviction")
+METADATA_HIT = cache_events.labels("metadata_overlay", "hit")
+METADATA_MISS = cache_events.labels("metadata_overlay", "miss")
+METADATA_STALE = cache_events.labels("metadata_overlay", "stale")
+
+# ------------------------------------------------------------------ 폴백
+
+FALLBACK_REASONS = ("no_model", "no_user", "exception", "short_fill")
+
+fallbacks = registry.register(Counter(
+    "recommender_fallbacks_total",
+    "인기추천 폴백 사유별 횟수 (no_model: 모델 없음, no_user: 모델에 없는 사용자·세션, "
+    "exception: 라우터의 예외 폴백, short_fill: 결과가 모자라 인기추천으로 채움)",
+    ["reason"], [(r,) for r in FALLBACK_REASONS],
+))
+FALLBACK_NO_MODEL = fallbacks.labels("no_model")
+FALLBACK_NO_USER = fallbacks.labels("no_user")
+FALLBACK_EXCEPTION = fallbacks.labels("exception")
+FALLBACK_SHORT_FILL = fallbacks.labels("short_fill")
+
+# ------------------------------------------------------------------ ClickHouse
+
+QUERIES = (
+    "popular_items", "events", "events_encoded", "interactions_aggregated",
+    "item_metadata_latest", "site_activity", "max_event_ts", "item_metadata", "item_metadata_full", "other",
+)
+
+clickhouse_seconds = registry.register(Histogram(
+    "recommender_clickhouse_query_seconds",
+    "ClickHouse 질의별 소요 시간 (스트리밍 질의는 결과를 끝까지 읽을 때까지)",
+    ["query"], [(q,) for q in QUERIES], buckets=QUERY_BUCKETS,
+))
+clickhouse_errors = registry.register(Counter(
+    "recommender_clickhouse_query_errors_total",
+    "ClickHouse 질의별 실패 수",
+    ["query"], [(q,) for q in QUERIES],
+))
+
+
+def clickhouse_query(name: Optional[str]) -> Tuple[_HistogramChild, _CounterChild]:
+    """질의 이름 → (소요 시간 child, 실패 child). 등록되지 않은 이름은 "other"."""
+    name = name if name in QUERIES else "other"
+    return clickhouse_seconds.labels(name), clickhouse_errors.labels(name)
+
+
+class RequestLatencyMiddleware:
+    """
+    라우트 템플릿(예: /v1/items/{product_code}/similar) 별 요청 처리 시간을 기록하는 ASGI 미들웨어.
+    register_routes() 로 미리 등록한 라우트만 레이블로 쓰고, 나머지는 "other" 로 모읍니다.
+    스트리밍 응답은 본문 전송이 끝날 때까지를 잽니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._other = request_seconds.labels("other")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            child = request_seconds._children.get((route,), self._other) if route else self._other
+            child.observe(time.perf_counter() - started)
+
+
+def register_routes(paths: Iterable[str]) -> None:
+    """요청 지연 히스토그램의 route 레이블을 미리 만들어 둡니다. (앱 생성 시 한 번)"""
+    for path in paths:
+        request_seconds.labels(path)
@@ -1,33 +1,25 @@
-import os
+import time
 import numpy as np
 import logging
 import pickle
-from functools import lru_cache
+import weakref
+from typing import Iterator
 from fastapi import HTTPException
-from core.model.lightfm_trainer import load_latest_model
-from app.utils.model_utils import find_latest_version_dir
-from app.schemas.recommendation import RecommendationResponse, RecommendationItem
-from core.data_loader.clickhouse import load_popular_items, load_item_metadata_full
+from core.model.artifacts import LoadedModel
+from core.model.scorer import top_k_indices
+from core.model.similar import normalized_item_embeddings, similar_to
+from app.config import settings
+from app.services.registry import model_registry
+from app.schemas.recommendation import ItemFilter, RecommendationResponse, RecommendationItem, SimilarItemsResponse
+from app.services import metrics
+from app.services.filters import exclude_seen, item_mask
+from app.services.metadata import item_metadata, popular_metadata, load_full_meta_cached
+from app.services.response_cache import response_cache, response_etag
+from app.utils.payloads import encode_items, item_json
+from core.data_loader.clickhouse import load_popular_items
 
 logger = logging.getLogger(__name__)
 
-# 1) 모델 로드 캐시 (v{n}/{lang} 단위)
-@lru_cache(maxsize=128)
-def _load_model_cached(model_dir: str):
-    logger.info(f"📦 캐시에서 모델 로딩: {model_dir}")
-    return load_latest_model(model_dir)
-
-# 1) 인기메타 캐시: tracking_key별로 한 번만 전체 메타를 dict로 로드
-@lru_cache(maxsize=64)
-def _load_full_meta_cached(tracking_key: str, lang: str | None = None) -> dict[str, dict]:
-    """
-    ClickHouse에서 tracking_key에 대한 전체 item metadata를 불러와
-    {product_code: {...메타...}} 형태로 반환합니다.
-    """
-    df = load_item_metadata_full(tracking_key, lang=lang)
-    df = df.fillna("")  # NaN 방지
-    return df.set_index("product_code").to_dict(orient="index")
-
 def fetch_popular_codes(
     tracking_key: str,
     lang: str = "und",
@@ -56,18 +48,32 @@ def get_recommendations(
 ) -> RecommendationResponse:
     logger.info("✔️ 인기 상품 추천 로직 실행")
 
-    # 1) 인기 코드 조회 (항상 List[str])
+    # 1) 모델 기반 인기: 버전별로 캐시된 (검증 완료) 인기 리스트를 잘라서 반환
+    if use_model_popular:
+        try:
+            lease = model_registry.acquire(tracking_key, lang)
+        except FileNotFoundError:
+            raise HTTPException(404, "모델을 찾을 수 없습니다.")
+        with lease as loaded:
+            items = _popular_items(loaded, tracking_key, lang)
+        return RecommendationResponse.model_construct(
+            tracking_key=tracking_key,
+            anon_id=anon_id,
+            recommended_items=items[:top_k]
+        )
+
+    # 2) ClickHouse 집계 기반 인기 코드 조회 (항상 List[str])
     codes = fetch_popular_codes(
         tracking_key,
         lang=lang,
         top_k=top_k,
-        use_model=use_model_popular
+        use_model=False
     )
 
-    # 2) 전체 메타 딕셔너리 (기존 캐시)
-    full_meta = _load_full_meta_cached(tracking_key, lang)
+    # 3) 전체 메타 딕셔너리 (기존 캐시)
+    full_meta = load_full_meta_cached(tracking_key, lang)
 
-    # 3) RecommendationItem 생성
+    # 4) RecommendationItem 생성
     items: list[RecommendationItem] = []
     for code in codes:
         meta = full_meta.get(code)
@@ -82,123 +88,481 @@ def get_recommendations(
         recommended_items=items
     )
 
+def _model_popular_items(loaded: LoadedModel, tracking_key: str, lang: str) -> list[RecommendationItem]:
+    """
+    item_bias 인기 순위(최대 POPULAR_RANK_SIZE개)를 모델 메타로 채운 RecommendationItem 리스트.
+    모델 버전(메타 갱신 세대)당 한 번만 만들고, 요청은 앞에서부터 잘라 씁니다.
+    """
+    stamp, item_meta = item_metadata(loaded, tracking_key, lang)
+
+    def _build() -> list[RecommendationItem]:
+        items = []
+        for idx in loaded.popular_ranking():
+            code = loaded.item_map.get(int(idx))
+            meta = item_meta.get(code) if code else None
+            if not meta:
+                continue
+            items.append(RecommendationItem(product_code=code, **meta))
+        return encode_items(items)
+
+    return loaded.cached("model_popular_items", _build, stamp)
+
+def _popular_items(loaded: LoadedModel, tracking_key: str, lang: str) -> list[RecommendationItem]:
+    """
+    모델 인기 순위를 인기추천 메타(popular_metadata)로 채운 리스트 (모델 버전·메타 세대당 한 번 생성).
+    인기추천 폴백과 관심 기반 추천의 부족분 채우기가 함께 사용합니다.
+    """
+    stamp, full_meta = popular_metadata(loaded, tracking_key, lang)
+
+    def _build() -> list[RecommendationItem]:
+        items = []
+        for model_item in _model_popular_items(loaded, tracking_key, lang):
+            meta = full_meta.get(model_item.product_code)
+            if not meta:
+                logger.warning(f"인기추천 메타 없음: {model_item.product_code}")
+                continue
+            items.append(RecommendationItem(product_code=model_item.product_code, **meta))
+        return encode_items(items)
+
+    return loaded.cached("popular_items", _build, stamp)
+
+def _masked_popular_items(
+    loaded: LoadedModel,
+    item_meta,
+    objects: dict,
+    mask: np.ndarray,
+    top_k: int
+) -> list[RecommendationItem]:
+    """필터 요청용 인기 순위: item_bias 에 마스크를 씌워 상위 top_k 개 (요청마다 계산, 캐시 안 함)"""
+    idxs = top_k_indices(loaded.scorer.item_biases, top_k, mask)
+    return _build_items(idxs, loaded.item_map, item_meta, objects)[1]
+
 def get_interest_based_recommendations(
     tracking_key: str,
     anon_id: str,
     lang: str = "und",
-    top_k: int = 10
+    top_k: int = 10,
+    item_filter: ItemFilter | None = None
 ) -> RecommendationResponse:
     """
     학습된 LightFM 모델을 사용해 관심 기반 추천을 반환합니다.
     추천된 상품의 모든 메타(이름, 가격, 이미지 등)는
-    학습 시 저장한 item_meta.pkl 에서 바로 가져옵니다.
+    학습 시 저장한 item_meta(.pkl 또는 mmap 아티팩트) 에서 바로 가져오며,
+    요청 경로에서 ClickHouse 를 호출하지 않습니다. (app/services/metadata.py 참고)
     """
-    base = os.getenv("MODEL_BASE_DIR", "/app/models")
-    # 1) 최신 모델 디렉터리 찾기
-    try:
-        model_dir = find_latest_version_dir(tracking_key, lang, base)
-    except FileNotFoundError:
-        logger.warning("모델 디렉터리 없음 → 인기추천으로 폴백")
-        return get_recommendations(tracking_key, anon_id, lang, top_k)
+    return get_interest_based_recommendations_with_etag(tracking_key, anon_id, lang, top_k, item_filter)[0]
 
-    # 2) 모델·맵·메타 로드 (LRU 캐시)
+def get_interest_based_recommendations_with_etag(
+    tracking_key: str,
+    anon_id: str,
+    lang: str = "und",
+    top_k: int = 10,
+    item_filter: ItemFilter | None = None
+) -> tuple[RecommendationResponse, str | None]:
+    """
+    get_interest_based_recommendations + 응답 ETag.
+
+    (사이트, 언어, 모델 버전, 메타 세대, 사용자, 필터) 별로 상위 RESPONSE_CACHE_TOP_K 개를 한 번만 계산해
+    응답 캐시에 두고, top_k 가 달라도 앞부분을 잘라 응답합니다. 모델에 없는 사용자는 공유 항목 하나를 씁니다.
+    모델이 없어 ClickHouse 인기추천으로 폴백한 경우 ETag 는 None 입니다. (필터도 적용되지 않음)
+    """
+    # 1) 활성 모델 임대 (공유 모델 레지스트리)
     try:
-        model, user_map, item_map, item_meta = _load_model_cached(model_dir)
+        lease = model_registry.acquire(tracking_key, lang)
     except FileNotFoundError as e:
-        logger.error(f"모델 파일 로드 실패: {e} → 인기추천 폴백")
-        return get_recommendations(tracking_key, anon_id, lang, top_k)
+        logger.warning(f"모델 없음: {e} → 인기추천으로 폴백")
+        metrics.FALLBACK_NO_MODEL.inc()
+        return get_recommendations(tracking_key, anon_id, lang, top_k), None
+
+    with lease as loaded:
+        stamp, _ = item_metadata(loaded, tracking_key, lang)
+        item_filter = item_filter if item_filter is not None and item_filter.active else None
+        version = lease.version
+        # 모델에 없는 사용자는 모두 같은 인기추천을 받으므로 사용자별이 아닌 공유 키 하나에 캐시
+        # (새 방문자마다 같은 목록이 쌓여 개인화 항목을 LRU 밖으로 밀어내지 않도록)
+        cache_user = anon_id if anon_id in loaded.user_map else None
+        key = (tracking_key, lang, version, stamp, cache_user, item_filter)
+
+        # 2) 응답 캐시 조회 → 없으면 상위 RESPONSE_CACHE_TOP_K 개 계산 후 저장
+        items = response_cache.get(key) if response_cache.enabled else None
+        if items is None:
+            depth = max(top_k, settings.RESPONSE_CACHE_TOP_K) if response_cache.enabled else top_k
+            items = _interest_based_from_model(
+                loaded, tracking_key, anon_id, lang, depth,
+                item_mask(loaded, tracking_key, lang, item_filter),
+                item_filter.interacted_kinds if item_filter is not None else [],
+            ).recommended_items
+            response_cache.put(key, items)
+
+    response = RecommendationResponse.model_construct(
+        tracking_key=tracking_key,
+        anon_id=anon_id,
+        recommended_items=items[:top_k]
+    )
+    return response, response_etag(tracking_key, lang, version, stamp, anon_id, item_filter, top_k)
+
+def _interest_based_from_model(
+    loaded: LoadedModel,
+    tracking_key: str,
+    anon_id: str,
+    lang: str,
+    top_k: int,
+    mask: np.ndarray | None = None,
+    seen_kinds: list[str] | None = None
+) -> RecommendationResponse:
+    """
+    임대한 모델 한 벌로 관심 기반 추천을 계산합니다.
+    mask(item_mask 결과)가 있으면 top-N 테이블 대신 점수 배열에 마스크를 씌워 부분 정렬합니다.
+    seen_kinds(예: ["purchase"])가 있으면 사용자가 이미 상호작용한 아이템도 마스크로 뺍니다.
+    """
+    user_map, item_map = loaded.user_map, loaded.item_map
+    stamp, item_meta = item_metadata(loaded, tracking_key, lang)
+    objects = loaded.cached("item_objects", dict, stamp)
 
     # 3) 사용자 존재 여부 체크
     if anon_id not in user_map:
         logger.info(f"{anon_id} 모델에 없음 → 인기추천 폴백")
+        metrics.FALLBACK_NO_USER.inc()
+        if mask is not None:
+            return RecommendationResponse.model_construct(
+                tracking_key=tracking_key,
+                anon_id=anon_id,
+                recommended_items=_masked_popular_items(loaded, item_meta, objects, mask, top_k)
+            )
         return get_recommendations(tracking_key, anon_id, lang, top_k)
 
-    # 4) 예측: scores 계산
+    # 4) 미리 계산된 top-N 테이블이 있으면 조회 + 슬라이스로 끝냄
     uid = user_map[anon_id]
-    ids = np.arange(len(item_map))
-    scores = model.predict(uid, ids)
+    with metrics.SCORE.time():
+        mask = exclude_seen(loaded, uid, mask, seen_kinds)
+        if mask is None and loaded.topn_covers(top_k):
+            top_idxs = loaded.topn[0][uid, :top_k]
+        else:
+            # 5) 임베딩 행렬-벡터 곱(또는 ANN) + (마스크) + 부분 정렬로 상위 k개 인덱스 추출
+            top_idxs, _ = _live_top_k(loaded, uid, top_k, mask)
+
+    # 6) 인덱스 → 상품코드 → RecommendationItem (item_meta에서 바로 가져오기)
+    rec_codes, items = _build_items(top_idxs, item_map, item_meta, objects)
+    logger.info(f"추천된 상품 코드: {rec_codes}")
+
+    # 7) 부족분은 (버전별로 캐시된) 인기추천으로 채우기 — 필터가 있으면 같은 마스크를 씌운 bias 순위
+    if len(items) < top_k:
+        with metrics.FILL.time():
+            if mask is None:
+                pop_items = _popular_items(loaded, tracking_key, lang)
+            else:
+                pop_items = _masked_popular_items(loaded, item_meta, objects, mask, top_k + len(rec_codes))
+            _fill_with_popular(items, rec_codes, pop_items, top_k)
+
+    # 8) 최종 반환
+    return RecommendationResponse(
+        tracking_key=tracking_key,
+        anon_id=anon_id,
+        recommended_items=items
+    )
+
+def get_session_recommendations(
+    tracking_key: str,
+    anon_id: str,
+    product_codes: list[str],
+    lang: str = "und",
+    top_k: int = 10,
+    item_filter: ItemFilter | None = None
+) -> RecommendationResponse:
+    """
+    세션 기반 추천: 모델에 없는 방문자도 최근 본 상품(product_codes, 최신순)으로 개인화합니다.
+
+    - anon_id 가 모델에 있으면 기존 관심 기반 추천(응답 캐시 포함)과 같습니다.
+    - 없으면 본 상품 임베딩을 최신순 가중 평균(SESSION_RECENCY_DECAY^i)해 사용자 벡터를 만들고
+      (fold-in), 알려진 사용자와 같은 행렬-벡터 곱(또는 ANN) + 부분 정렬로 순위를 매깁니다.
+    - 방금 본 상품은 결과에서 빼고, 부족분은 인기추천으로 채웁니다.
+    """
+    # 1) 활성 모델 임대 (공유 모델 레지스트리)
+    try:
+        lease = model_registry.acquire(tracking_key, lang)
+    except FileNotFoundError as e:
+        logger.warning(f"모델 없음: {e} → 인기추천으로 폴백")
+        metrics.FALLBACK_NO_MODEL.inc()
+        return get_recommendations(tracking_key, anon_id, lang, top_k)
+
+    with lease as loaded:
+        if anon_id in loaded.user_map:
+            return get_interest_based_recommendations(tracking_key, anon_id, lang, top_k, item_filter)
+        mask = item_mask(loaded, tracking_key, lang, item_filter)
+
+        # 2) 세션 상품 → 아이템 인덱스 (모델에 없는 상품은 무시, 중복은 가중치 합산)
+        item_index = loaded.item_index
+        seen: list[int] = []
+        weights: list[float] = []
+        decay = settings.SESSION_RECENCY_DECAY
+        for i, code in enumerate(product_codes[: settings.SESSION_MAX_ITEMS]):
+            idx = item_index.get(code)
+            if idx is not None:
+                seen.append(idx)
+                weights.append(decay ** i)
+        if not seen:
+            logger.info(f"{anon_id} 세션 상품이 모델에 없음 → 인기추천 폴백")
+            metrics.FALLBACK_NO_USER.inc()
+            if mask is not None:
+                return _interest_based_from_model(loaded, tracking_key, anon_id, lang, top_k, mask)
+            return get_recommendations(tracking_key, anon_id, lang, top_k)
+
+        # 3) fold-in 사용자 벡터 → 상위 (top_k + 본 상품 수) 개 → 본 상품 제외
+        with metrics.SCORE.time():
+            vector = loaded.scorer.fold_in(np.asarray(seen), np.asarray(weights, dtype=np.float32))
+            depth = top_k + len(set(seen))
+            if _use_ann(loaded):
+                top_idxs, _ = loaded.ann.search_vector(loaded.scorer, vector, depth, settings.ANN_NPROBE, mask)
+            else:
+                top_idxs, _ = loaded.scorer.top_k_vector(vector, depth, mask)
+            top_idxs = top_idxs[~np.isin(top_idxs, seen)][:top_k]
 
-    # 5) 상위 k개 인덱스 추출
-    k = min(top_k, scores.size)
-    top_idxs = np.argpartition(-scores, k - 1)[:k]
-    top_idxs = top_idxs[np.argsort(-scores[top_idxs])]
+        # 4) 인덱스 → RecommendationItem, 부족분은 인기추천으로 채우기
+        stamp, item_meta = item_metadata(loaded, tracking_key, lang)
+        objects = loaded.cached("item_objects", dict, stamp)
+        rec_codes, items = _build_items(top_idxs, loaded.item_map, item_meta, objects)
+        if len(items) < top_k:
+            with metrics.FILL.time():
+                session_codes = rec_codes + [loaded.item_map[i] for i in seen]
+                if mask is None:
+                    pop_items = _popular_items(loaded, tracking_key, lang)
+                else:
+                    pop_items = _masked_popular_items(loaded, item_meta, objects, mask, top_k + len(session_codes))
+                _fill_with_popular(items, session_codes, pop_items, top_k)
 
-    # 6) 인덱스 → 상품코드
+    return RecommendationResponse.model_construct(
+        tracking_key=tracking_key,
+        anon_id=anon_id,
+        recommended_items=items
+    )
+
+def get_similar_items(
+    tracking_key: str,
+    product_code: str,
+    lang: str = "und",
+    top_k: int = 10
+) -> SimilarItemsResponse:
+    """
+    상품 상세 "함께 본 상품": 아이템 임베딩 코사인 유사도 상위 top_k 개.
+
+    - 학습 시 저장한 유사 아이템 테이블에서 행 하나를 읽고 item_meta 로 채웁니다.
+    - 테이블이 없는 (구버전) 모델은 해당 아이템 한 개만 바로 계산합니다.
+    - 모델에 없는 상품이거나 메타가 모자라면 인기추천으로 채웁니다. (자기 자신 제외)
+    """
+    # 1) 활성 모델 임대 (공유 모델 레지스트리)
+    try:
+        lease = model_registry.acquire(tracking_key, lang)
+    except FileNotFoundError:
+        raise HTTPException(404, "모델을 찾을 수 없습니다.")
+
+    with lease as loaded:
+        stamp, item_meta = item_metadata(loaded, tracking_key, lang)
+        objects = loaded.cached("item_objects", dict, stamp)
+
+        # 2) 유사 아이템 행 조회
+        idx = loaded.item_index.get(product_code)
+        if idx is None:
+            logger.info(f"{product_code} 모델에 없음 → 인기추천 폴백")
+            rec_codes, items = [], []
+        else:
+            with metrics.SCORE.time():
+                if loaded.similar is not None:
+                    top_idxs = loaded.similar[0][idx]
+                else:
+                    emb = loaded.cached("normalized_items", lambda: normalized_item_embeddings(loaded.scorer))
+                    top_idxs, _ = similar_to(emb, idx, max(top_k, settings.SIMILAR_ITEMS_SIZE))
+            rec_codes, items = _build_items(top_idxs, loaded.item_map, item_meta, objects)
+            items = items[:top_k]
+
+        # 3) 부족분은 인기추천으로 채우기
+        if len(items) < top_k:
+            _fill_with_popular(items, rec_codes + [product_code], _popular_items(loaded, tracking_key, lang), top_k)
+
+    return SimilarItemsResponse.model_construct(
+        tracking_key=tracking_key,
+        product_code=product_code,
+        recommended_items=items
+    )
+
+def _use_ann(loaded: LoadedModel) -> bool:
+    """ANN 인덱스가 있고 카탈로그가 settings.ANN_MIN_ITEMS 이상일 때만 근사 검색"""
+    return loaded.ann is not None and 0 < settings.ANN_MIN_ITEMS <= loaded.scorer.n_items
+
+def _live_top_k(loaded: LoadedModel, uid: int, top_k: int, mask: np.ndarray | None = None):
+    """사용자 한 명의 실시간 top-k (대형 카탈로그는 ANN, 그 외 정확 검색)"""
+    if _use_ann(loaded):
+        return loaded.ann.search(loaded.scorer, uid, top_k, settings.ANN_NPROBE, mask)
+    return loaded.scorer.top_k(uid, top_k, mask)
+
+def _build_items(
+    top_idxs,
+    item_map: dict[int, str],
+    item_meta: dict[str, dict],
+    objects: dict[str, RecommendationItem] | None = None
+) -> tuple[list[str], list[RecommendationItem]]:
+    """
+    아이템 인덱스 배열을 상품코드 + RecommendationItem 리스트로 변환합니다.
+    메타가 없는 상품은 건너뜁니다.
+    objects(버전·메타 세대별 공유 dict)를 주면 상품별 RecommendationItem 과 JSON 조각을
+    한 번만 만들어 재사용합니다. (응답 캐시 항목들이 같은 객체를 가리키도록)
+    """
+    started = time.perf_counter()
     rec_codes = [
         item_map[int(idx)]
         for idx in top_idxs
         if int(idx) in item_map
     ]
-    logger.info(f"추천된 상품 코드: {rec_codes}")
-
-    # 7) RecommendationItem 생성 (item_meta에서 바로 가져오기)
     items: list[RecommendationItem] = []
     for code in rec_codes:
-        meta = item_meta.get(code)
-        if not meta:
-            logger.warning(f"메타없음: {code} (skip)")
-            continue
-        items.append(
-            RecommendationItem(
-                anon_id=anon_id,
-                product_code=code,
-                **meta
-            )
-        )
+        item = objects.get(code) if objects is not None else None
+        if item is None:
+            meta = item_meta.get(code)
+            if not meta:
+                logger.warning(f"메타없음: {code} (skip)")
+                continue
+            item = RecommendationItem(product_code=code, **meta)
+            if objects is not None:
+                item_json(item)
+                objects[code] = item
+        items.append(item)
+    metrics.HYDRATE.observe(time.perf_counter() - started)
+    return rec_codes, items
 
-    # 8) 부족분은 인기추천으로 채우기
-    if len(items) < top_k:
-        pop_items = get_recommendations(tracking_key, anon_id, lang, top_k).recommended_items
-        fill = [
-            i for i in pop_items
-            if i.product_code not in rec_codes
-        ]
-        items.extend(fill[: top_k - len(items)])
-
-    # 9) 최종 반환
-    return RecommendationResponse(
-        tracking_key=tracking_key,
-        anon_id=anon_id,
-        recommended_items=items
+def _fill_with_popular(
+    items: list[RecommendationItem],
+    rec_codes: list[str],
+    pop_items: list[RecommendationItem],
+    top_k: int
+) -> None:
+    """부족분을 인기추천 중 이미 추천되지 않은 상품으로 채웁니다. (items 를 직접 수정)"""
+    metrics.FALLBACK_SHORT_FILL.inc()
+    fill = [
+        i for i in pop_items
+        if i.product_code not in rec_codes
+    ]
+    items.extend(fill[: top_k - len(items)])
+
+def get_batch_recommendations(
+    tracking_key: str,
+    anon_ids: list[str],
+    lang: str = "und",
+    top_k: int = 10,
+    block_size: int = 1024
+) -> Iterator[RecommendationResponse]:
+    """
+    여러 anon_id 의 관심 기반 추천을 한 번에 계산해 입력 순서대로 하나씩 돌려줍니다.
+
+    - 모델 임대는 배치당 한 번만 하고, 스트리밍이 끝나면 반납합니다.
+    - 모델에 있는 사용자는 block_size 명씩 묶어 행렬-행렬 곱 + 행별 top-k 로 계산합니다.
+      (top-N 테이블이 top_k 를 감당하면 테이블 행 조회로 대체)
+    - 모델에 없는 사용자와 부족분은 배치 전체가 공유하는 인기추천 리스트로 채웁니다.
+
+    모델 임대는 호출 시점에 바로 수행하므로 실패는 예외로 즉시 드러나고,
+    반환된 iterator 는 블록 단위로 계산하므로 전체 응답을 메모리에 쌓지 않습니다.
+    """
+    # 1) 활성 모델 임대 (배치당 한 번)
+    lease = model_registry.acquire(tracking_key, lang)
+    loaded = lease.model
+    user_map, item_map = loaded.user_map, loaded.item_map
+    stamp, item_meta = item_metadata(loaded, tracking_key, lang)
+    objects = loaded.cached("item_objects", dict, stamp)
+    use_topn = loaded.topn_covers(top_k)
+
+    # 2) 배치 전체가 공유하는 인기추천 리스트
+    try:
+        pop_items = _popular_items(loaded, tracking_key, lang)[:top_k]
+    except Exception:
+        lease.release()
+        raise
+
+    def _iter() -> Iterator[RecommendationResponse]:
+        try:
+            for start in range(0, len(anon_ids), block_size):
+                block = anon_ids[start:start + block_size]
+
+                # 3) 블록 내 모델에 있는 사용자만 모아서 한 번에 점수 계산
+                known = [i for i, a in enumerate(block) if a in user_map]
+                if len(known) < len(block):
+                    metrics.FALLBACK_NO_USER.inc(len(block) - len(known))
+                with metrics.SCORE.time():
+                    uids = np.fromiter((user_map[block[i]] for i in known), dtype=np.int64, count=len(known))
+                    if use_topn:
+                        top_rows = loaded.topn[0][uids, :top_k]
+                    elif _use_ann(loaded):
+                        ann_rows, _ = loaded.ann.search_users(loaded.scorer, uids, top_k, settings.ANN_NPROBE)
+                        # 후보가 top_k 보다 적은 사용자는 -1 로 채워져 있으므로 잘라냄 (부족분은 인기추천)
+                        top_rows = [row[row >= 0] for row in ann_rows]
+                    else:
+                        top_rows, _ = loaded.scorer.top_k_users(uids, top_k)
+                rows_by_pos = dict(zip(known, top_rows))
+
+                # 4) 입력 순서대로 응답 생성
+                for pos, anon_id in enumerate(block):
+                    row = rows_by_pos.get(pos)
+                    if row is None:
+                        items = list(pop_items)
+                    else:
+                        rec_codes, items = _build_items(row, item_map, item_meta, objects)
+                        if len(items) < top_k:
+                            _fill_with_popular(items, rec_codes, pop_items, top_k)
+                    yield RecommendationResponse(
+                        tracking_key=tracking_key,
+                        anon_id=anon_id,
+                        recommended_items=items
+                    )
+        finally:
+            lease.release()
+
+    responses = _iter()
+    # 스트리밍이 시작되지 않고 버려져도 임대는 반납
+    weakref.finalize(responses, lease.release)
+    return responses
+
+def get_batch_popular_recommendations(
+    tracking_key: str,
+    anon_ids: list[str],
+    lang: str = "und",
+    top_k: int = 10
+) -> Iterator[RecommendationResponse]:
+    """모델을 쓸 수 없을 때: 인기추천 한 번 계산 후 모든 anon_id 에 동일하게 응답"""
+    pop_items = get_recommendations(tracking_key, "", lang, top_k).recommended_items
+    return (
+        RecommendationResponse(
+            tracking_key=tracking_key,
+            anon_id=anon_id,
+            recommended_items=pop_items
+        )
+        for anon_id in anon_ids
     )
 
 def get_model_popular_items(
     tracking_key: str,
     lang: str = "und",
-    top_k: int = 10
+    top_k: int = 10,
+    item_filter: ItemFilter | None = None
 ) -> RecommendationResponse:
     """
     LightFM 모델의 item_bias를 이용한 전역 인기 순위(top_k) 조회.
+    item_filter 가 있으면 item_bias 배열에 마스크를 씌워 바로 부분 정렬합니다.
     """
-    # 1) 최신 모델 디렉터리 찾기
-    base = os.getenv("MODEL_BASE_DIR", "/app/models")
+    # 1) 활성 모델 임대 (공유 모델 레지스트리)
     try:
-        model_dir = find_latest_version_dir(tracking_key, lang, base)
+        lease = model_registry.acquire(tracking_key, lang)
     except FileNotFoundError:
         raise HTTPException(404, "모델을 찾을 수 없습니다.")
 
-    # 2) 모델·맵·메타 로드
-    model, user_map, item_map, item_meta = _load_model_cached(model_dir)
+    # 2) 버전별로 캐시된 bias 인기 순위 → RecommendationItem 리스트를 잘라서 반환
+    with lease as loaded:
+        mask = item_mask(loaded, tracking_key, lang, item_filter)
+        if mask is None:
+            items = _model_popular_items(loaded, tracking_key, lang)[:top_k]
+        else:
+            stamp, item_meta = item_metadata(loaded, tracking_key, lang)
+            objects = loaded.cached("item_objects", dict, stamp)
+            items = _masked_popular_items(loaded, item_meta, objects, mask, top_k)
 
-    # 3) bias 배열에서 상위 top_k 인덱스 추출
-    biases: np.ndarray = model.item_biases  # shape = (num_items,)
-    k = min(top_k, biases.size)
-    top_idxs = np.argpartition(-biases, k - 1)[:k]
-    top_idxs = top_idxs[np.argsort(-biases[top_idxs])]
-
-    # 4) 인덱스 → product_code
-    codes = [item_map[idx] for idx in top_idxs]
-
-    # 5) RecommendationItem 생성
-    items = []
-    for code in codes:
-        meta = item_meta.get(code)
-        if not meta:
-            continue
-        items.append(RecommendationItem(anon_id="", product_code=code, **meta))
-
-    return RecommendationResponse(
+    return RecommendationResponse.model_construct(
         tracking_key=tracking_key,
         anon_id="",  # 글로벌 인기엔 사용자 ID 불필요
         recommended_items=items
-    )
\ No newline at end of file
+    )
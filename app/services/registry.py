@@ -0,0 +1,446 @@
+import os
+import json
+import time
+import fcntl
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.services import metrics
+from core.model.artifacts import ARTIFACT_DIR, LoadedModel, has_model_artifacts, load_model
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]  # (tracking_key, lang)
+
+
+def _version_of(model_dir: str) -> int:
+    """.../{tracking_key}/v{n}/{lang} → n"""
+    return int(os.path.basename(os.path.dirname(model_dir))[1:])
+
+
+def _site_versions(site_root: str) -> List[int]:
+    """site_root 아래 v{n} 버전 번호 (최신 순)"""
+    if not os.path.isdir(site_root):
+        return []
+    return sorted(
+        (int(d[1:]) for d in os.listdir(site_root) if d.startswith("v") and d[1:].isdigit()),
+        reverse=True,
+    )
+
+
+def _is_servable(model_dir: str) -> bool:
+    """학습이 끝난 언어 디렉터리인지 (아티팩트 manifest 또는 구버전 model.pkl 이 있음)"""
+    return has_model_artifacts(model_dir) or os.path.isfile(os.path.join(model_dir, "model.pkl"))
+
+
+def find_servable_version_dir(tracking_key: str, lang: str, base_dir: str) -> str:
+    """
+    {tracking_key}/v*/{lang} 중 학습이 끝난 가장 최신 버전 디렉터리.
+    학습 중인 버전(맵·메타 pickle 만 있거나 언어 디렉터리가 아직 없는 버전)은 건너뛰고
+    그 이전 버전으로 내려갑니다. 하나도 없으면 FileNotFoundError.
+    """
+    site_root = os.path.join(base_dir, tracking_key)
+    for version in _site_versions(site_root):
+        model_dir = os.path.join(site_root, f"v{version}", lang)
+        if _is_servable(model_dir):
+            return model_dir
+    raise FileNotFoundError(f"No trained model under {site_root}/v*/{lang}")
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _model_size(model_dir: str) -> int:
+    """로드 시 메모리 추정치: 아티팩트가 있으면 아티팩트 크기, 없으면 pickle 크기"""
+    artifact_dir = os.path.join(model_dir, ARTIFACT_DIR)
+    if os.path.isdir(artifact_dir):
+        return _dir_size(artifact_dir)
+    return sum(
+        os.path.getsize(os.path.join(model_dir, name))
+        for name in ("model.pkl", "user_map.pkl", "item_map.pkl", "item_meta.pkl")
+        if os.path.isfile(os.path.join(model_dir, name))
+    )
+
+
+class _Entry:
+    """한 (tracking_key, lang) 의 특정 버전 모델 + 사용 중인 요청 수"""
+
+    def __init__(self, key: Key, version: int, model: LoadedModel, size: int = 0):
+        self.key = key
+        self.version = version
+        self.model: Optional[LoadedModel] = model
+        self.refs = 0
+        self.size = size    # 로드 시 메모리 추정치 (bytes, _model_size)
+
+
+class ModelLease:
+    """
+    요청 하나가 모델을 쓰는 동안 잡고 있는 임대.
+    release() 전까지는 새 버전으로 교체돼도 이 버전이 해제되지 않습니다.
+    """
+
+    def __init__(self, registry: "ModelRegistry", entry: _Entry):
+        self._registry = registry
+        self._entry: Optional[_Entry] = entry
+        self.model: LoadedModel = entry.model
+        self.version: int = entry.version
+
+    def release(self) -> None:
+        if self._entry is not None:
+            self._registry._release(self._entry)
+            self._entry = None
+
+    def __enter__(self) -> LoadedModel:
+        return self.model
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class ModelRegistry:
+    """
+    서비스 전체가 공유하는 모델 레지스트리.
+
+    - (tracking_key, lang) 마다 활성 버전 하나를 들고 있고, 요청은 acquire() 로 임대합니다.
+    - 처음 요청된 키는 그 자리에서 최신 버전을 로드합니다. (키별 lock 으로 한 번만)
+    - 백그라운드 스레드가 poll_interval 마다 MODEL_BASE_DIR 을 확인해 새 버전을 미리 로드하고
+      활성 버전을 원자적으로 교체합니다. 요청은 교체 중에도 기존 버전으로 바로 응답합니다.
+    - 교체된 이전 버전은 임대 중인 요청이 모두 끝나면 해제됩니다.
+    - 키별 요청 수를 세어 두었다가 MODEL_BASE_DIR/_stats 에 합산 기록하고,
+      시작 시 warm_up() 이 요청이 많았던 키부터 미리 로드합니다. (ready 전까지 /ready 는 503,
+      예열 대상을 하나도 로드하지 못하면 계속 503, 일부만 실패하면 200 + degraded)
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, poll_interval: Optional[float] = None):
+        self.base_dir = base_dir or settings.MODEL_BASE_DIR
+        self.poll_interval = poll_interval if poll_interval is not None else settings.MODEL_POLL_INTERVAL
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Key, threading.Lock] = {}
+        self._active: Dict[Key, _Entry] = {}
+        self._retired: List[_Entry] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._hits: Dict[Key, int] = {}
+        self._ready = threading.Event()
+        self._warmup_thread: Optional[threading.Thread] = None
+        self.warmup_summary: dict = {}
+
+    # ------------------------------------------------------------------ 요청 경로
+
+    def acquire(self, tracking_key: str, lang: str = "und", count_hit: bool = True) -> ModelLease:
+        """
+        활성 모델을 임대합니다. 아직 로드된 적 없는 키면 학습이 끝난 최신 버전을 로드합니다.
+        (학습 중인 v{n+1} 이 보여도 완성된 v{n} 으로 응답) 모델이 없으면 FileNotFoundError.
+        """
+        key = (tracking_key, lang)
+        with self._lock:
+            entry = self._active.get(key)
+            if entry is not None:
+                return self._lease(entry, count_hit)
+
+        # 처음 요청된 키: 키별 lock 으로 동시 요청이 한 번만 로드
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._active.get(key)
+                if entry is not None:
+                    return self._lease(entry, count_hit)
+            metrics.MODEL_MISS.inc()
+            with metrics.FIND_VERSION.time():
+                model_dir = find_servable_version_dir(tracking_key, lang, self.base_dir)
+            entry = self._load_entry(key, model_dir)
+            with self._lock:
+                current = self._active.get(key)
+                if current is None or current.version < entry.version:
+                    self._swap(key, entry)
+                else:
+                    entry = current
+                return self._lease(entry, count_hit, hit=False)
+
+    def _lease(self, entry: _Entry, count_hit: bool, hit: bool = True) -> ModelLease:
+        """
+        임대 생성 (self._lock 보유 상태에서 호출).
+        요청 수는 모델이 실제로 있는 키만 셉니다. (클라이언트가 보낸 임의의 키가 _stats 에 쌓이지 않도록)
+        """
+        entry.refs += 1
+        if hit:
+            metrics.MODEL_HIT.inc()
+        if count_hit:
+            self._hits[entry.key] = self._hits.get(entry.key, 0) + 1
+        return ModelLease(self, entry)
+
+    def active_version(self, tracking_key: str, lang: str = "und") -> Optional[int]:
+        with self._lock:
+            entry = self._active.get((tracking_key, lang))
+            return entry.version if entry else None
+
+    # ------------------------------------------------------------------ 교체 / 해제
+
+    def _key_lock(self, key: Key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load_entry(self, key: Key, model_dir: str) -> _Entry:
+        logger.info(f"📦 모델 로딩: {model_dir}")
+        with metrics.MODEL_LOAD.time():
+            model = load_model(model_dir)
+        return _Entry(key, _version_of(model_dir), model, _model_size(model_dir))
+
+    def _swap(self, key: Key, entry: _Entry) -> None:
+        """활성 버전 교체 (self._lock 보유 상태에서 호출)"""
+        old = self._active.get(key)
+        self._active[key] = entry
+        if old is None:
+            return
+        logger.info(f"🔁 모델 교체: {key} v{old.version} → v{entry.version}")
+        if old.refs > 0:
+            self._retired.append(old)
+        else:
+            self._free(old)
+
+    def _release(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.refs -= 1
+            if entry.refs == 0 and entry in self._retired:
+                self._retired.remove(entry)
+                self._free(entry)
+
+    @staticmethod
+    def _free(entry: _Entry) -> None:
+        logger.info(f"🧹 이전 모델 해제: {entry.key} v{entry.version}")
+        entry.model = None
+        metrics.MODEL_EVICTION.inc()
+
+    # ------------------------------------------------------------------ 백그라운드 갱신
+
+    def refresh(self) -> None:
+        """
+        활성 키마다 더 새로운 버전이 있는지 확인하고 있으면 로드 후 교체합니다.
+        학습 중인 버전을 읽지 않도록 manifest 까지 기록된 아티팩트만 대상으로 합니다.
+        """
+        with self._lock:
+            keys = list(self._active.keys())
+        for key in keys:
+            if self._stop.is_set():
+                return
+            try:
+                model_dir = find_servable_version_dir(key[0], key[1], self.base_dir)
+            except FileNotFoundError:
+                continue
+            version = _version_of(model_dir)
+            if version <= (self.active_version(*key) or 0) or not has_model_artifacts(model_dir):
+                continue
+            try:
+                entry = self._load_entry(key, model_dir)
+            except Exception as e:
+                logger.error(f"모델 백그라운드 로드 실패: {model_dir} ({e})")
+                continue
+            with self._lock:
+                current = self._active.get(key)
+                if current is None or current.version < entry.version:
+                    self._swap(key, entry)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"모델 레지스트리 갱신 실패: {e}")
+            try:
+                self.flush_request_counts()
+            except Exception as e:
+                logger.error(f"요청 수 기록 실패: {e}")
+
+    # ------------------------------------------------------------------ 요청 수 / 예열
+
+    def _stats_path(self) -> str:
+        return os.path.join(self.base_dir, "_stats", "request_counts.json")
+
+    def load_request_counts(self) -> Dict[Key, int]:
+        """모든 서버 워커가 합산 기록한 키별 누적 요청 수"""
+        try:
+            with open(self._stats_path(), "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {tuple(k.split("/", 1)): int(v) for k, v in raw.items() if "/" in k}
+
+    def flush_request_counts(self) -> None:
+        """이 워커가 센 요청 수를 파일에 더하고 0 으로 되돌립니다. (flock 으로 워커 간 직렬화)"""
+        with self._lock:
+            hits, self._hits = self._hits, {}
+        if not hits:
+            return
+        path = self._stats_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            counts = {f"{k[0]}/{k[1]}": v for k, v in self.load_request_counts().items()}
+            for (tracking_key, lang), n in hits.items():
+                name = f"{tracking_key}/{lang}"
+                counts[name] = counts.get(name, 0) + n
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(counts, f)
+            os.replace(tmp, path)
+
+    def discover(self) -> List[Tuple[Key, str]]:
+        """
+        MODEL_BASE_DIR 아래 사이트·언어마다 학습이 끝난 최신 버전 디렉터리 [(key, model_dir)]
+        (find_servable_version_dir 와 같은 기준 — 학습 중인 최신 버전은 건너뛰고 이전 버전으로)
+        """
+        found = []
+        if not os.path.isdir(self.base_dir):
+            return found
+        for tracking_key in os.listdir(self.base_dir):
+            site_root = os.path.join(self.base_dir, tracking_key)
+            if tracking_key.startswith("_") or not os.path.isdir(site_root):
+                continue
+            seen_langs = set()
+            for version in _site_versions(site_root):
+                version_dir = os.path.join(site_root, f"v{version}")
+                for lang in os.listdir(version_dir):
+                    model_dir = os.path.join(version_dir, lang)
+                    if lang not in seen_langs and _is_servable(model_dir):
+                        seen_langs.add(lang)
+                        found.append(((tracking_key, lang), model_dir))
+        return found
+
+    def preload(self, max_workers: Optional[int] = None, memory_budget_mb: Optional[float] = None) -> dict:
+        """
+        최신 모델들을 요청 수가 많은 키부터 병렬로 미리 로드합니다.
+        추정 크기 합이 memory_budget_mb 를 넘는 키부터는 로드하지 않습니다. (0 이면 제한 없음)
+        """
+        if max_workers is None:
+            max_workers = settings.PRELOAD_WORKERS
+        if memory_budget_mb is None:
+            memory_budget_mb = settings.PRELOAD_MEMORY_BUDGET_MB
+        started = time.monotonic()
+        counts = self.load_request_counts()
+        candidates = sorted(self.discover(), key=lambda kd: counts.get(kd[0], 0), reverse=True)
+
+        budget = memory_budget_mb * 1024 * 1024
+        selected, used, skipped = [], 0, 0
+        for key, model_dir in candidates:
+            size = _model_size(model_dir)
+            if budget > 0 and used + size > budget:
+                skipped += 1
+                continue
+            selected.append(key)
+            used += size
+
+        def _load(key: Key) -> bool:
+            try:
+                self.acquire(*key, count_hit=False).release()
+                return True
+            except Exception as e:
+                logger.error(f"모델 예열 실패: {key} ({e})")
+                return False
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            loaded = sum(pool.map(_load, selected))
+
+        summary = {
+            "candidates": len(candidates),
+            "loaded": loaded,
+            "failed": len(selected) - loaded,
+            "skipped_budget": skipped,
+            "estimated_mb": round(used / (1024 * 1024), 1),
+            "seconds": round(time.monotonic() - started, 3),
+        }
+        logger.info(f"🔥 모델 예열 완료: {summary}")
+        return summary
+
+    def memory_by_site(self) -> Dict[str, int]:
+        """사이트별 로드된 모델(활성 + 임대 중인 이전 버전) 크기 추정치 합 (bytes, _model_size — 파일 크기 기준)"""
+        with self._lock:
+            entries = list(self._active.values()) + list(self._retired)
+        sizes: Dict[str, int] = {}
+        for entry in entries:
+            sizes[entry.key[0]] = sizes.get(entry.key[0], 0) + entry.size
+        return sizes
+
+    @property
+    def ready(self) -> bool:
+        """
+        예열이 끝났고 서비스할 수 있는 상태인지.
+        예열 자체가 실패했거나, 예열 대상을 하나도 로드하지 못했으면 False 입니다.
+        """
+        if not self._ready.is_set():
+            return False
+        summary = self.warmup_summary
+        if "error" in summary:
+            return False
+        return not (summary.get("failed") and not summary.get("loaded"))
+
+    @property
+    def degraded(self) -> bool:
+        """예열 중 일부 모델 로드에 실패함 (나머지로 서비스는 가능)"""
+        return self._ready.is_set() and bool(self.warmup_summary.get("failed"))
+
+    def warm_up(self, background: bool = True) -> None:
+        """preload() 후 ready 로 표시합니다. PRELOAD_ENABLED 가 꺼져 있으면 바로 ready."""
+        if not settings.PRELOAD_ENABLED:
+            self._ready.set()
+            return
+
+        def _run() -> None:
+            try:
+                self.warmup_summary = self.preload()
+            except Exception as e:
+                logger.error(f"모델 예열 오류: {e}")
+                self.warmup_summary = {"error": str(e)}
+            finally:
+                self._ready.set()
+
+        if not background:
+            _run()
+            return
+        if self._warmup_thread is None:
+            self._warmup_thread = threading.Thread(target=_run, name="model-warmup", daemon=True)
+            self._warmup_thread.start()
+
+    def start(self) -> None:
+        if self._thread is not None or self.poll_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.flush_request_counts()
+        except Exception as e:
+            logger.error(f"요청 수 기록 실패: {e}")
+
+
+model_registry = ModelRegistry()
+
+metrics.registry.register(metrics.CallbackMetric(
+    "recommender_model_size_estimate_bytes",
+    "사이트별 로드된 모델 크기 추정치 — RSS 가 아니라 디스크의 아티팩트(없으면 pickle) 파일 크기 합, "
+    "교체 대기 중인 이전 버전 포함. mmap 아티팩트는 워커끼리 page cache 를 공유하고 읽은 페이지만 "
+    "메모리에 올라오므로 상한으로 보세요. (워커 중 최댓값)",
+    ["tracking_key"],
+    lambda: {(site,): size for site, size in model_registry.memory_by_site().items()},
+    aggregate="max",
+))
+metrics.registry.register(metrics.CallbackMetric(
+    "recommender_models_loaded",
+    "로드된 (tracking_key, lang) 모델 수 (워커 합)",
+    [],
+    lambda: {(): len(model_registry._active)},
+))
@@ -0,0 +1,65 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+from app.config import settings
+from app.services import metrics
+
+
+class ResponseCache:
+    """
+    사용자별 추천 결과 LRU 캐시 (프로세스 내, 최대 max_entries 개).
+
+    - 키에 모델 버전·메타 세대가 들어가므로 새 버전으로 교체되면 자연히 miss 가 나고,
+      이전 버전 항목은 LRU 로 밀려 사라집니다.
+    - 값은 top RESPONSE_CACHE_TOP_K 개 추천 리스트이고, 요청은 앞에서부터 잘라 씁니다.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries if max_entries is not None else settings.RESPONSE_CACHE_SIZE
+        self._data: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[list]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                metrics.RESPONSE_MISS.inc()
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        metrics.RESPONSE_HIT.inc()
+        return value
+
+    def put(self, key: Hashable, value: list) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                metrics.RESPONSE_EVICTION.inc()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def response_etag(*parts) -> str:
+    """응답을 결정하는 값들(사이트·언어·버전·메타 세대·사용자·top_k)로 만든 약한 ETag"""
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+response_cache = ResponseCache()
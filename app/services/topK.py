@@ -1,33 +1,18 @@
-import os
 import numpy as np
 import logging
 import pickle
-from functools import lru_cache
 from fastapi import HTTPException
-from core.model.lightfm_trainer import load_latest_model
-from app.utils.model_utils import find_latest_version_dir
+from core.model.artifacts import LoadedModel
+from app.services.registry import model_registry
+from core.model.scorer import top_k_indices
+from app.schemas.recommendation import ItemFilter
 from app.schemas.topK import TopKResponse, TopKItem
-from core.data_loader.clickhouse import load_popular_items, load_item_metadata_full
+from app.services.filters import item_mask
+from app.services.metadata import item_metadata, popular_metadata
+from app.utils.payloads import encode_items, item_json
 
 logger = logging.getLogger(__name__)
 
-# 1) 모델 로드 캐시 (v{n}/{lang} 단위)
-@lru_cache(maxsize=128)
-def _load_model_cached(model_dir: str):
-    logger.info(f"📦 캐시에서 모델 로딩: {model_dir}")
-    return load_latest_model(model_dir)
-
-# 1) 인기메타 캐시: tracking_key별로 한 번만 전체 메타를 dict로 로드
-@lru_cache(maxsize=64)
-def _load_full_meta_cached(tracking_key: str, lang: str | None = None) -> dict[str, dict]:
-    """
-    ClickHouse에서 tracking_key에 대한 전체 item metadata를 불러와
-    {product_code: {...메타...}} 형태로 반환합니다.
-    """
-    df = load_item_metadata_full(tracking_key, lang=lang)
-    df = df.fillna("")  # NaN 방지
-    return df.set_index("product_code").to_dict(orient="index")
-
 def fetch_popular_codes(
     tracking_key: str,
     lang: str = "und",
@@ -37,33 +22,80 @@ def fetch_popular_codes(
     resp = get_model_popular_items(tracking_key, lang, top_k)
     return [item.product_code for item in resp.recommended_items]
 
+def _popular_top_k_items(loaded: LoadedModel, tracking_key: str, lang: str) -> list[TopKItem]:
+    """
+    item_bias 인기 순위(최대 POPULAR_RANK_SIZE개)를 인기추천 메타로 채운 TopKItem 리스트.
+    모델 버전(메타 갱신 세대)당 한 번만 만들어 LoadedModel 에 캐시하므로,
+    버전이 바뀌면 자동으로 새로 만들어집니다.
+    """
+    stamp, full_meta = popular_metadata(loaded, tracking_key, lang)
+
+    def _build() -> list[TopKItem]:
+        items: list[TopKItem] = []
+        for code in _model_popular_codes(loaded):
+            meta = full_meta.get(code)
+            if not meta:
+                logger.warning(f"인기 추천 메타 없음: {code}")
+                continue
+            items.append(TopKItem(product_code=code, **meta))
+        return encode_items(items)
+
+    return loaded.cached("popular_top_k_items", _build, stamp)
+
+def _masked_top_k_items(loaded: LoadedModel, full_meta, stamp, mask: np.ndarray, top_k: int) -> list[TopKItem]:
+    """필터 요청용: item_bias 에 마스크를 씌운 상위 top_k 개 (TopKItem 객체는 세대별로 재사용)"""
+    objects = loaded.cached("top_k_item_objects", dict, stamp)
+    items: list[TopKItem] = []
+    for idx in top_k_indices(loaded.scorer.item_biases, top_k, mask):
+        code = loaded.item_map.get(int(idx))
+        item = objects.get(code)
+        if item is None:
+            meta = full_meta.get(code) if code else None
+            if not meta:
+                continue
+            item = TopKItem(product_code=code, **meta)
+            item_json(item)
+            objects[code] = item
+        items.append(item)
+    return items
+
+def _model_popular_codes(loaded: LoadedModel) -> list[str]:
+    """bias 인기 순위 중 item_meta 가 있는 상품코드 (모델 버전당 한 번 계산)"""
+    def _build() -> list[str]:
+        codes = []
+        for idx in loaded.popular_ranking():
+            code = loaded.item_map.get(int(idx))
+            if code and loaded.item_meta.get(code):
+                codes.append(code)
+        return codes
+
+    return loaded.cached("model_popular_codes", _build)
+
 def get_recommendations_top_k(
     tracking_key: str,
     lang: str = "und",
-    top_k: int = 10
+    top_k: int = 10,
+    item_filter: ItemFilter | None = None
 ) -> TopKResponse:
     logger.info("✔️ 인기 상품 추천 로직 실행")
 
-    # 1) 인기 코드 조회 (항상 List[str])
-    codes = fetch_popular_codes(
-        tracking_key,
-        lang=lang,
-        top_k=top_k
-    )
+    # 1) 활성 모델 임대 (공유 모델 레지스트리)
+    try:
+        lease = model_registry.acquire(tracking_key, lang)
+    except FileNotFoundError:
+        raise HTTPException(404, "모델을 찾을 수 없습니다.")
 
-    # 2) 전체 메타 딕셔너리 (기존 캐시)
-    full_meta = _load_full_meta_cached(tracking_key, lang)
+    # 2) 버전별로 캐시된 (검증 완료) 인기 리스트를 top_k 만큼 잘라서 반환
+    #    필터가 있으면 item_bias 에 마스크를 씌워 바로 부분 정렬
+    with lease as loaded:
+        mask = item_mask(loaded, tracking_key, lang, item_filter)
+        if mask is None:
+            items = _popular_top_k_items(loaded, tracking_key, lang)[:top_k]
+        else:
+            stamp, full_meta = popular_metadata(loaded, tracking_key, lang)
+            items = _masked_top_k_items(loaded, full_meta, stamp, mask, top_k)
 
-    # 3) RecommendationItem 생성
-    items: list[TopKItem] = []
-    for code in codes:
-        meta = full_meta.get(code)
-        if not meta:
-            logger.warning(f"인기 추천 메타 없음: {code}")
-            continue
-        items.append(TopKItem(product_code=code, **meta))
-
-    return TopKResponse(
+    return TopKResponse.model_construct(
         tracking_key=tracking_key,
         recommended_items=items
     )
@@ -71,39 +103,38 @@ def get_recommendations_top_k(
 def get_model_popular_items(
     tracking_key: str,
     lang: str = "und",
-    top_k: int = 10
+    top_k: int = 10,
+    item_filter: ItemFilter | None = None
 ) -> TopKResponse:
     """
     LightFM 모델의 item_bias를 이용한 전역 인기 순위(top_k) 조회.
     """
-    # 1) 최신 모델 디렉터리 찾기
-    base = os.getenv("MODEL_BASE_DIR", "/app/models")
+    # 1) 활성 모델 임대 (공유 모델 레지스트리)
     try:
-        model_dir = find_latest_version_dir(tracking_key, lang, base)
+        lease = model_registry.acquire(tracking_key, lang)
     except FileNotFoundError:
         raise HTTPException(404, "모델을 찾을 수 없습니다.")
 
-    # 2) 모델·맵·메타 로드
-    model, user_map, item_map, item_meta = _load_model_cached(model_dir)
-
-    # 3) bias 배열에서 상위 top_k 인덱스 추출
-    biases: np.ndarray = model.item_biases  # shape = (num_items,)
-    k = min(top_k, biases.size)
-    top_idxs = np.argpartition(-biases, k - 1)[:k]
-    top_idxs = top_idxs[np.argsort(-biases[top_idxs])]
+    # 2) 버전별로 캐시된 인기 순위 → 모델 메타로 TopKItem 생성
+    with lease as loaded:
+        stamp, item_meta = item_metadata(loaded, tracking_key, lang)
+        mask = item_mask(loaded, tracking_key, lang, item_filter)
+        if mask is not None:
+            return TopKResponse.model_construct(
+                tracking_key=tracking_key,
+                recommended_items=_masked_top_k_items(loaded, item_meta, stamp, mask, top_k)
+            )
 
-    # 4) 인덱스 → product_code
-    codes = [item_map[idx] for idx in top_idxs]
+        def _build() -> list[TopKItem]:
+            items = []
+            for code in _model_popular_codes(loaded):
+                meta = item_meta.get(code)
+                if meta:
+                    items.append(TopKItem(product_code=code, **meta))
+            return encode_items(items)
+        items = loaded.cached("model_popular_top_k_items", _build, stamp)
 
-    # 5) RecommendationItem 생성
-    items = []
-    for code in codes:
-        meta = item_meta.get(code)
-        if not meta:
-            continue
-        items.append(TopKItem(product_code=code, **meta))
-
-    return TopKResponse(
+    return TopKResponse.model_construct(
         tracking_key=tracking_key,
-        recommended_items=items
-    )
\ No newline at end of file
+        recommended_items=items[:top_k]
+    )
@@ -1,27 +1,25 @@
-import os
+import logging
 import pandas as pd
-from clickhouse_driver import Client
-from .model_utils import safe_quote
+from core.data_loader.pool import get_pool, table_name
 
 from ..config import settings
 
+logger = logging.getLogger(__name__)
+
 
 def load_clickhouse_events(site_filter: str = None) -> pd.DataFrame:
-    client = Client(
-        host=settings.CLICKHOUSE_HOST,
-        port=settings.CLICKHOUSE_PORT,
-        database=os.getenv("CLICKHOUSE_DB", "tracking"),
-    )
     query = f"""
     SELECT anon_id, product_code, tracking_type
-    FROM tracking.trackings
-    WHERE common_ts >= now() - INTERVAL 30 DAY
+    FROM {table_name()}
+    WHERE common_ts >= now() - INTERVAL %(days)s DAY
     """
+    params = {"days": settings.CLICKHOUSE_DAYS}
     if site_filter:
-        query += f" AND site_id = {safe_quote(site_filter)}"
+        query += " AND site_id = %(site_id)s"
+        params["site_id"] = site_filter
     try:
-        data = client.execute(query)
+        data = get_pool().execute(query, params)
         return pd.DataFrame(data, columns=['anon_id','product_code','tracking_type'])
     except Exception as e:
-        print("❌ ClickHouse error:", e)
+        logger.error(f"❌ ClickHouse error: {e}")
         return pd.DataFrame(columns=['anon_id','product_code','tracking_type'])
@@ -0,0 +1,82 @@
+from typing import Iterable, Optional
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+class FastJSONResponse(Response):
+    """
+    미리 만든 JSON bytes 는 그대로 보내고, 그 외 값은 orjson 으로 직렬화하는 응답 클래스.
+    response_model 검증·기본 인코더를 거치지 않습니다.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return orjson.dumps(content)
+
+
+def item_json(item: BaseModel) -> bytes:
+    """
+    상품 하나의 JSON 조각. 처음 한 번만 pydantic 직렬화기로 만들고 객체(_json)에 보관합니다.
+    pydantic 으로 만들기 때문에 float 표기 등 기존 응답과 byte 단위로 같습니다.
+    """
+    encoded = item._json
+    if encoded is None:
+        encoded = item.__pydantic_serializer__.to_json(item)
+        item._json = encoded
+    return encoded
+
+
+def encode_items(items: Iterable[BaseModel]) -> list:
+    """버전별 캐시 리스트를 만들 때 조각까지 미리 만들어 둠 (요청 경로에서는 join 만)"""
+    items = list(items)
+    for item in items:
+        item_json(item)
+    return items
+
+
+def _join(items: Iterable[BaseModel]) -> bytes:
+    return b"[" + b",".join(item_json(i) for i in items) + b"]"
+
+
+def render_recommendations(tracking_key: str, anon_id: str, items: Iterable[BaseModel]) -> bytes:
+    """RecommendationResponse 와 같은 JSON (필드 순서: tracking_key, anon_id, recommended_items)"""
+    return (
+        b'{"tracking_key":' + orjson.dumps(tracking_key)
+        + b',"anon_id":' + orjson.dumps(anon_id)
+        + b',"recommended_items":' + _join(items) + b"}"
+    )
+
+
+def render_top_k(tracking_key: str, items: Iterable[BaseModel]) -> bytes:
+    """TopKResponse 와 같은 JSON (필드 순서: tracking_key, recommended_items)"""
+    return b'{"tracking_key":' + orjson.dumps(tracking_key) + b',"recommended_items":' + _join(items) + b"}"
+
+
+def render_similar(tracking_key: str, product_code: str, items: Iterable[BaseModel]) -> bytes:
+    """SimilarItemsResponse 와 같은 JSON (필드 순서: tracking_key, product_code, recommended_items)"""
+    return (
+        b'{"tracking_key":' + orjson.dumps(tracking_key)
+        + b',"product_code":' + orjson.dumps(product_code)
+        + b',"recommended_items":' + _join(items) + b"}"
+    )
+
+
+def recommendation_payload(response, headers: Optional[dict] = None) -> FastJSONResponse:
+    """RecommendationResponse → 조각을 이어 붙인 JSON 응답"""
+    body = render_recommendations(response.tracking_key, response.anon_id, response.recommended_items)
+    return FastJSONResponse(body, headers=headers)
+
+
+def similar_payload(response, headers: Optional[dict] = None) -> FastJSONResponse:
+    """SimilarItemsResponse → 조각을 이어 붙인 JSON 응답"""
+    body = render_similar(response.tracking_key, response.product_code, response.recommended_items)
+    return FastJSONResponse(body, headers=headers)
+
+
+def top_k_payload(response, headers: Optional[dict] = None) -> FastJSONResponse:
+    """TopKResponse → 조각을 이어 붙인 JSON 응답"""
+    return FastJSONResponse(render_top_k(response.tracking_key, response.recommended_items), headers=headers)
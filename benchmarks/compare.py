@@ -0,0 +1,54 @@
+"""
+benchmarks.run 결과 JSON 두 개(기준 → 비교)의 단계별 시간·메모리와 요청 지연을 나란히 출력합니다.
+
+    PYTHONPATH=. python -m benchmarks.compare bench/old.json bench/new.json
+"""
+import sys
+import json
+import argparse
+
+
+def _ratio(old, new) -> str:
+    if not old or new is None:
+        return "-"
+    return f"{new / old:.2f}x"
+
+
+def _rows(old: dict, new: dict, fields: list) -> list:
+    rows = []
+    for name in list(old) + [n for n in new if n not in old]:
+        a, b = old.get(name, {}), new.get(name, {})
+        for field in fields:
+            if field in a or field in b:
+                rows.append((f"{name}.{field}", a.get(field), b.get(field), _ratio(a.get(field), b.get(field))))
+    return rows
+
+
+def _print_table(title: str, rows: list) -> None:
+    if not rows:
+        return
+    width = max(len(r[0]) for r in rows)
+    print(f"\n## {title}")
+    for name, a, b, ratio in rows:
+        print(f"{name:<{width}}  {str(a):>12}  {str(b):>12}  {ratio:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmarks.run 결과 JSON 두 개를 비교합니다.")
+    parser.add_argument("base", help="기준 결과 JSON")
+    parser.add_argument("target", help="비교할 결과 JSON")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.target, encoding="utf-8") as f:
+        target = json.load(f)
+
+    print(f"base:   {base['git'].get('commit')} {base['dataset']['events']} events ({base['params']['data_path']})")
+    print(f"target: {target['git'].get('commit')} {target['dataset']['events']} events ({target['params']['data_path']})")
+    if base["params"] != target["params"] or base["dataset"]["events"] != target["dataset"]["events"]:
+        print("⚠️ 파라미터가 다른 실행입니다. 수치를 그대로 비교하지 마세요.", file=sys.stderr)
+
+    _print_table("stages", _rows(base["stages"], target["stages"], ["seconds", "peak_rss_mb", "peak_rss_delta_mb"]))
+    _print_table("latency", _rows(base["latency"], target["latency"], ["p50_ms", "p99_ms"]))
+    print(f"\nmax_rss_mb  {base['max_rss_mb']:>12}  {target['max_rss_mb']:>12}  {_ratio(base['max_rss_mb'], target['max_rss_mb']):>8}")
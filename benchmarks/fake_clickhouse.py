@@ -0,0 +1,212 @@
+import time
+import datetime
+import logging
+import numpy as np
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from benchmarks.synthetic import TRACKING_TYPES, SyntheticEvents
+
+logger = logging.getLogger(__name__)
+
+
+def _reduce_pairs(keys: np.ndarray, weights: np.ndarray, ts: np.ndarray):
+    """같은 키끼리 weight 합·ts 최댓값 (키 오름차순)"""
+    if keys.size == 0:
+        return keys, weights, ts
+    order = np.argsort(keys, kind="stable")
+    keys, weights, ts = keys[order], weights[order], ts[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.add.reduceat(weights, starts), np.maximum.reduceat(ts, starts)
+
+
+class FakeClickHouse:
+    """
+    core/data_loader/pool.py 의 ClickHousePool 대신 쓰는 프로세스 내 ClickHouse 대역.
+
+    core/data_loader/clickhouse.py 가 보내는 SQL 을 문자열로 구분해 SyntheticEvents 로
+    같은 모양의 행(튜플)을 돌려줍니다. 집계 질의(GROUP BY)는 numpy 로 흉내 냅니다.
+    - tracking_key 가 다르면 빈 결과
+    - days 조건은 무시 (합성 이벤트는 항상 최근 days 일 안), since 조건은 반영
+    - 처리하지 못하는 SQL 은 NotImplementedError — 새 질의가 생기면 여기에도 추가해야 함
+    질의마다 (종류, 소요 시간, 행 수) 를 queries 에 남깁니다.
+    """
+
+    def __init__(self, events: SyntheticEvents):
+        self.events = events
+        self.queries: List[dict] = []
+
+    # ------------------------------------------------------------------ ClickHousePool 인터페이스
+
+    def execute(self, query: str, params: Optional[Dict[str, Any]] = None, timeout=None, settings=None, **kwargs):
+        started = time.perf_counter()
+        kind, rows = self._dispatch(query, params or {}, settings or {})
+        rows = [row for chunk in rows for row in chunk]
+        self._record(kind, started, len(rows))
+        return rows
+
+    def execute_iter(self, query: str, params: Optional[Dict[str, Any]] = None, timeout=None, settings=None, **kwargs) -> Iterator:
+        started = time.perf_counter()
+        kind, rows = self._dispatch(query, params or {}, settings or {})
+        count = 0
+        for chunk in rows:
+            count += len(chunk)
+            yield from chunk
+        self._record(kind, started, count)
+
+    def close(self) -> None:
+        pass
+
+    def _record(self, kind: str, started: float, rows: int) -> None:
+        self.queries.append({"kind": kind, "seconds": round(time.perf_counter() - started, 6), "rows": rows})
+
+    # ------------------------------------------------------------------ SQL 구분
+
+    def _dispatch(self, query: str, params: dict, settings: dict):
+        if params.get("tracking_key", self.events.tracking_key) != self.events.tracking_key:
+            return "empty", iter(())
+        block = int(settings.get("max_block_size") or 100_000)
+        if "GROUP BY lang, anon_id, product_code" in query:
+            return "interactions_aggregated", self._aggregated_rows(params, block)
+        if "argMax(" in query:
+            return "item_metadata_latest", self._meta_rows(None, with_lang=True)
+        if "GROUP BY tracking_key" in query:
+            return "site_activity", self._site_activity_rows(params)
+        if "anyHeavy(" in query:
+            return "item_metadata", self._meta_rows(params.get("lang"), with_lang=False)
+        if "count() AS cnt" in query:
+            return "popular_items", self._popular_rows(params)
+        if "AS max_ts" in query:
+            return "max_event_ts", iter([[(self.events.stats()["last_ts"], self.events.n_events)]])
+        if "AS ts" in query:
+            return "events_encoded", self._encoded_rows(params)
+        if "product_sold_out" in query and "anon_id" in query:
+            return "events", self._event_rows(params)
+        raise NotImplementedError(f"FakeClickHouse: 처리하지 않는 SQL\n{query}")
+
+    # ------------------------------------------------------------------ 이벤트 행
+
+    def _encoded_rows(self, params: dict):
+        """(anon_id, product_code, common_page_language, tracking_type, ts)"""
+        langs = np.asarray(self.events.langs, dtype=object)
+        types = np.asarray(TRACKING_TYPES, dtype=object)
+        for chunk in self.events.chunks(params.get("since")):
+            yield list(zip(
+                self.events.anon_ids(chunk["u"]),
+                self.events.product_codes(chunk["i"]),
+                langs[chunk["l"]].tolist(),
+                types[chunk["t"]].tolist(),
+                chunk["ts"].tolist(),
+            ))
+
+    def _event_rows(self, params: dict):
+        """EVENT_COLUMNS 순서: anon_id, product_code, 메타..., tracking_type, common_page_language, common_ts"""
+        langs = np.asarray(self.events.langs, dtype=object)
+        types = np.asarray(TRACKING_TYPES, dtype=object)
+        for chunk in self.events.chunks(params.get("since")):
+            meta = self.events.item_meta_columns(chunk["i"])
+            common_ts = chunk["ts"].astype("datetime64[s]").astype(datetime.datetime).tolist()
+            yield list(zip(
+                self.events.anon_ids(chunk["u"]),
+                self.events.product_codes(chunk["i"]),
+                *meta.values(),
+                types[chunk["t"]].tolist(),
+                langs[chunk["l"]].tolist(),
+                common_ts,
+            ))
+
+    # ------------------------------------------------------------------ 집계 질의
+
+    def _aggregated_rows(self, params: dict, block: int):
+        """(lang, anon_id, product_code, weight, last_ts) — (사용자, 상품) 단위 합산"""
+        events = self.events
+        type_weights = dict(zip(params.get("types", []), params.get("type_weights", [])))
+        default_weight = float(params.get("default_weight", 1.0))
+        weight_table = np.array([type_weights.get(t, default_weight) for t in TRACKING_TYPES], dtype=np.float64)
+        half_life = params.get("half_life")
+
+        keys, weights, last = [], [], []
+        for chunk in events.chunks():
+            w = weight_table[chunk["t"]]
+            if half_life:
+                w = w * np.exp2(-(events.now - chunk["ts"]) / float(half_life))
+            k, w, t = _reduce_pairs(chunk["u"].astype(np.int64) * events.n_items + chunk["i"], w, chunk["ts"])
+            keys.append(k)
+            weights.append(w)
+            last.append(t)
+        keys, weights, last = _reduce_pairs(np.concatenate(keys), np.concatenate(weights), np.concatenate(last))
+
+        langs = np.asarray(events.langs, dtype=object)
+        for start in range(0, keys.size, block):
+            users = keys[start:start + block] // events.n_items
+            items = keys[start:start + block] % events.n_items
+            yield list(zip(
+                langs[events.user_lang[users]].tolist(),
+                events.anon_ids(users),
+                events.product_codes(items),
+                weights[start:start + block].tolist(),
+                last[start:start + block].tolist(),
+            ))
+
+    def _meta_rows(self, lang: Optional[str], with_lang: bool):
+        """
+        with_lang: [common_page_language, product_code] + META_COLUMNS + [tracking_type] (언어별)
+        아니면:    [product_code] + META_COLUMNS + [tracking_type] (lang 이 있으면 그 언어 상품만)
+        """
+        counts = self.events.stats()["counts"]
+
+        def _rows(items: np.ndarray, prefix: list) -> list:
+            meta = self.events.item_meta_columns(items)
+            return list(zip(*prefix, self.events.product_codes(items), *meta.values(), ["view"] * items.size))
+
+        if with_lang:
+            for lang_idx, name in enumerate(self.events.langs):
+                items = np.flatnonzero(counts[lang_idx])
+                yield _rows(items, [[name] * items.size])
+        elif lang is None:
+            yield _rows(np.flatnonzero(counts.sum(axis=0)), [])
+        elif lang in self.events.langs:
+            yield _rows(np.flatnonzero(counts[self.events.langs.index(lang)]), [])
+
+    def _popular_rows(self, params: dict):
+        """(product_code, cnt) — 언어별 이벤트 수 상위 top_k"""
+        lang = params.get("lang")
+        if lang not in self.events.langs:
+            return
+        counts = self.events.stats()["counts"][self.events.langs.index(lang)]
+        top = np.argsort(-counts, kind="stable")[:int(params.get("top_k", 10))]
+        top = top[counts[top] > 0]
+        yield list(zip(self.events.product_codes(top), counts[top].tolist()))
+
+    def _site_activity_rows(self, params: dict):
+        """(tracking_key, events, new_events, last_ts)"""
+        since_by_site = dict(zip(params.get("keys", []), params.get("since", [])))
+        since = since_by_site.get(self.events.tracking_key)
+        new_events = self.events.n_events
+        if since:
+            new_events = sum(int(np.count_nonzero(c["ts"] >= since)) for c in self.events.chunks())
+        yield [(self.events.tracking_key, self.events.n_events, new_events, self.events.stats()["last_ts"])]
+
+    # ------------------------------------------------------------------ 요약
+
+    def summary(self) -> Dict[str, dict]:
+        """질의 종류별 {count, seconds, rows}"""
+        out: Dict[str, dict] = {}
+        for q in self.queries:
+            s = out.setdefault(q["kind"], {"count": 0, "seconds": 0.0, "rows": 0})
+            s["count"] += 1
+            s["seconds"] = round(s["seconds"] + q["seconds"], 6)
+            s["rows"] += q["rows"]
+        return out
+
+
+@contextmanager
+def installed(fake: FakeClickHouse):
+    """프로세스 공용 풀(core.data_loader.pool.get_pool)을 fake 로 바꿔 둡니다."""
+    from core.data_loader import pool
+
+    previous = pool._pool
+    pool._pool = fake
+    try:
+        yield fake
+    finally:
+        pool._pool = previous
@@ -0,0 +1,122 @@
+import os
+import time
+import resource
+import threading
+import tracemalloc
+import numpy as np
+from contextlib import contextmanager
+from typing import Dict, List
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int:
+    """현재 프로세스 RSS (bytes). /proc 이 없으면 ru_maxrss 로 대신합니다."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return max_rss()
+
+
+def max_rss() -> int:
+    """프로세스 시작 이후 최대 RSS (bytes)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if os.uname().sysname == "Darwin" else rss * 1024
+
+
+def _mb(n: float) -> float:
+    return round(n / (1024 * 1024), 2)
+
+
+class _RssSampler(threading.Thread):
+    """interval 초마다 RSS 를 읽어 최댓값을 기록 (C 확장·LightFM 할당까지 잡기 위함)"""
+
+    def __init__(self, interval: float):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, current_rss())
+        return self.peak
+
+
+def latency_summary(seconds: List[float]) -> dict:
+    """요청별 소요 시간(초) 목록 → ms 단위 분포"""
+    if not seconds:
+        return {"count": 0}
+    ms = np.asarray(seconds, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+class StageRecorder:
+    """
+    단계별 소요 시간과 메모리를 기록합니다.
+
+    - seconds:             perf_counter 경과 시간 (같은 이름으로 여러 번 재면 합산)
+    - peak_rss_mb:         단계 중 샘플링한 최대 RSS (언어별 반복이면 그중 최댓값)
+    - peak_rss_delta_mb:   단계 시작 시 RSS 대비 최대 증가량
+    - tracemalloc_peak_mb: trace=True 일 때 단계 중 Python/numpy 할당 최대치
+      (tracemalloc 은 느려지므로 시간과 함께 보려면 끄고 따로 돌리세요)
+    """
+
+    def __init__(self, trace: bool = False, sample_interval: float = 0.01):
+        self.trace = trace
+        self.sample_interval = sample_interval
+        self.stages: Dict[str, dict] = {}
+        self.latency: Dict[str, dict] = {}
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str):
+        start_rss = current_rss()
+        sampler = _RssSampler(self.sample_interval)
+        sampler.start()
+        if self.trace:
+            tracemalloc.reset_peak()
+            traced_start = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            peak = sampler.stop()
+            record = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "peak_rss_mb": 0.0, "peak_rss_delta_mb": 0.0})
+            record["calls"] += 1
+            record["seconds"] = round(record["seconds"] + elapsed, 6)
+            record["peak_rss_mb"] = max(record["peak_rss_mb"], _mb(peak))
+            record["peak_rss_delta_mb"] = max(record["peak_rss_delta_mb"], _mb(peak - start_rss))
+            if self.trace:
+                traced_peak = tracemalloc.get_traced_memory()[1] - traced_start
+                record["tracemalloc_peak_mb"] = max(record.get("tracemalloc_peak_mb", 0.0), _mb(traced_peak))
+
+    def record_latency(self, name: str, seconds: List[float], **extra) -> None:
+        self.latency[name] = {**latency_summary(seconds), **extra}
+
+    def result(self) -> dict:
+        return {
+            "stages": self.stages,
+            "latency": self.latency,
+            "max_rss_mb": _mb(max_rss()),
+        }
+
+    def close(self) -> None:
+        if self.trace and tracemalloc.is_tracing():
+            tracemalloc.stop()
@@ -0,0 +1,208 @@
+import os
+import time
+import logging
+import numpy as np
+from typing import List, Optional
+from app.config import settings
+from benchmarks.measure import StageRecorder
+from benchmarks.synthetic import SyntheticEvents
+from core.model.ann import IVFIndex
+from core.model.artifacts import load_model, save_model_artifacts
+from core.model.lightfm_trainer import load_latest_model, train_model
+from core.model.scorer import EmbeddingScorer
+from core.model.seen import SEEN_ALL
+from core.model.similar import compute_similar_items, save_similar_table
+from core.model.topn import compute_topn_table, save_topn_table
+from core.train_user import (
+    _load_inputs,
+    _next_version_dir,
+    _publish_version,
+    _save_pickle,
+    _write_language_inputs,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def run_training(
+    events: SyntheticEvents,
+    recorder: StageRecorder,
+    data_path: str,
+    topn: int,
+    num_threads: int = 1,
+    build_ann: Optional[bool] = None,
+) -> List[dict]:
+    """
+    core/train_user.py 의 전체 학습을 단계별로 나눠 잽니다.
+    언어별 저장 순서는 _finish_language 와 같습니다. (model.pkl → top-N → 유사 아이템 → ANN → 아티팩트)
+
+    Returns:
+        언어별 {"lang", "lang_dir", "users", "items", "nnz"} (nnz 큰 순)
+    """
+    tracking_key = events.tracking_key
+
+    # 1) 로드 — 이벤트(또는 집계) 를 ClickHouse 대역에서 읽음
+    with recorder.stage("load"):
+        lang_inputs = _load_inputs(tracking_key, data_path)
+
+    # 2) 변환 — 언어별 interaction matrix · 메타 dict · seen CSR
+    with recorder.stage("transform"):
+        prepared = list(lang_inputs)
+    del lang_inputs
+
+    version, version_dir = _next_version_dir(tracking_key)
+    languages = []
+    for lang, matrix, user_map, item_map, lang_meta_dict, seen in prepared:
+        # 3) 맵·메타·seen 기록
+        with recorder.stage("write_inputs"):
+            lang_dir, filtered_meta = _write_language_inputs(
+                version_dir, lang, user_map, item_map, lang_meta_dict, seen={SEEN_ALL: matrix, **seen}
+            )
+
+        # 4) 학습
+        with recorder.stage("train"):
+            model = train_model(matrix, num_threads=num_threads)
+
+        # 5) 저장 (pickle · top-N · 유사 아이템 · ANN · mmap 아티팩트)
+        with recorder.stage("artifact_write"):
+            _save_pickle(model, os.path.join(lang_dir, "model.pkl"))
+        if topn > 0:
+            with recorder.stage("topn"):
+                save_topn_table(lang_dir, *compute_topn_table(model, topn))
+        if settings.SIMILAR_ITEMS_SIZE > 0:
+            with recorder.stage("similar"):
+                save_similar_table(lang_dir, *compute_similar_items(
+                    EmbeddingScorer.from_model(model), settings.SIMILAR_ITEMS_SIZE, num_threads
+                ))
+        want_ann = build_ann if build_ann is not None else 0 < settings.ANN_MIN_ITEMS <= len(item_map)
+        if want_ann:
+            with recorder.stage("ann"):
+                IVFIndex.build(EmbeddingScorer.from_model(model), n_lists=settings.ANN_NLIST).save(lang_dir)
+        with recorder.stage("artifact_write"):
+            save_model_artifacts(lang_dir, model, user_map, item_map, filtered_meta)
+
+        languages.append({
+            "lang": lang,
+            "lang_dir": lang_dir,
+            "users": len(user_map),
+            "items": len(item_map),
+            "nnz": int(matrix.nnz),
+        })
+        del model
+    del prepared
+
+    # 6) 공개 (_staging/v{n} → v{n})
+    published_dir = _publish_version(version_dir)
+    for language in languages:
+        language["lang_dir"] = os.path.join(published_dir, language["lang"])
+    languages.sort(key=lambda x: -x["nnz"])
+    return languages
+
+
+def run_model_load(recorder: StageRecorder, lang_dir: str) -> None:
+    """예전 pickle 로드(load_latest_model) 와 mmap 아티팩트 로드(load_model) 비교"""
+    with recorder.stage("model_load_pickle"):
+        model = load_latest_model(lang_dir)
+    del model
+    with recorder.stage("model_load_artifacts"):
+        loaded = load_model(lang_dir)
+    del loaded
+
+
+def run_scoring(recorder: StageRecorder, lang_dir: str, n_users: int, top_k: int, batch_size: int, seed: int = 0) -> None:
+    """
+    mmap 모델에서 사용자 top-k 스코어링.
+    - score_single: 사용자 한 명씩 (요청 경로, 호출별 지연 분포도 기록)
+    - score_batch:  batch_size 명씩 행렬 곱 (배치 추천 경로)
+    """
+    loaded = load_model(lang_dir)
+    scorer = loaded.scorer
+    rng = np.random.default_rng(seed)
+    uids = rng.integers(0, scorer.n_users, size=min(n_users, scorer.n_users))
+
+    latencies = []
+    with recorder.stage("score_single"):
+        for uid in uids.tolist():
+            started = time.perf_counter()
+            scorer.top_k(uid, top_k)
+            latencies.append(time.perf_counter() - started)
+    recorder.record_latency("score_single", latencies)
+
+    latencies = []
+    with recorder.stage("score_batch"):
+        for start in range(0, uids.size, batch_size):
+            started = time.perf_counter()
+            scorer.top_k_users(uids[start:start + batch_size], top_k)
+            latencies.append(time.perf_counter() - started)
+    recorder.record_latency("score_batch", latencies, batch_size=batch_size)
+
+
+def run_api(
+    recorder: StageRecorder,
+    events: SyntheticEvents,
+    lang: str,
+    lang_dir: str,
+    n_requests: int,
+    top_k: int,
+    batch_size: int,
+    seed: int = 0,
+) -> None:
+    """
+    FastAPI TestClient 로 서빙 엔드포인트를 호출해 요청별 지연을 기록합니다.
+    recommendations 는 처음 보는 사용자(응답 캐시 miss) 와 같은 사용자 재요청(hit) 을 따로 잽니다.
+    """
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    loaded = load_model(lang_dir)
+    rng = np.random.default_rng(seed)
+    anon_ids = [
+        loaded.user_map.sorted_ids[i].decode()
+        for i in rng.choice(len(loaded.user_map), size=min(n_requests, len(loaded.user_map)), replace=False)
+    ]
+    popular_codes = [loaded.item_map[int(i)] for i in loaded.popular_ranking()[:max(top_k, 20)]]
+    del loaded
+    base = {"tracking_key": events.tracking_key, "lang": lang, "top_k": top_k}
+
+    def _timed(name: str, calls) -> None:
+        latencies, errors = [], 0
+        with recorder.stage(f"api_{name}"):
+            for method, path, kwargs in calls:
+                started = time.perf_counter()
+                response = client.request(method, path, **kwargs)
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code >= 400
+        recorder.record_latency(f"api_{name}", latencies, errors=errors)
+
+    with TestClient(app) as client:
+        # 첫 요청: 레지스트리 모델 로드 포함
+        _timed("first_request", [("GET", "/v1/recommendations", {"params": {**base, "anon_id": anon_ids[0]}})])
+        _timed("recommendations", [
+            ("GET", "/v1/recommendations", {"params": {**base, "anon_id": a}}) for a in anon_ids
+        ])
+        _timed("recommendations_cached", [
+            ("GET", "/v1/recommendations", {"params": {**base, "anon_id": a}}) for a in anon_ids
+        ])
+        _timed("recommendations_filtered", [
+            ("GET", "/v1/recommendations", {"params": {
+                **base, "anon_id": a, "exclude_sold_out": True, "category_1_code": "c1_1",
+            }}) for a in anon_ids
+        ])
+        _timed("recommendations_unknown_user", [
+            ("GET", "/v1/recommendations", {"params": {**base, "anon_id": f"new-{i}"}}) for i in range(len(anon_ids))
+        ])
+        _timed("top_k", [("GET", "/v1/recommendations/top-k", {"params": base})] * len(anon_ids))
+        _timed("session", [
+            ("POST", "/v1/recommendations:session", {"json": {
+                **base, "anon_id": f"new-{i}",
+                "product_codes": rng.choice(popular_codes, size=5, replace=False).tolist(),
+            }}) for i in range(len(anon_ids))
+        ])
+        _timed("similar", [
+            ("GET", f"/v1/items/{popular_codes[i % len(popular_codes)]}/similar", {"params": base})
+            for i in range(len(anon_ids))
+        ])
+        _timed("batch", [
+            ("POST", "/v1/recommendations:batch", {"json": {**base, "anon_ids": anon_ids[start:start + batch_size]}})
+            for start in range(0, len(anon_ids), batch_size)
+        ])
@@ -0,0 +1,171 @@
+"""
+합성 이벤트로 학습 → 서빙 전체 파이프라인의 단계별 소요 시간·최대 메모리를 재고 JSON 으로 남깁니다.
+
+    PYTHONPATH=. python -m benchmarks.run --events 1000000 --out bench/$(git rev-parse --short HEAD).json
+    PYTHONPATH=. python -m benchmarks.compare bench/old.json bench/new.json
+
+ClickHouse 는 프로세스 안의 대역(benchmarks/fake_clickhouse.py)으로 바꾸고, 모델은 임시 디렉터리에 씁니다.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+
+
+def _git_info() -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True
+        ).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def _environment() -> dict:
+    import numpy
+    import scipy
+    env = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "scipy": scipy.__version__,
+    }
+    try:
+        from importlib.metadata import version
+        env["lightfm"] = version("lightfm")
+    except Exception:
+        env["lightfm"] = None
+    return env
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="합성 이벤트로 로드·변환·학습·저장·모델 로드·스코어링·API 단계별 시간과 메모리를 잽니다."
+    )
+    parser.add_argument("--events", type=int, default=100_000, help="이벤트 수 (1만 ~ 5천만)")
+    parser.add_argument("--users", type=int, default=None, help="기본 events/20")
+    parser.add_argument("--items", type=int, default=None, help="기본 events/200 (100 ~ 50만)")
+    parser.add_argument("--langs", default="ko,en,ja", help="쉼표로 구분한 언어 (앞 언어일수록 사용자가 많음)")
+    parser.add_argument("--user-alpha", type=float, default=1.05, help="사용자 활동량 멱법칙 지수")
+    parser.add_argument("--item-alpha", type=float, default=1.1, help="상품 인기 멱법칙 지수")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="합성 이벤트 생성 청크 크기")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-path", default=None, choices=["dataframe", "encoded", "aggregated"],
+                        help="기본 settings.TRAIN_DATA_PATH")
+    parser.add_argument("--threads", type=int, default=None, help="학습·유사 아이템 스레드 수, 기본 코어 예산")
+    parser.add_argument("--topn", type=int, default=None, help="기본 settings.TOPN_SIZE")
+    parser.add_argument("--top-k", type=int, default=10, help="스코어링·API 추천 개수")
+    parser.add_argument("--requests", type=int, default=200, help="엔드포인트·단일 스코어링별 요청 수")
+    parser.add_argument("--batch-size", type=int, default=100, help="배치 스코어링·배치 API 사용자 수")
+    parser.add_argument("--skip-api", action="store_true", help="FastAPI 엔드포인트 단계 건너뜀")
+    parser.add_argument("--tracemalloc", action="store_true", help="단계별 tracemalloc 최대치도 기록 (느려짐)")
+    parser.add_argument("--model-dir", default=None, help="모델 저장 위치, 기본 임시 디렉터리(끝나면 삭제)")
+    parser.add_argument("--out", default=None, help="결과 JSON 경로, 기본 stdout")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    # 0) app.config 를 읽기 전에 환경 설정 — ClickHouse 접속 정보는 대역이 쓰지 않으므로 자리만 채움
+    model_dir = args.model_dir or tempfile.mkdtemp(prefix="recommender-bench-")
+    os.environ["MODEL_BASE_DIR"] = model_dir
+    os.environ["PRELOAD_ENABLED"] = "false"
+    os.environ["MODEL_POLL_INTERVAL"] = "0"
+    for key, value in (
+        ("CLICKHOUSE_HOST", "localhost"), ("CLICKHOUSE_DB", "bench"),
+        ("CLICKHOUSE_TABLE", "events"), ("CLICKHOUSE_DAYS", "30"),
+    ):
+        os.environ.setdefault(key, value)
+    if not args.skip_api:
+        # app.main 이 /app/logs/app.log 에 로그를 남김 (Docker 이미지 밖에서 실행할 때)
+        os.makedirs("/app/logs", exist_ok=True)
+
+    from app.config import settings
+    from core.train_executor import core_budget
+    from benchmarks.fake_clickhouse import FakeClickHouse, installed
+    from benchmarks.measure import StageRecorder
+    from benchmarks.pipeline import run_api, run_model_load, run_scoring, run_training
+    from benchmarks.synthetic import SyntheticEvents
+
+    data_path = args.data_path or settings.TRAIN_DATA_PATH
+    threads = args.threads or core_budget()
+    topn = settings.TOPN_SIZE if args.topn is None else args.topn
+    events = SyntheticEvents(
+        args.events,
+        n_users=args.users,
+        n_items=args.items,
+        langs=[l for l in args.langs.split(",") if l],
+        user_alpha=args.user_alpha,
+        item_alpha=args.item_alpha,
+        days=settings.CLICKHOUSE_DAYS,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+    )
+    recorder = StageRecorder(trace=args.tracemalloc)
+    fake = FakeClickHouse(events)
+    started = time.time()
+
+    try:
+        with installed(fake):
+            # 1) 학습 파이프라인 (가장 큰 언어 모델로 서빙 단계 측정)
+            languages = run_training(events, recorder, data_path, topn, num_threads=threads)
+            target = languages[0]
+
+            # 2) 모델 로드 · 스코어링
+            run_model_load(recorder, target["lang_dir"])
+            run_scoring(recorder, target["lang_dir"], args.requests, args.top_k, args.batch_size, args.seed)
+
+            # 3) API
+            if not args.skip_api:
+                run_api(
+                    recorder, events, target["lang"], target["lang_dir"],
+                    args.requests, args.top_k, args.batch_size, args.seed,
+                )
+    finally:
+        recorder.close()
+        if not args.model_dir:
+            shutil.rmtree(model_dir, ignore_errors=True)
+
+    result = {
+        "benchmark": "recommender-pipeline",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(started)),
+        "duration_seconds": round(time.time() - started, 3),
+        "git": _git_info(),
+        "environment": _environment(),
+        "params": {
+            "data_path": data_path,
+            "threads": threads,
+            "topn": topn,
+            "top_k": args.top_k,
+            "requests": args.requests,
+            "batch_size": args.batch_size,
+            "tracemalloc": args.tracemalloc,
+            "similar_items_size": settings.SIMILAR_ITEMS_SIZE,
+            "ann_min_items": settings.ANN_MIN_ITEMS,
+        },
+        "dataset": {
+            **events.describe(),
+            "languages": [{k: v for k, v in lang.items() if k != "lang_dir"} for lang in languages],
+        },
+        **recorder.result(),
+        "clickhouse": fake.summary(),
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"benchmark: {args.out} ({result['duration_seconds']}s)", file=sys.stderr)
+    else:
+        print(text)
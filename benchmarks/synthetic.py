@@ -0,0 +1,156 @@
+import time
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Sequence
+
+# tracking_type 분포 (조회가 대부분, 장바구니·구매는 드묾)
+TRACKING_TYPES = ("view", "cart", "purchase")
+TRACKING_TYPE_PROBS = (0.85, 0.10, 0.05)
+
+CATEGORY_1_COUNT = 20
+CATEGORY_2_COUNT = 200
+CATEGORY_3_COUNT = 1000
+
+
+def _power_law_cdf(n: int, alpha: float) -> np.ndarray:
+    """순위 r(0..n-1) 이 뽑힐 확률 ∝ (r+1)^-alpha 의 누적 분포"""
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -float(alpha)
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+class SyntheticEvents:
+    """
+    재현 가능한 합성 트래킹 이벤트.
+
+    - 사용자·상품 활동량은 멱법칙(순위^-alpha) — 소수 헤비 유저·인기 상품에 이벤트가 몰림
+    - 사용자마다 언어 하나(첫 언어 비중이 가장 큼), 상품은 모든 언어가 공유
+    - 이벤트 시각은 now 기준 최근 days 일 안에서 균등
+    - 청크 i 는 (seed, i) 로만 결정되므로 전체 이벤트를 메모리에 들고 있지 않고
+      질의마다 다시 만들어 씁니다. (10k ~ 5천만 이벤트)
+    """
+
+    def __init__(
+        self,
+        n_events: int,
+        n_users: Optional[int] = None,
+        n_items: Optional[int] = None,
+        langs: Sequence[str] = ("ko", "en", "ja"),
+        user_alpha: float = 1.05,
+        item_alpha: float = 1.1,
+        days: int = 30,
+        chunk_size: int = 1_000_000,
+        seed: int = 0,
+        tracking_key: str = "bench",
+        now: Optional[int] = None,
+    ):
+        self.n_events = int(n_events)
+        self.n_users = int(n_users or max(100, self.n_events // 20))
+        self.n_items = int(n_items or min(500_000, max(100, self.n_events // 200)))
+        self.langs = list(langs)
+        self.days = int(days)
+        self.chunk_size = int(chunk_size)
+        self.seed = int(seed)
+        self.tracking_key = tracking_key
+        self.now = int(now if now is not None else time.time())
+
+        rng = np.random.default_rng([self.seed, 0xC0FFEE])
+        self._user_cdf = _power_law_cdf(self.n_users, user_alpha)
+        self._item_cdf = _power_law_cdf(self.n_items, item_alpha)
+        # 인기 순위와 상품 번호를 섞어 인기 상품이 p0, p1, ... 에 몰리지 않게
+        self._item_perm = rng.permutation(self.n_items).astype(np.int32)
+        lang_weights = 0.5 ** np.arange(len(self.langs))
+        self.user_lang = rng.choice(
+            len(self.langs), size=self.n_users, p=lang_weights / lang_weights.sum()
+        ).astype(np.int16)
+        self._type_cdf = np.cumsum(TRACKING_TYPE_PROBS)
+        self._type_cdf /= self._type_cdf[-1]
+        self._stats: Optional[dict] = None
+
+    # ------------------------------------------------------------------ 이벤트
+
+    @property
+    def n_chunks(self) -> int:
+        return -(-self.n_events // self.chunk_size)
+
+    def chunk(self, i: int) -> Dict[str, np.ndarray]:
+        """i 번째 청크의 코드 배열 {"u", "i", "l", "t", "ts"}"""
+        size = min(self.chunk_size, self.n_events - i * self.chunk_size)
+        rng = np.random.default_rng([self.seed, i])
+        users = np.searchsorted(self._user_cdf, rng.random(size)).astype(np.int32)
+        items = self._item_perm[np.searchsorted(self._item_cdf, rng.random(size))]
+        types = np.searchsorted(self._type_cdf, rng.random(size)).astype(np.int16)
+        ts = self.now - rng.integers(0, self.days * 86400, size, dtype=np.int64)
+        return {"u": users, "i": items, "l": self.user_lang[users], "t": types, "ts": ts}
+
+    def chunks(self, since: Optional[int] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """전체 청크 (since(unix seconds) 를 주면 그 시각 이후 이벤트만)"""
+        for i in range(self.n_chunks):
+            chunk = self.chunk(i)
+            if since is not None:
+                keep = chunk["ts"] >= since
+                chunk = {k: v[keep] for k, v in chunk.items()}
+            yield chunk
+
+    @staticmethod
+    def anon_ids(users: np.ndarray) -> List[str]:
+        return [f"u{u}" for u in users.tolist()]
+
+    @staticmethod
+    def product_codes(items: np.ndarray) -> List[str]:
+        return [f"p{i}" for i in items.tolist()]
+
+    # ------------------------------------------------------------------ 상품 메타
+
+    def item_meta_columns(self, items: np.ndarray) -> Dict[str, list]:
+        """상품 번호 배열 → META_COLUMNS 순서의 컬럼 리스트 (상품 번호만으로 결정)"""
+        items = np.asarray(items, dtype=np.int64)
+        price = ((items * 7919) % 2000 + 1) * 100.0
+        cat_1 = items % CATEGORY_1_COUNT
+        cat_2 = items % CATEGORY_2_COUNT
+        cat_3 = items % CATEGORY_3_COUNT
+        codes = self.product_codes(items)
+        return {
+            "product_name": [f"상품 {i}" for i in items.tolist()],
+            "product_price": price.tolist(),
+            "product_dc_price": np.round(price * 0.9).tolist(),
+            "product_sold_out": (items % 13 == 0).tolist(),
+            "product_image_url": [f"https://img.example.com/{c}.jpg" for c in codes],
+            "product_brand": [f"brand{i % 50}" for i in items.tolist()],
+            "product_category_1_code": [f"c1_{c}" for c in cat_1.tolist()],
+            "product_category_1_name": [f"카테고리 {c}" for c in cat_1.tolist()],
+            "product_category_2_code": [f"c2_{c}" for c in cat_2.tolist()],
+            "product_category_2_name": [f"카테고리 {c}" for c in cat_2.tolist()],
+            "product_category_3_code": [f"c3_{c}" for c in cat_3.tolist()],
+            "product_category_3_name": [f"카테고리 {c}" for c in cat_3.tolist()],
+            "product_url": [f"https://shop.example.com/products/{c}" for c in codes],
+        }
+
+    # ------------------------------------------------------------------ 집계 통계
+
+    def stats(self) -> dict:
+        """
+        언어별 상품 이벤트 수(n_langs × n_items)와 전체 last_ts.
+        메타·인기·사이트 활동 질의가 같이 쓰므로 한 번만 계산합니다.
+        """
+        if self._stats is None:
+            size = len(self.langs) * self.n_items
+            counts = np.zeros(size, dtype=np.int64)
+            last_ts = 0
+            for chunk in self.chunks():
+                flat = chunk["l"].astype(np.int64) * self.n_items + chunk["i"]
+                counts += np.bincount(flat, minlength=size)
+                if chunk["ts"].size:
+                    last_ts = max(last_ts, int(chunk["ts"].max()))
+            self._stats = {"counts": counts.reshape(len(self.langs), self.n_items), "last_ts": last_ts}
+        return self._stats
+
+    def describe(self) -> dict:
+        return {
+            "events": self.n_events,
+            "users": self.n_users,
+            "items": self.n_items,
+            "langs": self.langs,
+            "days": self.days,
+            "chunk_size": self.chunk_size,
+            "seed": self.seed,
+        }
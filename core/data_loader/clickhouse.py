@@ -1,232 +1,299 @@
-import os
+import logging
 import pandas as pd
-from clickhouse_driver import Client
+from app.config import settings
+from core.data_loader.pool import get_pool, table_name
+from core.data_loader.encoded import EncodedEvents
+
+logger = logging.getLogger(__name__)
+
+# 상품 메타 컬럼 (product_code 제외)
+META_COLUMNS = [
+    'product_name',
+    'product_price',
+    'product_dc_price',
+    'product_sold_out',
+    'product_image_url',
+    'product_brand',
+    'product_category_1_code',
+    'product_category_1_name',
+    'product_category_2_code',
+    'product_category_2_name',
+    'product_category_3_code',
+    'product_category_3_name',
+    'product_url',
+]
+
+EVENT_COLUMNS = (
+    ['anon_id', 'product_code']
+    + META_COLUMNS
+    + ['tracking_type', 'common_page_language', 'common_ts']
+)
+
+
+def _days(days: int | None) -> int:
+    return int(days if days is not None else settings.CLICKHOUSE_DAYS)
+
 
 def load_popular_items(
     tracking_filter: str,
     top_k: int = 10,
-    days: int = 30,
+    days: int | None = None,
     lang: str = 'und'
 ) -> pd.DataFrame:
     """
     tracking_key 별로 최근 days일간 product_code별 카운트를 집계,
     상위 top_k개의 product_code와 카운트를 DataFrame으로 반환.
     """
-    client = Client(
-        host='clickhouse',
-        port=9000,
-        database=os.getenv("CLICKHOUSE_DB", "tracking"),
-    )
-    # SQL 인젝션 방어를 위해 작은따옴표를 이스케이프
-    sf = tracking_filter.replace("'", "''")
     sql = f"""
     SELECT
       product_code,
       count() AS cnt
-    FROM tracking.trackings
-    WHERE common_ts >= now() - INTERVAL {days} DAY
-    AND tracking_key = '{sf}'
+    FROM {table_name()}
+    WHERE common_ts >= now() - INTERVAL %(days)s DAY
+    AND tracking_key = %(tracking_key)s
     AND product_code IS NOT NULL
     AND product_code != ''
-    AND common_page_language = '{lang}'
+    AND common_page_language = %(lang)s
     GROUP BY product_code
     ORDER BY cnt DESC
-    LIMIT {top_k}
+    LIMIT %(top_k)s
     """
+    params = {"days": _days(days), "tracking_key": tracking_filter, "lang": lang, "top_k": int(top_k)}
     try:
-        rows = client.execute(sql)
+        rows = get_pool().execute(sql, params, query_name="popular_items")
         return pd.DataFrame(rows, columns=["product_code", "cnt"])
     except Exception as e:
-        # 로거가 있으면 logger.error로 바꿔주세요
-        print(f"❌ load_popular_items 오류: {e}")
+        logger.error(f"❌ load_popular_items 오류: {e}")
         return pd.DataFrame(columns=["product_code", "cnt"])
 
-def load_clickhouse_events(tracking_filter: str = None) -> pd.DataFrame:
-    client = Client(host='clickhouse', port=9000, database='tracking')
-    query = """
-    SELECT 
+def load_clickhouse_events(tracking_filter: str = None, days: int | None = None) -> pd.DataFrame:
+    sql = f"""
+    SELECT
+      {", ".join(EVENT_COLUMNS)}
+    FROM {table_name()}
+    WHERE common_ts >= now() - INTERVAL %(days)s DAY
+    AND product_code IS NOT NULL
+    AND product_code != ''
+    """
+    params = {"days": _days(days)}
+    if tracking_filter:
+        sql += " AND tracking_key = %(tracking_key)s"
+        params["tracking_key"] = tracking_filter
+    rows = get_pool().execute(sql, params, query_name="events")
+    return pd.DataFrame(rows, columns=EVENT_COLUMNS)
+
+def _iter_chunks(rows, chunk_size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def load_clickhouse_events_encoded(
+    tracking_filter: str = None,
+    days: int | None = None,
+    chunk_size: int | None = None,
+    since: int | None = None,
+) -> EncodedEvents:
+    """
+    학습에 필요한 컬럼만 스트리밍으로 읽으면서 바로 정수 코드로 인코딩합니다.
+    전체 결과를 Python 튜플 리스트나 object DataFrame 으로 만들지 않습니다.
+    since(unix seconds)를 주면 그 시각 이후 이벤트만 읽습니다. (증분 학습)
+    """
+    chunk_size = int(chunk_size or settings.CLICKHOUSE_STREAM_CHUNK)
+    sql = f"""
+    SELECT
+      anon_id, product_code, common_page_language, tracking_type,
+      toUnixTimestamp(common_ts) AS ts
+    FROM {table_name()}
+    WHERE common_ts >= now() - INTERVAL %(days)s DAY
+    AND product_code IS NOT NULL
+    AND product_code != ''
+    """
+    params = {"days": _days(days)}
+    if tracking_filter:
+        sql += " AND tracking_key = %(tracking_key)s"
+        params["tracking_key"] = tracking_filter
+    if since is not None:
+        sql += " AND common_ts >= toDateTime(%(since)s)"
+        params["since"] = int(since)
+    rows = get_pool().execute_iter(sql, params, settings={"max_block_size": chunk_size}, query_name="events_encoded")
+    events = EncodedEvents.from_chunks(_iter_chunks(rows, chunk_size))
+    logger.info(
+        f"📥 인코딩 로드: {len(events)} events, {len(events.users)} users, "
+        f"{len(events.items)} items, {len(events.langs)} langs"
+    )
+    return events
+
+def load_interactions_aggregated(
+    tracking_filter: str,
+    days: int | None = None,
+    chunk_size: int | None = None,
+) -> EncodedEvents:
+    """
+    (lang, anon_id, product_code) 단위 집계를 ClickHouse 에서 수행하고
+    (lang, anon_id, product_code, weight, last_ts) 행만 스트리밍으로 받아 인코딩합니다.
+    Python 으로 넘어오는 행 수는 원본 이벤트 수가 아니라 고유 (사용자, 상품) 쌍 수에 비례합니다.
+    weight 는 tracking_type 가중치(INTERACTION_TYPE_WEIGHTS)와 시간 감쇠를 적용한 합입니다.
+    """
+    chunk_size = int(chunk_size or settings.CLICKHOUSE_STREAM_CHUNK)
+    types = list(settings.INTERACTION_TYPE_WEIGHTS)
+    weight_expr = "transform(tracking_type, %(types)s, %(type_weights)s, %(default_weight)s)"
+    params = {
+        "days": _days(days),
+        "tracking_key": tracking_filter,
+        "types": types,
+        "type_weights": [float(settings.INTERACTION_TYPE_WEIGHTS[t]) for t in types],
+        "default_weight": float(settings.INTERACTION_DEFAULT_WEIGHT),
+    }
+    if settings.INTERACTION_HALF_LIFE_DAYS > 0:
+        # 기준 시각은 질의 시점 now() — 이벤트 나이에 따른 상대 가중치만 의미가 있음
+        weight_expr += " * exp2(-dateDiff('second', common_ts, now()) / %(half_life)s)"
+        params["half_life"] = float(settings.INTERACTION_HALF_LIFE_DAYS) * 86400.0
+    sql = f"""
+    SELECT
+      common_page_language AS lang,
       anon_id,
       product_code,
-      product_name,
-      product_price,
-      product_dc_price,
-      product_sold_out,
-      product_image_url,
-      product_brand,
-      product_category_1_code,
-      product_category_1_name,
-      product_category_2_code,
-      product_category_2_name,
-      product_category_3_code,
-      product_category_3_name,
-      product_url,
-      tracking_type,
-      common_page_language,
-      common_ts
-    FROM tracking.trackings
-    WHERE common_ts >= now() - INTERVAL 30 DAY
+      sum({weight_expr}) AS weight,
+      toUnixTimestamp(max(common_ts)) AS last_ts
+    FROM {table_name()}
+    WHERE common_ts >= now() - INTERVAL %(days)s DAY
+    AND tracking_key = %(tracking_key)s
     AND product_code IS NOT NULL
     AND product_code != ''
+    GROUP BY lang, anon_id, product_code
     """
-    if tracking_filter:
-        sf = tracking_filter.replace("'", "''")
-        query += f" AND tracking_key = '{sf}'"
-    rows = client.execute(query)
-    return pd.DataFrame(
-        rows,
-        columns=[
-            'anon_id',
-            'product_code',
-            'product_name',
-            'product_price',
-            'product_dc_price',
-            'product_sold_out',
-            'product_image_url',
-            'product_brand',
-            'product_category_1_code',
-            'product_category_1_name',
-            'product_category_2_code',
-            'product_category_2_name',
-            'product_category_3_code',
-            'product_category_3_name',
-            'product_url',
-            'tracking_type',
-            'common_page_language',
-            'common_ts'
-        ]
+    rows = get_pool().execute_iter(sql, params, settings={"max_block_size": chunk_size}, query_name="interactions_aggregated")
+    events = EncodedEvents.from_aggregated_chunks(_iter_chunks(rows, chunk_size))
+    logger.info(
+        f"📥 집계 로드: {len(events)} pairs, {len(events.users)} users, "
+        f"{len(events.items)} items, {len(events.langs)} langs"
+    )
+    return events
+
+def load_item_metadata_latest(tracking_key: str, days: int | None = None) -> pd.DataFrame:
+    """
+    (common_page_language, product_code) 별 가장 최근 이벤트(common_ts 기준)의 메타를
+    argMax 로 ClickHouse 에서 골라 반환합니다.
+    """
+    cols = META_COLUMNS + ['tracking_type']
+    columns = ['common_page_language', 'product_code'] + cols
+    select = ",\n      ".join(
+        ["common_page_language AS common_page_language", "product_code AS product_code"]
+        + [f"argMax({c}, common_ts) AS {c}" for c in cols]
+    )
+    sql = f"""
+    SELECT
+      {select}
+    FROM {table_name()}
+    WHERE tracking_key = %(tracking_key)s
+    AND product_code IS NOT NULL
+    AND product_code != ''
+    AND common_ts >= now() - INTERVAL %(days)s DAY
+    GROUP BY common_page_language, product_code
+    """
+    rows = get_pool().execute(sql, {"tracking_key": tracking_key, "days": _days(days)}, query_name="item_metadata_latest")
+    return pd.DataFrame(rows, columns=columns)
+
+def load_max_event_ts(tracking_key: str, days: int | None = None) -> int | None:
+    """
+    사이트의 최근 days일 이벤트 중 가장 늦은 common_ts (ClickHouse 기준 unix seconds, 없으면 None).
+    학습 워터마크를 학습 서버 시계가 아니라 데이터 시각으로 잡기 위해 씁니다.
+    """
+    sql = f"""
+    SELECT toUnixTimestamp(max(common_ts)) AS max_ts, count() AS events
+    FROM {table_name()}
+    WHERE common_ts >= now() - INTERVAL %(days)s DAY
+    AND tracking_key = %(tracking_key)s
+    AND product_code IS NOT NULL
+    AND product_code != ''
+    """
+    rows = get_pool().execute(sql, {"days": _days(days), "tracking_key": tracking_key}, query_name="max_event_ts")
+    if not rows or not rows[0][1]:
+        return None
+    return int(rows[0][0])
+
+def load_site_activity(since_by_site: dict[str, int] | None = None, days: int | None = None) -> pd.DataFrame:
+    """
+    최근 days일 동안 이벤트가 있는 tracking_key 별 (events, new_events, last_ts).
+    new_events 는 since_by_site[tracking_key](unix seconds, 보통 마지막으로 학습한 이벤트 시각 max_ts) 이후 이벤트 수 —
+    목록에 없는 사이트는 기간 전체가 새 이벤트입니다.
+    """
+    since_by_site = since_by_site or {}
+    keys = list(since_by_site) or [""]
+    since = [int(since_by_site[k]) for k in since_by_site] or [0]
+    sql = f"""
+    SELECT
+      tracking_key,
+      count() AS events,
+      countIf(toUnixTimestamp(common_ts) >= transform(tracking_key, %(keys)s, %(since)s, 0)) AS new_events,
+      toUnixTimestamp(max(common_ts)) AS last_ts
+    FROM {table_name()}
+    WHERE common_ts >= now() - INTERVAL %(days)s DAY
+    AND tracking_key != ''
+    AND product_code IS NOT NULL
+    AND product_code != ''
+    GROUP BY tracking_key
+    """
+    rows = get_pool().execute(sql, {"days": _days(days), "keys": keys, "since": since}, query_name="site_activity")
+    return pd.DataFrame(rows, columns=["tracking_key", "events", "new_events", "last_ts"])
+
+def _meta_select(extra: list[str] = ()) -> str:
+    cols = META_COLUMNS + list(extra)
+    return ",\n      ".join(
+        ["product_code AS product_code"] + [f"anyHeavy({c}) AS {c}" for c in cols]
     )
 
 def load_clickhouse_item_metadata(tracking_filter: str) -> pd.DataFrame:
     """
     tracking_key 별로 distinct product_code 에 대해
     product_name, price, sold_out, 이미지, 브랜드,
-    category_1/2/3 코드·이름, tracking_type, common_page_language
-    를 모두 리턴합니다.
+    category_1/2/3 코드·이름, product_url 을 모두 리턴합니다.
     """
-    client = Client(
-        host='clickhouse',
-        port=9000,
-        database=os.getenv("CLICKHOUSE_DB", "tracking"),
-    )
-    sf = tracking_filter.replace("'", "''")
+    columns = ['product_code'] + META_COLUMNS
     sql = f"""
     SELECT
-      product_code                                 AS product_code,
-      anyHeavy(product_name)                       AS product_name,
-      anyHeavy(product_price)                      AS product_price,
-      anyHeavy(product_dc_price)                   AS product_dc_price,
-      anyHeavy(product_sold_out)                   AS product_sold_out,
-      anyHeavy(product_image_url)                  AS product_image_url,
-      anyHeavy(product_brand)                      AS product_brand,
-      anyHeavy(product_category_1_code)            AS product_category_1_code,
-      anyHeavy(product_category_1_name)            AS product_category_1_name,
-      anyHeavy(product_category_2_code)            AS product_category_2_code,
-      anyHeavy(product_category_2_name)            AS product_category_2_name,
-      anyHeavy(product_category_3_code)            AS product_category_3_code,
-      anyHeavy(product_category_3_name)            AS product_category_3_name,
-      anyHeavy(product_url)                        AS product_url
-    FROM tracking.trackings
-    WHERE tracking_key = '{sf}'
+      {_meta_select()}
+    FROM {table_name()}
+    WHERE tracking_key = %(tracking_key)s
     AND product_code IS NOT NULL
     AND product_code != ''
     GROUP BY product_code
     """
     try:
-        rows = client.execute(sql)
-        return pd.DataFrame(rows, columns=[
-            'product_code',
-            'product_name',
-            'product_price',
-            'product_dc_price',
-            'product_sold_out',
-            'product_image_url',
-            'product_brand',
-            'product_category_1_code',
-            'product_category_1_name',
-            'product_category_2_code',
-            'product_category_2_name',
-            'product_category_3_code',
-            'product_category_3_name',
-            'product_url',
-        ])
+        rows = get_pool().execute(sql, {"tracking_key": tracking_filter}, query_name="item_metadata")
+        return pd.DataFrame(rows, columns=columns)
     except Exception as e:
-        # logger.error로 바꿔주세요
-        print(f"❌ load_clickhouse_item_metadata 오류: {e}")
-        return pd.DataFrame(columns=[
-            'product_code',
-            'product_name',
-            'product_price',
-            'product_dc_price',
-            'product_sold_out',
-            'product_image_url',
-            'product_brand',
-            'product_category_1_code',
-            'product_category_1_name',
-            'product_category_2_code',
-            'product_category_2_name',
-            'product_category_3_code',
-            'product_category_3_name',
-            'product_url',
-        ])
+        logger.error(f"❌ load_clickhouse_item_metadata 오류: {e}")
+        return pd.DataFrame(columns=columns)
 
 def load_item_metadata_full(
     tracking_key: str,
-    day: int = 30,
+    day: int | None = None,
     lang: str | None = None
 ) -> pd.DataFrame:
-    client = Client(host='clickhouse', port=9000, database='tracking')
-    sf = tracking_key.replace("'", "''")
-
+    columns = ['product_code'] + META_COLUMNS + ['tracking_type']
     sql = f"""
     SELECT
-        product_code                                AS product_code,
-        anyHeavy(product_name)                      AS product_name,
-        anyHeavy(product_price)                     AS product_price,
-        anyHeavy(product_dc_price)                  AS product_dc_price,
-        anyHeavy(product_sold_out)                  AS product_sold_out,
-        anyHeavy(product_image_url)                 AS product_image_url,
-        anyHeavy(product_brand)                     AS product_brand,
-        anyHeavy(product_category_1_code)           AS product_category_1_code,
-        anyHeavy(product_category_1_name)           AS product_category_1_name,
-        anyHeavy(product_category_2_code)           AS product_category_2_code,
-        anyHeavy(product_category_2_name)           AS product_category_2_name,
-        anyHeavy(product_category_3_code)           AS product_category_3_code,
-        anyHeavy(product_category_3_name)           AS product_category_3_name,
-        anyHeavy(product_url)                       AS product_url,
-        anyHeavy(tracking_type)                     AS tracking_type
-    FROM tracking.trackings
-    WHERE tracking_key = '{sf}'
+      {_meta_select(['tracking_type'])}
+    FROM {table_name()}
+    WHERE tracking_key = %(tracking_key)s
     AND product_code IS NOT NULL
     AND product_code != ''
-    AND common_page_language = '{lang}'
-    AND common_ts >= now() - INTERVAL {day} DAY
+    AND common_ts >= now() - INTERVAL %(days)s DAY
     """
+    params = {"tracking_key": tracking_key, "days": _days(day)}
 
     # raw 컬럼(common_page_language) 로 필터를 걸어 줍니다
     if lang:
-        lang_escaped = lang.replace("'", "''")
-        sql += f"\n  AND common_page_language = '{lang_escaped}'"
-
-    sql += "\nGROUP BY product_code"
-
-    rows = client.execute(sql)
-    return pd.DataFrame(
-        rows,
-        columns=[
-            'product_code',
-            'product_name',
-            'product_price',
-            'product_dc_price',
-            'product_sold_out',
-            'product_image_url',
-            'product_brand',
-            'product_category_1_code',
-            'product_category_1_name',
-            'product_category_2_code',
-            'product_category_2_name',
-            'product_category_3_code',
-            'product_category_3_name',
-            'product_url',
-            'tracking_type',
-        ]
-    )
+        sql += "\n    AND common_page_language = %(lang)s"
+        params["lang"] = lang
+
+    sql += "\n    GROUP BY product_code"
+
+    rows = get_pool().execute(sql, params, query_name="item_metadata_full")
+    return pd.DataFrame(rows, columns=columns)
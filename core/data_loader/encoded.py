@@ -0,0 +1,185 @@
+import logging
+from typing import Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from core.preprocess.transformer import build_interaction_csr, event_weights
+
+logger = logging.getLogger(__name__)
+
+
+class DictionaryEncoder:
+    """
+    문자열 → 정수 코드 사전. 청크 단위로 들어오는 값을 전역 코드로 바꿔 줍니다.
+    Python 연산은 청크의 고유값 수만큼만 발생합니다.
+    """
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, column: Iterable, dtype=np.int32) -> np.ndarray:
+        local_codes, uniques = pd.factorize(np.asarray(column, dtype=object), use_na_sentinel=False)
+        mapping = np.empty(len(uniques), dtype=dtype)
+        for i, value in enumerate(uniques):
+            value = "" if value is None else str(value)
+            code = self.codes.get(value)
+            if code is None:
+                code = len(self.values)
+                self.codes[value] = code
+                self.values.append(value)
+            mapping[i] = code
+        return mapping[local_codes]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class EncodedEvents:
+    """
+    ClickHouse 이벤트를 사전 인코딩한 컬럼 배열 묶음.
+
+    - users / items / langs / types: 코드 → 원래 문자열 (list)
+    - user_codes / item_codes:       int32 (이벤트 수)
+    - lang_codes / type_codes:       int16 (이벤트 수)
+    - ts:                            int64 unix seconds (이벤트 수)
+    - weights:                       float32 (행 수) — 서버 집계 결과일 때만, None 이면 이벤트당 1
+    """
+
+    def __init__(self, users, items, langs, types, user_codes, item_codes, lang_codes, type_codes, ts, weights=None):
+        self.users = users
+        self.items = items
+        self.langs = langs
+        self.types = types
+        self.user_codes = user_codes
+        self.item_codes = item_codes
+        self.lang_codes = lang_codes
+        self.type_codes = type_codes
+        self.ts = ts
+        self.weights = weights
+        self._pairs = None
+
+    def __len__(self) -> int:
+        return int(self.user_codes.size)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[List[tuple]]) -> "EncodedEvents":
+        """
+        (anon_id, product_code, common_page_language, tracking_type, ts) 행 청크들을
+        읽는 즉시 인코딩합니다. 원본 행은 청크 하나 분량만 메모리에 머뭅니다.
+        """
+        users, items, langs, types = (DictionaryEncoder() for _ in range(4))
+        parts: Dict[str, List[np.ndarray]] = {k: [] for k in ("u", "i", "l", "t", "ts")}
+        for chunk in chunks:
+            if not chunk:
+                continue
+            anon_ids, product_codes, page_langs, tracking_types, ts = zip(*chunk)
+            parts["u"].append(users.encode(anon_ids))
+            parts["i"].append(items.encode(product_codes))
+            parts["l"].append(langs.encode(page_langs, np.int16))
+            parts["t"].append(types.encode(tracking_types, np.int16))
+            parts["ts"].append(np.asarray(ts, dtype=np.int64))
+
+        def _cat(key, dtype):
+            return np.concatenate(parts[key]) if parts[key] else np.empty(0, dtype=dtype)
+
+        return cls(
+            users.values, items.values, langs.values, types.values,
+            _cat("u", np.int32), _cat("i", np.int32),
+            _cat("l", np.int16), _cat("t", np.int16), _cat("ts", np.int64),
+        )
+
+    @classmethod
+    def from_aggregated_chunks(cls, chunks: Iterable[List[tuple]]) -> "EncodedEvents":
+        """
+        ClickHouse 에서 (lang, anon_id, product_code) 단위로 집계한
+        (lang, anon_id, product_code, weight, last_ts) 행 청크들을 인코딩합니다.
+        tracking_type 은 집계 과정에서 weight 로 합쳐지므로 types 는 비어 있습니다.
+        """
+        users, items, langs = (DictionaryEncoder() for _ in range(3))
+        parts: Dict[str, List[np.ndarray]] = {k: [] for k in ("u", "i", "l", "w", "ts")}
+        for chunk in chunks:
+            if not chunk:
+                continue
+            page_langs, anon_ids, product_codes, weights, ts = zip(*chunk)
+            parts["l"].append(langs.encode(page_langs, np.int16))
+            parts["u"].append(users.encode(anon_ids))
+            parts["i"].append(items.encode(product_codes))
+            parts["w"].append(np.asarray(weights, dtype=np.float32))
+            parts["ts"].append(np.asarray(ts, dtype=np.int64))
+
+        def _cat(key, dtype):
+            return np.concatenate(parts[key]) if parts[key] else np.empty(0, dtype=dtype)
+
+        lang_codes = _cat("l", np.int16)
+        return cls(
+            users.values, items.values, langs.values, [],
+            _cat("u", np.int32), _cat("i", np.int32),
+            lang_codes, np.zeros(lang_codes.size, dtype=np.int16), _cat("ts", np.int64),
+            weights=_cat("w", np.float32),
+        )
+
+    def by_language(self) -> Iterator[Tuple[str, "EncodedEvents"]]:
+        """언어별 부분 집합 (사전은 공유, 코드 배열만 잘라냄)"""
+        order = np.argsort(self.lang_codes, kind="stable")
+        bounds = np.searchsorted(self.lang_codes[order], np.arange(len(self.langs) + 1))
+        for code, lang in enumerate(self.langs):
+            sel = order[bounds[code]:bounds[code + 1]]
+            if sel.size == 0:
+                continue
+            yield lang, EncodedEvents(
+                self.users, self.items, self.langs, self.types,
+                self.user_codes[sel], self.item_codes[sel],
+                self.lang_codes[sel], self.type_codes[sel], self.ts[sel],
+                weights=None if self.weights is None else self.weights[sel],
+            )
+
+    def interaction_matrix(self) -> Tuple[csr_matrix, Dict[str, int], Dict[str, int]]:
+        """
+        이 이벤트 집합의 사용자×아이템 가중치 CSR (중복 합산·상한 적용) 과
+        transform_interaction_matrix 와 같은 형태의 user_map / item_map 을 만듭니다.
+        서버 집계 결과(weights 있음)면 그 weight 를, 아니면 tracking_type·시간 감쇠 가중치를 씁니다.
+        """
+        if self.empty:
+            return csr_matrix((0, 0)), {}, {}
+        user_ids, rows, item_ids, cols = self._pair_index()
+        if self.weights is not None:
+            data = self.weights
+        else:
+            data = event_weights(self.type_codes, self.types, self.ts)
+        matrix = build_interaction_csr(rows, cols, data, (user_ids.size, item_ids.size))
+        user_map = {self.users[c]: i for i, c in enumerate(user_ids.tolist())}
+        item_map = {self.items[c]: i for i, c in enumerate(item_ids.tolist())}
+        return matrix, user_map, item_map
+
+    def _pair_index(self):
+        """(고유 user 코드, 이벤트별 행, 고유 item 코드, 이벤트별 열) — 한 번만 계산"""
+        if self._pairs is None:
+            user_ids, rows = np.unique(self.user_codes, return_inverse=True)
+            item_ids, cols = np.unique(self.item_codes, return_inverse=True)
+            self._pairs = (user_ids, rows, item_ids, cols)
+        return self._pairs
+
+    def seen_by_type(self, tracking_types: List[str]) -> Dict[str, csr_matrix]:
+        """
+        interaction_matrix() 와 같은 행·열 기준의 tracking_type 별 "상호작용 여부" CSR (값 1).
+        서버 집계 결과처럼 타입 정보가 없거나 이벤트에 없는 타입은 결과에서 빠집니다.
+        """
+        if self.empty or not self.types:
+            return {}
+        user_ids, rows, item_ids, cols = self._pair_index()
+        shape = (user_ids.size, item_ids.size)
+        matrices = {}
+        for tracking_type in tracking_types:
+            if tracking_type not in self.types:
+                continue
+            sel = self.type_codes == self.types.index(tracking_type)
+            if not sel.any():
+                continue
+            ones = np.ones(int(sel.sum()), dtype=np.float32)
+            matrices[tracking_type] = build_interaction_csr(rows[sel], cols[sel], ones, shape, cap=1)
+        return matrices
@@ -0,0 +1,169 @@
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from clickhouse_driver import Client
+from app.config import settings
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ClickHousePool:
+    """
+    모든 ClickHouse 로더가 공유하는 크기 제한 커넥션 풀.
+
+    - Client 는 필요할 때 max_size 개까지만 만들고 재사용합니다. (TCP·핸드셰이크 1회)
+    - 빈 커넥션이 없으면 acquire_timeout 초까지 기다렸다가 실패합니다.
+    - 쿼리마다 timeout(max_execution_time)과 추가 settings 를 줄 수 있습니다.
+    - 쿼리는 %(name)s 파라미터로 전달해 드라이버가 이스케이프하도록 합니다.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 9000,
+        database: str = "default",
+        user: str = "default",
+        password: str = "",
+        max_size: int = 8,
+        connect_timeout: float = 5,
+        send_receive_timeout: float = 300,
+        query_timeout: float = 60,
+        acquire_timeout: float = 30,
+        compression: str | bool = False,
+        client_settings: Optional[Dict[str, Any]] = None,
+    ):
+        self._client_kwargs = dict(
+            host=host,
+            port=port,
+            database=database,
+            user=user,
+            password=password,
+            connect_timeout=connect_timeout,
+            send_receive_timeout=send_receive_timeout,
+            compression=compression,
+            settings=client_settings or {},
+        )
+        self.max_size = max_size
+        self.query_timeout = query_timeout
+        self.acquire_timeout = acquire_timeout
+        self._idle: "queue.LifoQueue[Client]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    @contextmanager
+    def connection(self) -> Iterator[Client]:
+        """풀에서 Client 하나를 빌려 쓰고 돌려줍니다. 오류가 나면 연결을 끊고 돌려줍니다."""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"ClickHouse pool exhausted ({self.max_size} connections busy)")
+        try:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                client = Client(**self._client_kwargs)
+                with self._lock:
+                    self._created += 1
+            try:
+                yield client
+            except BaseException:
+                # 읽다 만 응답이 남아 있을 수 있으므로 다음 사용 때 새로 연결하도록 끊어 둠
+                client.disconnect()
+                raise
+            finally:
+                self._idle.put(client)
+        finally:
+            self._slots.release()
+
+    def _query_settings(self, timeout: Optional[float], query_settings: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        merged = {"max_execution_time": int(timeout if timeout is not None else self.query_timeout)}
+        if query_settings:
+            merged.update(query_settings)
+        return merged
+
+    def execute(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        settings: Optional[Dict[str, Any]] = None,
+        query_name: Optional[str] = None,
+        **kwargs,
+    ):
+        """
+        Client.execute 와 같지만 풀 커넥션·쿼리 타임아웃을 적용합니다.
+        query_name(metrics.QUERIES) 별로 소요 시간·실패 수를 /metrics 에 기록합니다.
+        """
+        seconds, errors = metrics.clickhouse_query(query_name)
+        started = time.perf_counter()
+        try:
+            with self.connection() as client:
+                return client.execute(query, params, settings=self._query_settings(timeout, settings), **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            seconds.observe(time.perf_counter() - started)
+
+    def execute_iter(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        settings: Optional[Dict[str, Any]] = None,
+        query_name: Optional[str] = None,
+        **kwargs,
+    ) -> Iterator:
+        """
+        Client.execute_iter 스트리밍 버전. iterator 를 끝까지 소비(또는 close)할 때까지
+        커넥션을 점유합니다. 소요 시간은 결과를 끝까지 읽을 때까지로 기록합니다.
+        """
+        seconds, errors = metrics.clickhouse_query(query_name)
+        started = time.perf_counter()
+        try:
+            with self.connection() as client:
+                yield from client.execute_iter(query, params, settings=self._query_settings(timeout, settings), **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            seconds.observe(time.perf_counter() - started)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().disconnect()
+            except queue.Empty:
+                return
+
+
+_pool: Optional[ClickHousePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ClickHousePool:
+    """settings.CLICKHOUSE_* 로 만든 프로세스 공용 풀 (처음 호출 시 생성)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ClickHousePool(
+                    host=settings.CLICKHOUSE_HOST,
+                    port=settings.CLICKHOUSE_PORT,
+                    database=settings.CLICKHOUSE_DB,
+                    user=settings.CLICKHOUSE_USER,
+                    password=settings.CLICKHOUSE_PASSWORD,
+                    max_size=settings.CLICKHOUSE_POOL_SIZE,
+                    connect_timeout=settings.CLICKHOUSE_CONNECT_TIMEOUT,
+                    query_timeout=settings.CLICKHOUSE_QUERY_TIMEOUT,
+                    compression=settings.CLICKHOUSE_COMPRESSION or False,
+                )
+    return _pool
+
+
+def table_name() -> str:
+    """설정의 이벤트 테이블 (`db`.`table`) — 식별자는 파라미터로 넘길 수 없어 설정값만 사용"""
+    return f"`{settings.CLICKHOUSE_DB}`.`{settings.CLICKHOUSE_TABLE}`"
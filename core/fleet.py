@@ -0,0 +1,203 @@
+import os
+import json
+import math
+import time
+import logging
+from typing import Dict, List, Optional
+from app.config import settings
+from core.data_loader.clickhouse import load_site_activity
+from core.model.incremental import load_train_state
+from core.train_executor import core_budget
+from core.train_user import train_models_for_site, train_sites
+
+logger = logging.getLogger(__name__)
+
+
+def last_trained(tracking_key: str) -> Optional[dict]:
+    """
+    사이트의 최신 버전과 마지막 학습 시점.
+    - trained_at: 학습 서버 시각 (staleness 계산)
+    - max_ts:     학습한 마지막 이벤트 시각 (이후 이벤트가 "새 이벤트")
+    예전 train_state 는 watermark 로, train_state.json 이 없는 버전은 버전 디렉터리 mtime 으로 대신합니다.
+    """
+    site_root = os.path.join(settings.MODEL_BASE_DIR or "/app/models/lightfm", tracking_key)
+    if not os.path.isdir(site_root):
+        return None
+    versions = [int(d[1:]) for d in os.listdir(site_root) if d.startswith("v") and d[1:].isdigit()]
+    if not versions:
+        return None
+    version_dir = os.path.join(site_root, f"v{max(versions)}")
+    state = load_train_state(version_dir) or {}
+    fallback = int(state.get("watermark") or os.path.getmtime(version_dir))
+    return {
+        "version": f"v{max(versions)}",
+        "trained_at": int(state.get("trained_at") or fallback),
+        "max_ts": int(state.get("max_ts") or fallback),
+    }
+
+
+def plan_fleet(
+    tracking_keys: Optional[List[str]] = None,
+    min_new_events: Optional[int] = None,
+    max_staleness_hours: Optional[float] = None,
+) -> List[dict]:
+    """
+    학습 대상 사이트와 우선순위를 정합니다.
+
+    - 대상: ClickHouse 최근 CLICKHOUSE_DAYS 일 이벤트가 있는 tracking_key (tracking_keys 로 제한 가능)
+    - 건너뜀: 마지막 학습 이후 새 이벤트가 min_new_events 미만이고, 마지막 학습이
+      max_staleness_hours 이내인 사이트 ("의미 있는 변화 없음")
+    - 순서: 모델이 없는 사이트 먼저, 그 다음 staleness(시간) × log(새 이벤트 수) 가 큰 순
+
+    Returns:
+        사이트별 계획 dict 목록 (action="train" 이 앞, 우선순위 순)
+    """
+    if min_new_events is None:
+        min_new_events = settings.FLEET_MIN_NEW_EVENTS
+    if max_staleness_hours is None:
+        max_staleness_hours = settings.FLEET_MAX_STALENESS_HOURS
+
+    now = time.time()
+    trained: Dict[str, dict] = {}
+    base_dir = settings.MODEL_BASE_DIR or "/app/models/lightfm"
+    candidates = tracking_keys if tracking_keys else (
+        [d for d in os.listdir(base_dir) if not d.startswith("_")] if os.path.isdir(base_dir) else []
+    )
+    for tracking_key in candidates:
+        info = last_trained(tracking_key)
+        if info is not None:
+            trained[tracking_key] = info
+
+    activity = load_site_activity({k: v["max_ts"] + 1 for k, v in trained.items()})
+    if tracking_keys:
+        activity = activity[activity["tracking_key"].isin(tracking_keys)]
+
+    plans = []
+    for row in activity.itertuples(index=False):
+        info = trained.get(row.tracking_key)
+        plan = {
+            "tracking_key": row.tracking_key,
+            "events": int(row.events),
+            "new_events": int(row.new_events),
+            "last_event_ts": int(row.last_ts),
+            "version": info["version"] if info else None,
+            "staleness_hours": round((now - info["trained_at"]) / 3600.0, 2) if info else None,
+        }
+        if info is None:
+            plan.update(action="train", reason="no model", priority=math.inf)
+        elif plan["new_events"] < min_new_events and plan["staleness_hours"] < max_staleness_hours:
+            plan.update(action="skip", reason="no meaningful change", priority=0.0)
+        else:
+            plan.update(
+                action="train",
+                reason="stale" if plan["new_events"] < min_new_events else "new events",
+                priority=plan["staleness_hours"] * math.log1p(plan["new_events"]),
+            )
+        plans.append(plan)
+
+    plans.sort(key=lambda p: (p["action"] != "train", -p["priority"]))
+    return plans
+
+
+def _waves(plans: List[dict], memory_mb: float) -> List[List[dict]]:
+    """
+    우선순위 순서를 지키며 사이트들을 메모리 예산 안에 들어가는 묶음으로 나눕니다.
+    사이트 메모리는 이벤트 수 × FLEET_BYTES_PER_EVENT 로 추정합니다. (0 이면 제한 없음)
+    """
+    if memory_mb <= 0:
+        return [plans] if plans else []
+    waves, current, used = [], [], 0.0
+    for plan in plans:
+        need = plan["events"] * settings.FLEET_BYTES_PER_EVENT / (1024 * 1024)
+        if current and used + need > memory_mb:
+            waves.append(current)
+            current, used = [], 0.0
+        current.append(plan)
+        used += need
+    if current:
+        waves.append(current)
+    return waves
+
+
+def run_fleet(
+    plans: List[dict],
+    budget: Optional[int] = None,
+    memory_mb: Optional[float] = None,
+    incremental: bool = False,
+) -> dict:
+    """
+    plan_fleet 결과 중 action="train" 사이트를 학습하고 실행 요약을 돌려줍니다.
+
+    - 전체 학습: 메모리 예산 묶음(wave)마다 train_sites 로 언어·사이트를 코어 예산 안에서 동시에 학습
+    - incremental: 사이트별로 train_models_for_site(incremental=True) 를 차례로 실행
+    """
+    budget = budget or core_budget()
+    if memory_mb is None:
+        memory_mb = settings.FLEET_MEMORY_BUDGET_MB
+    started = time.time()
+    to_train = [p for p in plans if p["action"] == "train"]
+    sites: Dict[str, dict] = {p["tracking_key"]: dict(p) for p in plans}
+
+    if incremental:
+        for plan in to_train:
+            tracking_key = plan["tracking_key"]
+            t0 = time.monotonic()
+            try:
+                models = train_models_for_site(tracking_key, incremental=True)
+                sites[tracking_key].update(status="succeeded", languages=sorted(models))
+                if models:
+                    sites[tracking_key]["trained_version"] = next(iter(models.values()))["version"]
+            except Exception as e:
+                sites[tracking_key].update(status="failed", error=str(getattr(e, "detail", e)))
+            sites[tracking_key]["duration_seconds"] = round(time.monotonic() - t0, 3)
+    else:
+        for wave in _waves(to_train, memory_mb):
+            keys = [p["tracking_key"] for p in wave]
+            logger.info(f"🚚 학습 wave: {keys}")
+            timings: dict = {}
+            results = train_sites(keys, budget=budget, timings=timings)
+            for tracking_key in keys:
+                site = sites[tracking_key]
+                site.update(timings.get(tracking_key, {}))
+                site["duration_seconds"] = round(
+                    site.get("load_seconds", 0.0) + site.get("train_seconds", 0.0), 3
+                )
+                output = results.get(tracking_key)
+                if isinstance(output, Exception):
+                    site.update(status="failed", error=str(getattr(output, "detail", output)))
+                else:
+                    site.update(status="succeeded", languages=sorted(output or {}))
+                    if output:
+                        site["trained_version"] = next(iter(output.values()))["version"]
+
+    for site in sites.values():
+        site.setdefault("status", "skipped")
+        if site.get("priority") == math.inf:
+            site["priority"] = None
+
+    finished = time.time()
+    return {
+        "started_at": started,
+        "finished_at": finished,
+        "duration_seconds": round(finished - started, 3),
+        "cpu_budget": budget,
+        "memory_budget_mb": memory_mb,
+        "incremental": incremental,
+        "counts": {
+            status: sum(1 for s in sites.values() if s["status"] == status)
+            for status in ("succeeded", "failed", "skipped")
+        },
+        "sites": list(sites.values()),
+    }
+
+
+def write_run_summary(summary: dict, summary_dir: Optional[str] = None) -> str:
+    """실행 요약을 FLEET_SUMMARY_DIR(기본 MODEL_BASE_DIR/_runs)/{시작시각}.json 으로 기록"""
+    summary_dir = summary_dir or settings.FLEET_SUMMARY_DIR or os.path.join(
+        settings.MODEL_BASE_DIR or "/app/models/lightfm", "_runs"
+    )
+    os.makedirs(summary_dir, exist_ok=True)
+    path = os.path.join(summary_dir, time.strftime("%Y%m%dT%H%M%S", time.localtime(summary["started_at"])) + ".json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return path
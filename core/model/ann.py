@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from core.model.scorer import EmbeddingScorer, top_k_indices, top_k_rows
+
+logger = logging.getLogger(__name__)
+
+ANN_DIR = "ann"
+
+# 블록 하나의 거리 행렬이 차지할 최대 바이트 (float32 기준)
+_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def _item_vectors(scorer: EmbeddingScorer) -> np.ndarray:
+    """
+    bias 를 포함한 내적 검색을 위해 아이템 벡터 뒤에 item_bias 를 붙입니다.
+    query = [user_emb, 1] 이면 query · [item_emb, item_bias] 가 (user_bias 를 뺀) 점수와 같습니다.
+    """
+    return np.hstack([scorer.item_embeddings, scorer.item_biases[:, None]]).astype(np.float32)
+
+
+def _nearest_centroid(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """각 행을 L2 기준 가장 가까운 centroid 에 배정 (블록 단위)"""
+    c_sq = np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(x.shape[0], dtype=np.int32)
+    block = max(1, _BLOCK_BYTES // max(1, centroids.shape[0] * 4))
+    for start in range(0, x.shape[0], block):
+        xb = x[start:start + block]
+        # argmin |x - c|² = argmax (2 x·c - |c|²)
+        d = xb @ centroids.T
+        d *= 2
+        d -= c_sq
+        out[start:start + block] = np.argmax(d, axis=1)
+    return out
+
+
+class IVFIndex:
+    """
+    순수 NumPy 로 구현한 inverted-file(IVF) 내적 검색 인덱스.
+
+    아이템 벡터([emb, bias])를 k-means 로 n_lists 개 리스트로 나누고,
+    검색 시 query 와 내적이 큰 centroid n_probe 개의 리스트만 정확히 점수 계산합니다.
+    """
+
+    def __init__(self, centroids: np.ndarray, list_offsets: np.ndarray, list_items: np.ndarray):
+        self.centroids = centroids        # (n_lists, dim + 1) float32
+        self.list_offsets = list_offsets  # (n_lists + 1,) int64
+        self.list_items = list_items      # (n_items,) int32 — 리스트 순서로 정렬된 아이템 인덱스
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(
+        cls,
+        scorer: EmbeddingScorer,
+        n_lists: int = 0,
+        n_iter: int = 10,
+        sample_size: int = 100_000,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """
+        scorer 의 아이템 벡터로 IVF 인덱스를 만듭니다.
+        n_lists 가 0 이면 4·√n_items 를 사용합니다.
+        """
+        x = _item_vectors(scorer)
+        n = x.shape[0]
+        if n_lists <= 0:
+            n_lists = int(4 * np.sqrt(n))
+        n_lists = max(1, min(n_lists, n))
+
+        # 1) 샘플로 k-means (Lloyd)
+        rng = np.random.default_rng(seed)
+        sample = x[rng.choice(n, size=min(n, max(sample_size, n_lists)), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assign = _nearest_centroid(sample, centroids)
+            counts = np.bincount(assign, minlength=n_lists)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            nonempty = counts > 0
+            centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+
+        # 2) 전체 아이템 배정 → 리스트별로 정렬
+        assign = _nearest_centroid(x, centroids)
+        list_items = np.argsort(assign, kind="stable").astype(np.int32)
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=n_lists), out=list_offsets[1:])
+        return cls(centroids.astype(np.float32), list_offsets, list_items)
+
+    def candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        """query 와 내적이 큰 centroid n_probe 개의 리스트에 속한 아이템 인덱스"""
+        probes = top_k_indices(self.centroids @ query, n_probe)
+        return np.concatenate([
+            self.list_items[self.list_offsets[p]:self.list_offsets[p + 1]]
+            for p in probes
+        ])
+
+    def search(
+        self, scorer: EmbeddingScorer, uid: int, k: int, n_probe: int = 8, mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        사용자 uid 의 근사 상위 k개 (아이템 인덱스, 점수).
+        점수는 LightFM.predict 와 같은 식으로 후보 아이템에 대해서만 계산합니다.
+        """
+        cand, scores = self.search_vector(scorer, scorer.user_embeddings[uid], k, n_probe, mask)
+        return cand, scores + scorer.user_biases[uid]
+
+    def search_vector(
+        self, scorer: EmbeddingScorer, user_vector: np.ndarray, k: int, n_probe: int = 8,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        임의의 사용자 벡터(fold-in 등)의 근사 상위 k개 (user_bias 제외 점수)
+        mask 를 주면 후보 리스트에서 통과한 아이템만 점수를 계산합니다.
+        """
+        query = np.append(user_vector, np.float32(1.0)).astype(np.float32)
+        cand = self.candidates(query, n_probe)
+        if mask is not None:
+            cand = cand[mask[cand]]
+        scores = scorer.item_embeddings[cand] @ user_vector
+        scores += scorer.item_biases[cand]
+        top = top_k_indices(scores, k)
+        return cand[top], scores[top]
+
+    def search_users(
+        self, scorer: EmbeddingScorer, uids: np.ndarray, k: int, n_probe: int = 8
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        여러 사용자의 근사 상위 k개를 한 번에 계산합니다. (사용자마다 search 와 같은 후보·점수)
+
+        사용자 블록의 probe 리스트를 모아, 리스트마다 그 리스트를 고른 사용자들과 한 번에 행렬곱합니다.
+        후보는 (사용자, probe, 리스트 내 위치) 버퍼에 모아 행별 top-k 로 고릅니다.
+
+        Returns:
+            items:  int32 배열 (len(uids), k) — 후보가 k개보다 적은 사용자는 뒤를 -1 로 채움
+            scores: float32 배열 (len(uids), k) — 채운 자리는 -inf
+        """
+        uids = np.asarray(uids, dtype=np.int64)
+        n_probe = max(1, min(n_probe, self.n_lists))
+        items = np.full((uids.size, k), -1, dtype=np.int32)
+        scores = np.full((uids.size, k), -np.inf, dtype=np.float32)
+        if uids.size == 0 or k <= 0:
+            return items, scores
+
+        # 1) 사용자별 probe 리스트 (search 의 candidates 와 같은 기준)
+        user_emb = scorer.user_embeddings[uids]
+        query = np.hstack([user_emb, np.ones((uids.size, 1), dtype=np.float32)])
+        probes, _ = top_k_rows(query @ self.centroids.T, n_probe)
+
+        width = int(np.diff(self.list_offsets).max())
+        block = max(1, _BLOCK_BYTES // max(1, n_probe * width * 4))
+        for start in range(0, uids.size, block):
+            stop = min(uids.size, start + block)
+            pb = probes[start:stop]
+            cand = np.full((stop - start, n_probe, width), -1, dtype=np.int32)
+            cand_scores = np.full((stop - start, n_probe, width), -np.inf, dtype=np.float32)
+
+            # 2) 리스트마다 그 리스트를 고른 사용자들의 점수를 행렬곱 한 번으로 계산
+            #    (probe 를 리스트 번호로 한 번 정렬해 리스트별 (사용자, slot) 묶음을 얻음)
+            flat = pb.ravel()
+            order = np.argsort(flat, kind="stable")
+            lists, bounds = np.unique(flat[order], return_index=True)
+            bounds = np.append(bounds, order.size)
+            for lst, lo, hi in zip(lists.tolist(), bounds[:-1].tolist(), bounds[1:].tolist()):
+                rows, slots = np.divmod(order[lo:hi], n_probe)
+                list_items = self.list_items[self.list_offsets[lst]:self.list_offsets[lst + 1]]
+                s = user_emb[start + rows] @ scorer.item_embeddings[list_items].T
+                s += scorer.item_biases[list_items]
+                cand[rows, slots, :list_items.size] = list_items
+                cand_scores[rows, slots, :list_items.size] = s
+
+            # 3) 사용자별 후보 중 상위 k개
+            cand = cand.reshape(stop - start, -1)
+            cand_scores = cand_scores.reshape(stop - start, -1)
+            pos, top = top_k_rows(cand_scores, k)
+            top_items = np.take_along_axis(cand, pos, axis=1)
+            top_items[~np.isfinite(top)] = -1
+            items[start:stop, :pos.shape[1]] = top_items
+            scores[start:stop, :pos.shape[1]] = top + scorer.user_biases[uids[start:stop], None]
+        return items, scores
+
+    def save(self, model_dir: str) -> str:
+        out_dir = os.path.join(model_dir, ANN_DIR)
+        os.makedirs(out_dir, exist_ok=True)
+        np.save(os.path.join(out_dir, "centroids.npy"), self.centroids)
+        np.save(os.path.join(out_dir, "list_offsets.npy"), self.list_offsets)
+        np.save(os.path.join(out_dir, "list_items.npy"), self.list_items)
+        with open(os.path.join(out_dir, "index.json"), "w") as f:
+            json.dump({"type": "ivf", "n_lists": self.n_lists}, f)
+        return out_dir
+
+    @classmethod
+    def load(cls, model_dir: str, mmap_mode: Optional[str] = "r") -> Optional["IVFIndex"]:
+        """저장된 인덱스를 엽니다. (인덱스가 없으면 None)"""
+        in_dir = os.path.join(model_dir, ANN_DIR)
+        if not os.path.isfile(os.path.join(in_dir, "index.json")):
+            return None
+        return cls(
+            np.load(os.path.join(in_dir, "centroids.npy")),
+            np.load(os.path.join(in_dir, "list_offsets.npy")),
+            np.load(os.path.join(in_dir, "list_items.npy"), mmap_mode=mmap_mode),
+        )
+
+
+def recall_report(
+    scorer: EmbeddingScorer,
+    index: IVFIndex,
+    k: int = 10,
+    n_probes: Sequence[int] = (1, 2, 4, 8, 16, 32),
+    sample_users: int = 1000,
+    seed: int = 0,
+) -> List[Dict[str, float]]:
+    """
+    샘플 사용자에 대해 정확 검색 대비 recall@k 와 쿼리당 지연(ms)을 측정합니다.
+    첫 행(n_probe=0)은 정확 검색(EmbeddingScorer.top_k) 기준값입니다.
+    """
+    rng = np.random.default_rng(seed)
+    uids = rng.choice(scorer.n_users, size=min(sample_users, scorer.n_users), replace=False)
+
+    t0 = time.perf_counter()
+    exact = [scorer.top_k(int(u), k)[0] for u in uids]
+    exact_ms = (time.perf_counter() - t0) * 1000 / max(1, uids.size)
+    rows = [{"n_probe": 0, "recall": 1.0, "latency_ms": exact_ms, "candidates": float(scorer.n_items)}]
+
+    for n_probe in n_probes:
+        n_probe = min(n_probe, index.n_lists)
+        hits = 0
+        n_cand = 0
+        t0 = time.perf_counter()
+        for u, truth in zip(uids, exact):
+            approx, _ = index.search(scorer, int(u), k, n_probe)
+            hits += np.intersect1d(approx, truth, assume_unique=True).size
+        elapsed_ms = (time.perf_counter() - t0) * 1000 / max(1, uids.size)
+        for u in uids[:100]:
+            user_emb = scorer.user_embeddings[int(u)]
+            n_cand += index.candidates(np.append(user_emb, np.float32(1.0)), n_probe).size
+        rows.append({
+            "n_probe": n_probe,
+            "recall": hits / max(1, sum(t.size for t in exact)),
+            "latency_ms": elapsed_ms,
+            "candidates": n_cand / max(1, min(100, uids.size)),
+        })
+    return rows
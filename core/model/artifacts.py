@@ -0,0 +1,399 @@
+import os
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional
+import numpy as np
+from core.model.lightfm_trainer import load_latest_model
+from core.model.scorer import EmbeddingScorer, top_k_indices
+from core.model.topn import load_topn_table
+from core.model.similar import load_similar_table
+from core.model.seen import SeenItems
+from core.model.ann import IVFIndex
+
+logger = logging.getLogger(__name__)
+
+# 디스크 포맷 버전: 레이아웃이 바뀌면 올리고 load 쪽에서 분기합니다.
+ARTIFACT_FORMAT_VERSION = 1
+ARTIFACT_DIR = "artifacts"
+MANIFEST_FILE = "manifest.json"
+
+# 버전별로 미리 계산해 두는 인기 순위 길이 (TopKRequest.top_k 최대값)
+POPULAR_RANK_SIZE = 100
+
+_MISSING = object()
+
+# 메타 컬럼 타입
+_KIND_BOOL = "bool"
+_KIND_FLOAT = "float"
+_KIND_STR = "str"
+
+
+def _encode_ids(ids: Iterable[str]) -> np.ndarray:
+    """문자열 id 를 utf-8 고정폭 bytes(S) 배열로 변환 (np.searchsorted 용)"""
+    encoded = [str(i).encode("utf-8") for i in ids]
+    width = max((len(e) for e in encoded), default=1) or 1
+    return np.array(encoded, dtype=f"S{width}")
+
+
+class IdIndex:
+    """
+    정렬된 id 배열 + 인덱스 배열로 구현한 읽기 전용 {id: idx} 매핑.
+    mmap 으로 열면 워커 간에 page cache 를 공유합니다.
+    """
+
+    def __init__(self, sorted_ids: np.ndarray, index: np.ndarray):
+        self.sorted_ids = sorted_ids
+        self.index = index
+
+    def _find(self, key) -> int:
+        if not isinstance(key, str):
+            return -1
+        try:
+            raw = key.encode("utf-8")
+        except UnicodeEncodeError:
+            return -1
+        # 고정폭보다 긴 키는 잘려서 비교되므로 존재할 수 없음
+        if len(raw) > self.sorted_ids.dtype.itemsize:
+            return -1
+        k = np.bytes_(raw)
+        pos = int(np.searchsorted(self.sorted_ids, k))
+        if pos < self.sorted_ids.size and self.sorted_ids[pos] == k:
+            return pos
+        return -1
+
+    def __contains__(self, key) -> bool:
+        return self._find(key) >= 0
+
+    def __getitem__(self, key: str) -> int:
+        pos = self._find(key)
+        if pos < 0:
+            raise KeyError(key)
+        return int(self.index[pos])
+
+    def get(self, key: str, default=None):
+        pos = self._find(key)
+        return int(self.index[pos]) if pos >= 0 else default
+
+    def __len__(self) -> int:
+        return int(self.sorted_ids.size)
+
+
+class ItemCodes:
+    """아이템 인덱스 → product_code 읽기 전용 매핑 (inv_item_map 대체)"""
+
+    def __init__(self, codes: np.ndarray):
+        self.codes = codes
+
+    def __contains__(self, idx) -> bool:
+        try:
+            return 0 <= int(idx) < self.codes.size
+        except (TypeError, ValueError):
+            return False
+
+    def __getitem__(self, idx) -> str:
+        if idx not in self:
+            raise KeyError(idx)
+        return self.codes[int(idx)].decode("utf-8")
+
+    def get(self, idx, default=None):
+        return self[idx] if idx in self else default
+
+    def __len__(self) -> int:
+        return int(self.codes.size)
+
+
+class StringColumn:
+    """오프셋 테이블(utf-8 blob + int64 offsets) 로 저장한 문자열 컬럼"""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    def __getitem__(self, i: int) -> str:
+        start, stop = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.data[start:stop].tobytes().decode("utf-8")
+
+    @staticmethod
+    def save(path_prefix: str, values: Iterable[str]) -> None:
+        encoded = [("" if v is None else str(v)).encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        np.save(path_prefix + ".data.npy", data)
+        np.save(path_prefix + ".offsets.npy", offsets)
+
+    @classmethod
+    def load(cls, path_prefix: str, mmap_mode: Optional[str] = "r") -> "StringColumn":
+        return cls(
+            np.load(path_prefix + ".data.npy", mmap_mode=mmap_mode),
+            np.load(path_prefix + ".offsets.npy", mmap_mode=mmap_mode),
+        )
+
+
+class ColumnarMeta:
+    """
+    아이템 인덱스에 정렬된 컬럼 배열로 저장한 item_meta.
+    {product_code: {...메타...}} dict 와 같은 방식(get / in / [])으로 조회합니다.
+    """
+
+    def __init__(self, item_index: IdIndex, present: np.ndarray, columns: Dict[str, Any], kinds: Dict[str, str]):
+        self.item_index = item_index
+        self.present = present
+        self.columns = columns
+        self.kinds = kinds
+
+    def row(self, idx: int) -> Optional[dict]:
+        """아이템 인덱스로 메타 dict 조회 (메타가 없으면 None)"""
+        if not self.present[idx]:
+            return None
+        meta = {}
+        for name, col in self.columns.items():
+            kind = self.kinds[name]
+            if kind == _KIND_BOOL:
+                meta[name] = bool(col[idx])
+            elif kind == _KIND_FLOAT:
+                # 학습 시 fillna("") 된 값은 NaN 으로 저장되므로 다시 "" 로 돌려줌
+                value = float(col[idx])
+                meta[name] = "" if np.isnan(value) else value
+            else:
+                meta[name] = col[idx]
+        return meta
+
+    def get(self, code: str, default=None):
+        idx = self.item_index.get(code)
+        if idx is None:
+            return default
+        meta = self.row(idx)
+        return default if meta is None else meta
+
+    def __contains__(self, code) -> bool:
+        idx = self.item_index.get(code)
+        return idx is not None and bool(self.present[idx])
+
+    def __getitem__(self, code: str) -> dict:
+        meta = self.get(code)
+        if meta is None:
+            raise KeyError(code)
+        return meta
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.present))
+
+
+class LoadedModel:
+    """
+    서빙에 필요한 v{n}/{lang} 모델 한 벌.
+
+    - user_map:  {anon_id: user_idx} (dict 또는 IdIndex)
+    - item_map:  {item_idx: product_code} (dict 또는 ItemCodes)
+    - item_index: {product_code: item_idx} (IdIndex, 없으면 item_map 을 뒤집어 한 번 생성)
+    - item_meta: {product_code: {...메타...}} (dict 또는 ColumnarMeta)
+    - scorer:    EmbeddingScorer
+    - topn:      (items, scores) top-N 테이블 또는 None
+    - similar:   (items, scores) 아이템별 유사 아이템 테이블 또는 None
+    - seen:      SeenItems (사용자별 이미 상호작용한 아이템 CSR) 또는 None
+    - ann:       IVFIndex 또는 None
+
+    모델 버전에 종속된 파생 데이터(인기 순위, 응답 조각 등)는 cached() 로 이 객체에 붙여 둡니다.
+    버전이 바뀌면 새 LoadedModel 이 만들어지므로 캐시도 함께 무효화됩니다.
+    """
+
+    def __init__(
+        self, model_dir: str, user_map, item_map, item_meta, scorer: EmbeddingScorer,
+        topn=None, ann=None, item_index=None, similar=None, seen=None,
+    ):
+        self.model_dir = model_dir
+        self.user_map = user_map
+        self.item_map = item_map
+        self._item_index = item_index
+        self.item_meta = item_meta
+        self.scorer = scorer
+        self.topn = topn
+        self.similar = similar
+        self.seen = seen
+        self.ann = ann
+        self._cache: Dict[Any, Any] = {}
+
+    def cached(self, key, factory, stamp=None):
+        """
+        버전 단위 캐시: key 가 없거나 저장 당시 stamp 와 다르면 factory() 결과를 저장하고 반환.
+        (stamp 는 메타 갱신 세대처럼 버전 안에서도 바뀔 수 있는 입력을 구분할 때 사용)
+        """
+        entry = self._cache.get(key, _MISSING)
+        if entry is _MISSING or entry[0] != stamp:
+            entry = (stamp, factory())
+            self._cache[key] = entry
+        return entry[1]
+
+    @property
+    def item_index(self):
+        """상품코드 → 아이템 인덱스 (세션 fold-in 처럼 코드로 들어온 입력용)"""
+        if self._item_index is None:
+            self._item_index = self.cached(
+                "item_index", lambda: {code: int(idx) for idx, code in self.item_map.items()}
+            )
+        return self._item_index
+
+    def popular_ranking(self) -> np.ndarray:
+        """item_bias 내림차순 상위 POPULAR_RANK_SIZE 개 아이템 인덱스 (버전당 한 번 계산)"""
+        return self.cached(
+            "popular_ranking",
+            lambda: top_k_indices(self.scorer.item_biases, POPULAR_RANK_SIZE),
+        )
+
+    def topn_covers(self, top_k: int) -> bool:
+        """top-N 테이블만으로 top_k 개를 답할 수 있는지"""
+        if self.topn is None:
+            return False
+        n = self.topn[0].shape[1]
+        return top_k <= n or n >= self.scorer.n_items
+
+
+def save_model_artifacts(
+    model_dir: str,
+    model,
+    user_map: Dict[str, int],
+    item_map: Dict[str, int],
+    item_meta: Dict[str, dict],
+) -> str:
+    """
+    모델을 mmap 가능한 포맷으로 model_dir/artifacts 에 저장합니다.
+
+    - 임베딩·bias:  float32 .npy
+    - id↔index 맵: 정렬된 utf-8 고정폭 id 배열 + 인덱스 배열
+                    (아이템은 인덱스 순서의 코드 배열도 함께 저장)
+    - 메타:         컬럼별 .npy (문자열은 오프셋 테이블)
+    """
+    out_dir = os.path.join(model_dir, ARTIFACT_DIR)
+    meta_dir = os.path.join(out_dir, "meta")
+    os.makedirs(meta_dir, exist_ok=True)
+
+    # 1) 임베딩·bias
+    scorer = EmbeddingScorer.from_model(model)
+    np.save(os.path.join(out_dir, "user_embeddings.npy"), scorer.user_embeddings)
+    np.save(os.path.join(out_dir, "user_biases.npy"), scorer.user_biases)
+    np.save(os.path.join(out_dir, "item_embeddings.npy"), scorer.item_embeddings)
+    np.save(os.path.join(out_dir, "item_biases.npy"), scorer.item_biases)
+
+    # 2) id ↔ index 맵
+    def _save_id_index(prefix: str, mapping: Dict[str, int]) -> None:
+        ids = _encode_ids(mapping.keys())
+        index = np.fromiter(mapping.values(), dtype=np.int32, count=len(mapping))
+        order = np.argsort(ids, kind="stable")
+        np.save(os.path.join(out_dir, f"{prefix}_ids.npy"), ids[order])
+        np.save(os.path.join(out_dir, f"{prefix}_index.npy"), index[order])
+
+    _save_id_index("user", user_map)
+    _save_id_index("item", item_map)
+
+    n_items = scorer.n_items
+    codes_by_index = [""] * n_items
+    for code, idx in item_map.items():
+        codes_by_index[idx] = code
+    np.save(os.path.join(out_dir, "item_codes.npy"), _encode_ids(codes_by_index))
+
+    # 3) 메타 컬럼 (아이템 인덱스 순서)
+    rows = [item_meta.get(code) for code in codes_by_index]
+    present = np.array([bool(r) for r in rows], dtype=bool)
+    np.save(os.path.join(meta_dir, "_present.npy"), present)
+
+    columns = sorted({k for r in rows if r for k in r.keys()})
+    kinds: Dict[str, str] = {}
+    for name in columns:
+        values = [r.get(name) if r else None for r in rows]
+        sample = [v for v in values if v is not None and v != ""]
+        if sample and all(isinstance(v, (bool, np.bool_)) for v in sample):
+            kinds[name] = _KIND_BOOL
+            np.save(os.path.join(meta_dir, f"{name}.npy"), np.array([bool(v) for v in values], dtype=bool))
+        elif sample and all(isinstance(v, (int, float, np.integer, np.floating)) for v in sample):
+            kinds[name] = _KIND_FLOAT
+            arr = np.array([float(v) if v not in (None, "") else np.nan for v in values], dtype=np.float64)
+            np.save(os.path.join(meta_dir, f"{name}.npy"), arr)
+        else:
+            kinds[name] = _KIND_STR
+            StringColumn.save(os.path.join(meta_dir, name), values)
+
+    # 4) manifest (마지막에 기록 → manifest 가 있으면 완성된 아티팩트)
+    manifest = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "num_users": scorer.n_users,
+        "num_items": n_items,
+        "no_components": int(scorer.item_embeddings.shape[1]),
+        "meta_columns": kinds,
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f)
+
+    return out_dir
+
+
+def has_model_artifacts(model_dir: str) -> bool:
+    return os.path.isfile(os.path.join(model_dir, ARTIFACT_DIR, MANIFEST_FILE))
+
+
+def load_model_artifacts(model_dir: str, mmap_mode: Optional[str] = "r") -> LoadedModel:
+    """
+    save_model_artifacts 로 저장한 모델을 np.load(mmap_mode='r') 로 엽니다.
+    실제 데이터는 접근할 때 page cache 에서 읽히므로 로딩은 수 ms 이고,
+    같은 파일을 연 워커들은 메모리를 공유합니다.
+    """
+    in_dir = os.path.join(model_dir, ARTIFACT_DIR)
+    manifest_path = os.path.join(in_dir, MANIFEST_FILE)
+    if not os.path.isfile(manifest_path):
+        raise FileNotFoundError(f"Expected file not found: {manifest_path}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format: {manifest.get('format_version')} ({in_dir})")
+
+    def _load(name: str) -> np.ndarray:
+        return np.load(os.path.join(in_dir, name), mmap_mode=mmap_mode)
+
+    scorer = EmbeddingScorer(
+        _load("user_embeddings.npy"),
+        _load("user_biases.npy"),
+        _load("item_embeddings.npy"),
+        _load("item_biases.npy"),
+    )
+    user_map = IdIndex(_load("user_ids.npy"), _load("user_index.npy"))
+    item_index = IdIndex(_load("item_ids.npy"), _load("item_index.npy"))
+    item_map = ItemCodes(_load("item_codes.npy"))
+
+    meta_dir = os.path.join(in_dir, "meta")
+    kinds: Dict[str, str] = manifest.get("meta_columns", {})
+    columns: Dict[str, Any] = {}
+    for name, kind in kinds.items():
+        if kind == _KIND_STR:
+            columns[name] = StringColumn.load(os.path.join(meta_dir, name), mmap_mode)
+        else:
+            columns[name] = np.load(os.path.join(meta_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+    present = np.load(os.path.join(meta_dir, "_present.npy"), mmap_mode=mmap_mode)
+    item_meta = ColumnarMeta(item_index, present, columns, kinds)
+
+    return LoadedModel(
+        model_dir, user_map, item_map, item_meta, scorer,
+        load_topn_table(model_dir), IVFIndex.load(model_dir), item_index,
+        load_similar_table(model_dir), SeenItems.load(model_dir, mmap_mode),
+    )
+
+
+def load_model(model_dir: str) -> LoadedModel:
+    """
+    v{n}/{lang} 디렉터리의 모델을 LoadedModel 로 로드합니다.
+    mmap 아티팩트가 있으면 그것을, 없으면 (구버전) pickle 4종을 사용합니다.
+    """
+    if has_model_artifacts(model_dir):
+        return load_model_artifacts(model_dir)
+
+    model, user_map, item_map, item_meta = load_latest_model(model_dir)
+    return LoadedModel(
+        model_dir,
+        user_map,
+        item_map,
+        item_meta,
+        EmbeddingScorer.from_model(model),
+        load_topn_table(model_dir),
+        IVFIndex.load(model_dir),
+        similar=load_similar_table(model_dir),
+        seen=SeenItems.load(model_dir),
+    )
@@ -0,0 +1,138 @@
+import os
+import json
+import shutil
+import logging
+from typing import Dict, Iterable, Optional
+import numpy as np
+from scipy.sparse import csr_matrix
+from core.model.artifacts import MANIFEST_FILE
+
+logger = logging.getLogger(__name__)
+
+TRAIN_STATE_FILE = "train_state.json"
+
+# LightFM 내부 파라미터 (사용자/아이템 축별)
+_EMBEDDING_PARAMS = ("embeddings", "embedding_gradients", "embedding_momentum")
+_BIAS_PARAMS = ("biases", "bias_gradients", "bias_momentum")
+
+
+def load_train_state(version_dir: str) -> Optional[dict]:
+    """v{n}/train_state.json (없거나 깨졌으면 None)"""
+    path = os.path.join(version_dir, TRAIN_STATE_FILE)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"train_state 읽기 실패: {path} ({e})")
+        return None
+
+
+def save_train_state(version_dir: str, state: dict) -> str:
+    """학습 상태(워터마크·모드·증분 횟수)를 원자적으로 기록합니다."""
+    path = os.path.join(version_dir, TRAIN_STATE_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def extend_id_map(id_map: Dict[str, int], ids: Iterable[str]) -> Dict[str, int]:
+    """기존 인덱스는 유지하고, 처음 보는 id 에만 뒤쪽 인덱스를 이어서 부여한 새 map"""
+    extended = dict(id_map)
+    for value in ids:
+        if value not in extended:
+            extended[value] = len(extended)
+    return extended
+
+
+def remap_interactions(
+    matrix: csr_matrix,
+    local_user_map: Dict[str, int],
+    local_item_map: Dict[str, int],
+    user_map: Dict[str, int],
+    item_map: Dict[str, int],
+) -> csr_matrix:
+    """
+    새 이벤트만으로 만든 (로컬 인덱스) 행렬을 확장된 전역 map 기준 len(user_map)×len(item_map) 행렬로 옮깁니다.
+    """
+    user_idx = np.empty(len(local_user_map), dtype=np.int32)
+    for value, i in local_user_map.items():
+        user_idx[i] = user_map[value]
+    item_idx = np.empty(len(local_item_map), dtype=np.int32)
+    for value, i in local_item_map.items():
+        item_idx[i] = item_map[value]
+    coo = matrix.tocoo()
+    return csr_matrix(
+        (coo.data, (user_idx[coo.row], item_idx[coo.col])),
+        shape=(len(user_map), len(item_map)),
+    )
+
+
+def _grow_axis(model, prefix: str, n_rows: int) -> int:
+    current = getattr(model, f"{prefix}_biases")
+    n_new = n_rows - current.shape[0]
+    if n_new <= 0:
+        return 0
+    adagrad = model.learning_schedule == "adagrad"
+    no_components = model.no_components
+
+    # 새 행은 LightFM._initialize 와 같은 분포/초기값으로 채움
+    fresh = ((model.random_state.rand(n_new, no_components) - 0.5) / no_components).astype(np.float32)
+    for name in _EMBEDDING_PARAMS:
+        attr = f"{prefix}_{name}"
+        old = getattr(model, attr)
+        if name == "embeddings":
+            extra = fresh
+        elif name == "embedding_gradients" and adagrad:
+            extra = np.ones((n_new, no_components), dtype=np.float32)
+        else:
+            extra = np.zeros((n_new, no_components), dtype=np.float32)
+        setattr(model, attr, np.ascontiguousarray(np.vstack([old, extra])))
+    for name in _BIAS_PARAMS:
+        attr = f"{prefix}_{name}"
+        old = getattr(model, attr)
+        fill = 1.0 if (name == "bias_gradients" and adagrad) else 0.0
+        setattr(model, attr, np.concatenate([old, np.full(n_new, fill, dtype=np.float32)]))
+    return n_new
+
+
+def grow_model(model, n_users: int, n_items: int) -> tuple[int, int]:
+    """
+    기존 LightFM 모델의 사용자/아이템 파라미터 배열을 n_users × n_items 에 맞게 늘립니다.
+    (identity feature 전제 — 행 i 가 인덱스 i 의 사용자/아이템)
+    기존 행은 그대로 두므로 이어서 fit_partial 하면 warm start 가 됩니다.
+
+    Returns:
+        (추가된 사용자 수, 추가된 아이템 수)
+    """
+    return _grow_axis(model, "user", n_users), _grow_axis(model, "item", n_items)
+
+
+def link_language_dir(src_dir: str, dst_dir: str) -> None:
+    """
+    이번 증분 학습에서 새 이벤트가 없는 언어의 이전 모델을 새 버전으로 옮겨 둡니다.
+    같은 파일시스템이면 하드링크(복사 없음), 아니면 복사합니다.
+    아티팩트 manifest 는 맨 마지막에 옮겨, 레지스트리가 반쯤 옮겨진 디렉터리를 읽지 않게 합니다.
+    """
+    manifests = []
+    for root, _, files in os.walk(src_dir):
+        target_root = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            pair = (os.path.join(root, name), os.path.join(target_root, name))
+            if name == MANIFEST_FILE:
+                manifests.append(pair)
+            else:
+                _link_or_copy(*pair)
+    for pair in manifests:
+        _link_or_copy(*pair)
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
@@ -6,9 +6,26 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def train_model(matrix):
+def train_model(matrix, use_weights: bool = True, num_threads: int = 4):
+    """
+    matrix 의 0 이 아닌 칸을 positive 인터랙션으로 학습합니다.
+    use_weights 이면 칸의 값(이벤트 가중치 합)을 sample_weight 로 함께 넘깁니다.
+    num_threads 는 학습 실행기(core/train_executor.py)가 코어 예산에서 나눠 줍니다.
+    """
     model = LightFM(no_components=30, learning_rate=0.05, loss='warp')
-    model.fit(matrix, epochs=10, num_threads=4)
+    interactions = matrix.tocoo()
+    sample_weight = interactions if use_weights else None
+    model.fit(interactions, sample_weight=sample_weight, epochs=10, num_threads=num_threads)
+    return model
+
+def update_model(model, matrix, epochs: int = 3, use_weights: bool = True, num_threads: int = 4):
+    """
+    이미 학습된 모델을 matrix(새 인터랙션만)로 이어서 학습합니다. (fit_partial, warm start)
+    matrix 의 shape 는 모델 파라미터 행 수와 같아야 합니다. (core.model.incremental.grow_model)
+    """
+    interactions = matrix.tocoo()
+    sample_weight = interactions if use_weights else None
+    model.fit_partial(interactions, sample_weight=sample_weight, epochs=epochs, num_threads=num_threads)
     return model
 
 def load_latest_model(
@@ -0,0 +1,154 @@
+import logging
+from typing import Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 블록 하나의 점수 행렬이 차지할 최대 바이트 (float32 기준)
+_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def top_k_indices(scores: np.ndarray, k: int, mask: np.ndarray | None = None) -> np.ndarray:
+    """
+    1차원 점수 배열에서 상위 k개 인덱스를 점수 내림차순으로 반환합니다.
+    (argpartition 으로 k개만 고른 뒤 그 k개만 정렬)
+    mask(bool 배열)를 주면 False 인 아이템은 부분 정렬 전에 -inf 로 빼고,
+    통과한 아이템이 k개보다 적으면 그만큼만 돌려줍니다.
+    """
+    if mask is not None:
+        scores = np.where(mask, scores, np.float32(-np.inf))
+        k = min(k, int(np.count_nonzero(mask)))
+    k = min(k, scores.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(scores.size)
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    2차원 점수 행렬의 행마다 상위 k개 (인덱스, 점수)를 내림차순으로 반환합니다.
+    """
+    n_rows, n_cols = scores.shape
+    k = min(k, n_cols)
+    if k <= 0:
+        return np.empty((n_rows, 0), dtype=np.int32), np.empty((n_rows, 0), dtype=np.float32)
+    if k < n_cols:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(n_cols), scores.shape)
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(part, order, axis=1).astype(np.int32, copy=False),
+        np.take_along_axis(part_scores, order, axis=1),
+    )
+
+
+class EmbeddingScorer:
+    """
+    LightFM 모델에서 사용자·아이템 임베딩과 bias 를 한 번만 꺼내
+    연속(float32) 배열로 들고 있는 점수 계산기.
+
+    score = user_emb · item_emb + user_bias + item_bias  (LightFM.predict 와 동일)
+    사용자 한 명은 BLAS 행렬-벡터 곱 한 번, 여러 명은 블록 단위 행렬곱으로 계산합니다.
+    """
+
+    def __init__(
+        self,
+        user_embeddings: np.ndarray,
+        user_biases: np.ndarray,
+        item_embeddings: np.ndarray,
+        item_biases: np.ndarray,
+    ):
+        self.user_embeddings = np.ascontiguousarray(user_embeddings, dtype=np.float32)
+        self.user_biases = np.ascontiguousarray(user_biases, dtype=np.float32)
+        self.item_embeddings = np.ascontiguousarray(item_embeddings, dtype=np.float32)
+        self.item_biases = np.ascontiguousarray(item_biases, dtype=np.float32)
+
+    @classmethod
+    def from_model(cls, model) -> "EmbeddingScorer":
+        """
+        get_user_representations / get_item_representations 로
+        (feature 행렬을 거친) 최종 표현을 꺼내 scorer 를 만듭니다.
+        """
+        user_biases, user_emb = model.get_user_representations()
+        item_biases, item_emb = model.get_item_representations()
+        return cls(user_emb, user_biases, item_emb, item_biases)
+
+    @property
+    def n_users(self) -> int:
+        return self.user_embeddings.shape[0]
+
+    @property
+    def n_items(self) -> int:
+        return self.item_embeddings.shape[0]
+
+    def score_user(self, uid: int) -> np.ndarray:
+        """사용자 한 명의 전체 아이템 점수 (float32, shape = (n_items,))"""
+        scores = self.score_vector(self.user_embeddings[uid])
+        scores += self.user_biases[uid]
+        return scores
+
+    def score_vector(self, user_vector: np.ndarray) -> np.ndarray:
+        """
+        임의의 사용자 벡터에 대한 전체 아이템 점수 (user_bias 제외 — 순위에는 영향 없음)
+        """
+        scores = self.item_embeddings @ user_vector
+        scores += self.item_biases
+        return scores
+
+    def fold_in(self, item_idxs: np.ndarray, weights: np.ndarray | None = None) -> np.ndarray:
+        """
+        모델에 없는 사용자의 벡터를 본 아이템 임베딩의 가중 평균으로 만듭니다. (재학습 없음)
+        item_idxs 가 비어 있으면 0 벡터(= item_bias 인기 순위)를 돌려줍니다.
+        """
+        item_idxs = np.asarray(item_idxs, dtype=np.int64)
+        if item_idxs.size == 0:
+            return np.zeros(self.item_embeddings.shape[1], dtype=np.float32)
+        if weights is None:
+            weights = np.ones(item_idxs.size, dtype=np.float32)
+        weights = np.asarray(weights, dtype=np.float32)
+        return (weights @ self.item_embeddings[item_idxs]) / np.float32(weights.sum())
+
+    def top_k_vector(
+        self, user_vector: np.ndarray, k: int, mask: np.ndarray | None = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """사용자 벡터 하나의 상위 k개 (아이템 인덱스, 점수)"""
+        scores = self.score_vector(user_vector)
+        idx = top_k_indices(scores, k, mask)
+        return idx, scores[idx]
+
+    def top_k(self, uid: int, k: int, mask: np.ndarray | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """사용자 한 명의 상위 k개 (아이템 인덱스, 점수) — mask 는 top_k_indices 참고"""
+        scores = self.score_user(uid)
+        idx = top_k_indices(scores, k, mask)
+        return idx, scores[idx]
+
+    def top_k_users(self, uids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        여러 사용자의 상위 k개를 블록 단위 행렬곱 + 행별 top-k 로 계산합니다.
+
+        Returns:
+            items:  int32 배열 (len(uids), min(k, n_items))
+            scores: float32 배열 (len(uids), min(k, n_items))
+        """
+        uids = np.asarray(uids, dtype=np.int64)
+        k = min(k, self.n_items)
+        items = np.empty((uids.size, k), dtype=np.int32)
+        scores = np.empty((uids.size, k), dtype=np.float32)
+        if uids.size == 0 or k == 0:
+            return items, scores
+
+        item_emb_t = self.item_embeddings.T
+        block = max(1, _BLOCK_BYTES // max(1, self.n_items * 4))
+        for start in range(0, uids.size, block):
+            ub = uids[start:start + block]
+            s = self.user_embeddings[ub] @ item_emb_t
+            s += self.item_biases
+            s += self.user_biases[ub, None]
+            items[start:start + ub.size], scores[start:start + ub.size] = top_k_rows(s, k)
+        return items, scores
@@ -0,0 +1,94 @@
+import os
+import logging
+from typing import Dict, Iterable, Optional
+import numpy as np
+from scipy.sparse import csr_matrix
+
+logger = logging.getLogger(__name__)
+
+SEEN_DIR = "seen"
+SEEN_ALL = "all"   # 종류와 무관하게 상호작용한 적 있는 모든 아이템
+
+
+def save_seen_items(model_dir: str, seen: Dict[str, csr_matrix]) -> str:
+    """
+    사용자 × 아이템 "이미 상호작용한 아이템" CSR 들을 model_dir/seen 에 저장합니다.
+    값은 필요 없으므로 indptr(int64)·indices(int32, 행 안에서 정렬) 만 .npy 로 기록합니다.
+
+    seen: {종류: CSR} — SEEN_ALL 과 tracking_type 별 (예: "purchase")
+    """
+    out_dir = os.path.join(model_dir, SEEN_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    for kind, matrix in seen.items():
+        matrix = matrix.tocsr()
+        matrix.eliminate_zeros()
+        matrix.sort_indices()
+        np.save(os.path.join(out_dir, f"{kind}.indptr.npy"), matrix.indptr.astype(np.int64))
+        np.save(os.path.join(out_dir, f"{kind}.indices.npy"), matrix.indices.astype(np.int32))
+    return out_dir
+
+
+class SeenItems:
+    """
+    저장된 seen CSR 들을 mmap 으로 연 조회용 객체.
+    사용자 한 명의 아이템 인덱스는 indptr 로 잘라낸 indices 슬라이스 (O(행 nnz)).
+    """
+
+    def __init__(self, parts: Dict[str, tuple]):
+        self.parts = parts  # kind → (indptr, indices)
+
+    @property
+    def kinds(self) -> list:
+        return sorted(self.parts)
+
+    def row(self, kind: str, uid: int) -> np.ndarray:
+        part = self.parts.get(kind)
+        if part is None:
+            return np.empty(0, dtype=np.int32)
+        indptr, indices = part
+        if uid + 1 >= indptr.size:
+            # 이 테이블보다 나중에 생긴 사용자
+            return np.empty(0, dtype=np.int32)
+        return indices[indptr[uid]:indptr[uid + 1]]
+
+    def rows(self, kinds: Iterable[str], uid: int) -> np.ndarray:
+        """여러 종류의 seen 아이템 인덱스를 합친 배열 (중복 가능 — 마스크 대입에는 무관)"""
+        parts = [self.row(kind, uid) for kind in kinds]
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def matrix(self, kind: str, shape: tuple) -> Optional[csr_matrix]:
+        """
+        shape(사용자·아이템이 늘어난 크기)에 맞춘 CSR. 증분 학습에서 이전 seen 에 새 이벤트를 더할 때 사용.
+        mmap(읽기 전용) 배열을 복사하므로 결과 CSR 은 save_seen_items 의 eliminate_zeros 등으로 고칠 수 있습니다.
+        """
+        part = self.parts.get(kind)
+        if part is None:
+            return None
+        indptr, indices = (np.array(a) for a in part)
+        n_rows = indptr.size - 1
+        if shape[0] > n_rows:
+            indptr = np.concatenate([indptr, np.full(shape[0] - n_rows, indptr[-1], dtype=indptr.dtype)])
+        data = np.ones(indices.size, dtype=np.float32)
+        return csr_matrix((data, indices, indptr), shape=shape)
+
+    @classmethod
+    def load(cls, model_dir: str, mmap_mode: Optional[str] = "r") -> Optional["SeenItems"]:
+        """저장된 seen 디렉터리를 엽니다. (구버전 모델처럼 없으면 None)"""
+        in_dir = os.path.join(model_dir, SEEN_DIR)
+        if not os.path.isdir(in_dir):
+            return None
+        parts = {}
+        for name in os.listdir(in_dir):
+            if not name.endswith(".indptr.npy"):
+                continue
+            kind = name[: -len(".indptr.npy")]
+            indices_path = os.path.join(in_dir, f"{kind}.indices.npy")
+            if not os.path.isfile(indices_path):
+                continue
+            parts[kind] = (
+                np.load(os.path.join(in_dir, name), mmap_mode=mmap_mode),
+                np.load(indices_path, mmap_mode=mmap_mode),
+            )
+        return cls(parts) if parts else None
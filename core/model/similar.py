@@ -0,0 +1,96 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+import numpy as np
+from core.model.scorer import EmbeddingScorer, top_k_rows
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_ITEMS_FILE = "similar_items.npy"
+SIMILAR_SCORES_FILE = "similar_scores.npy"
+
+# 블록 하나의 유사도 행렬이 차지할 최대 바이트 (float32 기준)
+_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def normalized_item_embeddings(scorer: EmbeddingScorer) -> np.ndarray:
+    """코사인 유사도용 L2 정규화 아이템 임베딩 (0 벡터는 그대로 0)"""
+    emb = np.asarray(scorer.item_embeddings, dtype=np.float32)
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(emb / norms, dtype=np.float32)
+
+
+def compute_similar_items(
+    scorer: EmbeddingScorer,
+    m: int = 50,
+    num_threads: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    모든 아이템의 코사인 유사도 상위 m개 이웃(자기 자신 제외)을 미리 계산합니다.
+    아이템을 블록 단위로 묶어 (블록 × 전체) 행렬곱 + 행별 argpartition 을 하고,
+    블록들은 num_threads 개 스레드에서 동시에 계산합니다. (BLAS·argpartition 은 GIL 을 풂)
+
+    Returns:
+        items:  int32 배열 (n_items, min(m, n_items - 1)) — 유사도 내림차순 아이템 인덱스
+        scores: float32 배열 — items 와 같은 순서의 코사인 유사도
+    """
+    emb = normalized_item_embeddings(scorer)
+    n = emb.shape[0]
+    m = max(0, min(m, n - 1))
+    items = np.empty((n, m), dtype=np.int32)
+    scores = np.empty((n, m), dtype=np.float32)
+    if m == 0:
+        return items, scores
+
+    emb_t = emb.T
+    block = max(1, _BLOCK_BYTES // max(1, n * 4))
+
+    def _block(start: int) -> None:
+        stop = min(n, start + block)
+        s = emb[start:stop] @ emb_t
+        # 자기 자신은 후보에서 제외
+        s[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        items[start:stop], scores[start:stop] = top_k_rows(s, m)
+
+    starts = range(0, n, block)
+    if num_threads <= 1 or len(starts) <= 1:
+        for start in starts:
+            _block(start)
+    else:
+        with ThreadPoolExecutor(max_workers=num_threads) as pool:
+            list(pool.map(_block, starts))
+    return items, scores
+
+
+def similar_to(emb: np.ndarray, item_idx: int, m: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    테이블이 없는 (구버전) 모델용: 아이템 하나의 유사 아이템을 바로 계산합니다.
+    emb 는 normalized_item_embeddings 결과로, 호출하는 쪽이 모델 버전 단위로 한 번 만들어 재사용합니다.
+    """
+    s = emb @ emb[item_idx]
+    s[item_idx] = -np.inf
+    items, scores = top_k_rows(s[None, :], min(m, max(0, emb.shape[0] - 1)))
+    return items[0], scores[0]
+
+
+def save_similar_table(model_dir: str, items: np.ndarray, scores: np.ndarray) -> Tuple[str, str]:
+    """유사 아이템 테이블을 model.pkl 과 같은 디렉터리에 .npy 로 저장합니다."""
+    items_path = os.path.join(model_dir, SIMILAR_ITEMS_FILE)
+    scores_path = os.path.join(model_dir, SIMILAR_SCORES_FILE)
+    np.save(items_path, items)
+    np.save(scores_path, scores)
+    return items_path, scores_path
+
+
+def load_similar_table(model_dir: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """저장된 유사 아이템 테이블을 mmap 으로 엽니다. (파일이 없으면 None)"""
+    items_path = os.path.join(model_dir, SIMILAR_ITEMS_FILE)
+    scores_path = os.path.join(model_dir, SIMILAR_SCORES_FILE)
+    if not (os.path.isfile(items_path) and os.path.isfile(scores_path)):
+        return None
+    return (
+        np.load(items_path, mmap_mode="r"),
+        np.load(scores_path, mmap_mode="r"),
+    )
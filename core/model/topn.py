@@ -0,0 +1,50 @@
+import os
+import logging
+from typing import Optional, Tuple
+import numpy as np
+from core.model.scorer import EmbeddingScorer
+
+logger = logging.getLogger(__name__)
+
+TOPN_ITEMS_FILE = "topn_items.npy"
+TOPN_SCORES_FILE = "topn_scores.npy"
+
+
+def compute_topn_table(model, n: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    학습된 LightFM 모델로 모든 사용자의 상위 n개 아이템을 미리 계산합니다.
+    사용자를 블록 단위로 묶어 행렬곱 한 번으로 점수를 구하고,
+    행별 argpartition 으로 상위 n개만 남깁니다.
+
+    Returns:
+        items:  int32 배열 (num_users, n) — 점수 내림차순 아이템 인덱스
+        scores: float32 배열 (num_users, n) — items 와 같은 순서의 점수
+    """
+    scorer = EmbeddingScorer.from_model(model)
+    return scorer.top_k_users(np.arange(scorer.n_users), n)
+
+
+def save_topn_table(model_dir: str, items: np.ndarray, scores: np.ndarray) -> Tuple[str, str]:
+    """
+    top-N 테이블을 model.pkl 과 같은 디렉터리에 .npy 로 저장합니다.
+    """
+    items_path = os.path.join(model_dir, TOPN_ITEMS_FILE)
+    scores_path = os.path.join(model_dir, TOPN_SCORES_FILE)
+    np.save(items_path, items)
+    np.save(scores_path, scores)
+    return items_path, scores_path
+
+
+def load_topn_table(model_dir: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    저장된 top-N 테이블을 읽어옵니다. (구버전 모델처럼 파일이 없으면 None)
+    mmap 으로 열어서 필요한 행만 페이지 단위로 읽습니다.
+    """
+    items_path = os.path.join(model_dir, TOPN_ITEMS_FILE)
+    scores_path = os.path.join(model_dir, TOPN_SCORES_FILE)
+    if not (os.path.isfile(items_path) and os.path.isfile(scores_path)):
+        return None
+    return (
+        np.load(items_path, mmap_mode="r"),
+        np.load(scores_path, mmap_mode="r"),
+    )
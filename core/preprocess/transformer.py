@@ -1,37 +1,131 @@
+import numpy as np
 import pandas as pd
 from scipy.sparse import coo_matrix, csr_matrix
+from app.config import settings
 
 
-def transform_interaction_matrix(df: pd.DataFrame):
+def _type_weight_table(type_weights: dict | None = None, default: float | None = None) -> tuple[dict, float]:
+    if type_weights is None:
+        type_weights = settings.INTERACTION_TYPE_WEIGHTS
+    if default is None:
+        default = settings.INTERACTION_DEFAULT_WEIGHT
+    return type_weights, float(default)
+
+
+def event_weights(
+    type_codes: np.ndarray,
+    types: list,
+    ts: np.ndarray | None = None,
+    type_weights: dict | None = None,
+    half_life_days: float | None = None,
+    now: int | None = None,
+) -> np.ndarray:
+    """
+    이벤트별 가중치 (float32).
+
+    - tracking_type 가중치: type_weights[type] (없는 타입은 INTERACTION_DEFAULT_WEIGHT)
+    - 시간 감쇠: half_life_days > 0 이면 2^(-(now - ts) / half_life), now 기본값은 ts 최댓값
+    type_codes 는 types(코드 → tracking_type 문자열)의 인덱스 배열입니다.
+    """
+    table, default = _type_weight_table(type_weights)
+    per_type = np.array([table.get(t, default) for t in types], dtype=np.float32)
+    weights = per_type[type_codes] if per_type.size else np.ones(len(type_codes), dtype=np.float32)
+
+    if half_life_days is None:
+        half_life_days = settings.INTERACTION_HALF_LIFE_DAYS
+    if half_life_days and half_life_days > 0 and ts is not None and len(ts):
+        if now is None:
+            now = int(ts.max())
+        age_days = (now - ts.astype(np.float64)) / 86400.0
+        weights = weights * np.exp2(-np.maximum(age_days, 0.0) / half_life_days).astype(np.float32)
+    return weights.astype(np.float32, copy=False)
+
+
+def build_interaction_csr(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    weights: np.ndarray,
+    shape: tuple[int, int],
+    cap: float | None = None,
+) -> csr_matrix:
+    """
+    (row, col, weight) 이벤트 배열 → 중복이 합산된 float32 CSR.
+    cap > 0 이면 합산된 값을 cap 으로 자릅니다. (헤비 유저·반복 조회 완화)
+    """
+    matrix = coo_matrix(
+        (weights.astype(np.float32, copy=False), (rows.astype(np.int32, copy=False), cols.astype(np.int32, copy=False))),
+        shape=shape,
+    ).tocsr()
+    matrix.sum_duplicates()
+    if cap is None:
+        cap = settings.INTERACTION_WEIGHT_CAP
+    if cap and cap > 0:
+        np.minimum(matrix.data, cap, out=matrix.data)
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def type_interaction_csr(
+    df: pd.DataFrame,
+    user_map: dict,
+    item_map: dict,
+    tracking_types: list,
+) -> dict:
+    """
+    transform_interaction_matrix 와 같은 user_map / item_map 기준으로
+    tracking_type 별 "상호작용 여부" CSR 을 만듭니다. (seen 아이템 마스크용, 값은 1)
+    df 에 없는 타입은 결과에서 빠집니다.
+    """
+    if df is None or df.empty or 'tracking_type' not in df.columns:
+        return {}
+    shape = (len(user_map), len(item_map))
+    matrices = {}
+    for tracking_type in tracking_types:
+        sub = df[df['tracking_type'] == tracking_type]
+        if sub.empty:
+            continue
+        rows = sub['anon_id'].map(user_map).to_numpy(dtype=np.int64)
+        cols = sub['product_code'].map(item_map).to_numpy(dtype=np.int64)
+        matrices[tracking_type] = build_interaction_csr(rows, cols, np.ones(len(sub), dtype=np.float32), shape, cap=1)
+    return matrices
+
+
+def transform_interaction_matrix(
+    df: pd.DataFrame,
+    type_weights: dict | None = None,
+    half_life_days: float | None = None,
+    cap: float | None = None,
+    now: int | None = None,
+):
     """
     DataFrame에서 anon_id와 product_code 컬럼을 바탕으로
     희소 행렬과 매핑 정보를 반환합니다.
     빈 DataFrame인 경우에도 빈 행렬과 빈 매핑(dict)을 반환합니다.
-    """
-    # 디버깅 프린트: 함수 호출 여부와 df 상태 확인
-    print(f"[DEBUG] transform_interaction_matrix called: df is None={df is None}, empty={{False if df is None else df.empty}}")
 
+    - 행렬 값은 (사용자, 상품) 별 이벤트 가중치의 합 (float32, 중복 없는 CSR)
+    - tracking_type 컬럼이 있으면 타입별 가중치를, common_ts 컬럼이 있으면 시간 감쇠를 적용
+    - user_map / item_map 은 처음 등장한 순서대로 0.. 인덱스를 부여
+    """
     # None 또는 빈 DataFrame 처리: 항상 (matrix, user_map, item_map) 튜플 반환
     if df is None or df.empty:
         return csr_matrix((0, 0)), {}, {}
 
-    # 고유 사용자·아이템 매핑 생성
-    users = df['anon_id'].unique().tolist()
-    items = df['product_code'].unique().tolist()
-    user_map = {u: idx for idx, u in enumerate(users)}
-    item_map = {i: idx for idx, i in enumerate(items)}
-
-    # 행렬 인덱스 및 데이터 생성
-    row_idx = df['anon_id'].map(user_map)
-    col_idx = df['product_code'].map(item_map)
-    # 데이터 개수 계산: 이벤트 수
-    event_count = df.shape[0]
-    data = [1] * event_count
-
-    # 행렬 크기 계산: 고유 사용자·아이템 수
-    n_users = df['anon_id'].nunique()
-    n_items = df['product_code'].nunique()
-
-    # COO -> CSR 변환
-    matrix = coo_matrix((data, (row_idx, col_idx)), shape=(n_users, n_items)).tocsr()
+    # 고유 사용자·아이템 코드 (int32)
+    row_idx, users = pd.factorize(df['anon_id'])
+    col_idx, items = pd.factorize(df['product_code'])
+    user_map = dict(zip(users.tolist(), range(len(users))))
+    item_map = dict(zip(items.tolist(), range(len(items))))
+
+    # 이벤트 가중치
+    if 'tracking_type' in df.columns:
+        type_codes, types = pd.factorize(df['tracking_type'], use_na_sentinel=False)
+        ts = None
+        if 'common_ts' in df.columns:
+            ts = pd.to_datetime(df['common_ts']).to_numpy(dtype="datetime64[s]").astype(np.int64)
+        weights = event_weights(type_codes, list(types), ts, type_weights, half_life_days, now)
+    else:
+        weights = np.ones(len(df), dtype=np.float32)
+
+    # COO -> CSR 변환 (중복 합산·상한)
+    matrix = build_interaction_csr(row_idx, col_idx, weights, (len(users), len(items)), cap)
     return matrix, user_map, item_map
@@ -0,0 +1,81 @@
+import os
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (가중치, 함수, 인자) — 가중치는 보통 인터랙션 수(nnz), 함수는 num_threads= 키워드를 받아야 함
+Job = Tuple[float, Callable[..., Any], tuple]
+
+
+def core_budget() -> int:
+    """학습에 쓸 전체 코어 수 (settings.TRAIN_CPU_BUDGET, 0 이면 os.cpu_count())"""
+    budget = settings.TRAIN_CPU_BUDGET or os.cpu_count() or 1
+    return max(1, int(budget))
+
+
+def thread_share(weight: float, total_weight: float, budget: int) -> int:
+    """
+    작업 크기 비율만큼 코어를 나눠 줍니다. (최소 1, 최대 budget)
+    큰 언어는 스레드를 많이, 작은 언어는 1개만 받아 동시에 여러 개가 돕니다.
+    """
+    if total_weight <= 0:
+        return 1
+    return max(1, min(budget, round(budget * weight / total_weight)))
+
+
+def run_jobs(jobs: Sequence[Job], budget: Optional[int] = None) -> List[Any]:
+    """
+    작업들을 프로세스 풀에서 코어 예산 안에서 실행하고 입력 순서대로 결과를 돌려줍니다.
+
+    - 큰 작업부터 제출합니다. (가장 큰 언어가 전체 소요 시간을 정하므로 먼저 시작)
+    - 실행 중인 작업들의 num_threads 합이 budget 을 넘지 않도록, 코어가 모자라면
+      앞선 작업이 끝날 때까지 기다렸다가 제출합니다.
+    - 실패한 작업은 결과 자리에 예외 객체가 들어갑니다.
+    - budget 이 1 이거나 작업이 하나뿐이면 풀 없이 현재 프로세스에서 실행합니다.
+    """
+    budget = budget or core_budget()
+    total = float(sum(weight for weight, _, _ in jobs))
+    results: List[Any] = [None] * len(jobs)
+
+    if budget <= 1 or len(jobs) <= 1:
+        for i, (_, fn, args) in enumerate(jobs):
+            try:
+                results[i] = fn(*args, num_threads=budget)
+            except Exception as e:
+                logger.error(f"학습 작업 실패: {fn.__name__}{args[:2]} ({e})")
+                results[i] = e
+        return results
+
+    order = sorted(range(len(jobs)), key=lambda i: jobs[i][0], reverse=True)
+    running: dict[Future, Tuple[int, int]] = {}  # future → (작업 번호, 할당 스레드)
+    free = budget
+
+    def _collect(done) -> int:
+        released = 0
+        for future in done:
+            i, threads = running.pop(future)
+            released += threads
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                logger.error(f"학습 작업 실패: {jobs[i][1].__name__}{jobs[i][2][:2]} ({e})")
+                results[i] = e
+        return released
+
+    with ProcessPoolExecutor(max_workers=min(budget, len(jobs))) as pool:
+        for i in order:
+            weight, fn, args = jobs[i]
+            threads = thread_share(weight, total, budget)
+            while threads > free and running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                free += _collect(done)
+            threads = min(threads, free)
+            running[pool.submit(fn, *args, num_threads=threads)] = (i, threads)
+            free -= threads
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            _collect(done)
+    return results
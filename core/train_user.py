@@ -1,17 +1,63 @@
 import os
+import time
 import pickle
+import shutil
+import logging
 import pandas as pd
+from typing import Callable
 from fastapi import HTTPException
-from core.data_loader.clickhouse import load_clickhouse_events
-from core.preprocess.transformer import transform_interaction_matrix
-from core.model.lightfm_trainer import train_model
+from core.data_loader.clickhouse import (
+    load_clickhouse_events,
+    load_clickhouse_events_encoded,
+    load_interactions_aggregated,
+    load_item_metadata_latest,
+    load_item_metadata_full,
+    load_max_event_ts,
+)
+from core.preprocess.transformer import transform_interaction_matrix, type_interaction_csr
+from scipy.sparse import load_npz, save_npz
+from core.model.lightfm_trainer import train_model, update_model
+from core.model.incremental import (
+    extend_id_map,
+    grow_model,
+    link_language_dir,
+    load_train_state,
+    remap_interactions,
+    save_train_state,
+)
+from core.model.topn import compute_topn_table, save_topn_table
+from core.model.similar import compute_similar_items, save_similar_table
+from core.model.seen import SEEN_ALL, SeenItems, save_seen_items
+from core.model.artifacts import save_model_artifacts
+from core.model.ann import IVFIndex
+from core.model.scorer import EmbeddingScorer
+from core.train_executor import core_budget, run_jobs
 from app.config import settings
 
-def train_models_for_site(tracking_key: str) -> dict:
+logger = logging.getLogger(__name__)
+
+# 학습 프로세스로 넘기는 언어별 인터랙션 행렬 (학습이 끝나면 삭제)
+INTERACTIONS_FILE = "_interactions.npz"
+
+# 학습 중인 버전을 쓰는 곳 ({site_root}/_staging/v{n}). 모두 끝나면 {site_root}/v{n} 으로 rename.
+STAGING_DIR = "_staging"
+
+META_FIELDS = [
+    "product_name", "product_price", "product_dc_price",
+    "product_sold_out", "product_image_url", "product_brand",
+    "product_category_1_code", "product_category_1_name",
+    "product_category_2_code", "product_category_2_name",
+    "product_category_3_code", "product_category_3_name",
+    "product_url",
+    "tracking_type", "common_page_language",
+]
+
+
+def _dataframe_inputs(tracking_key: str):
     """
-    1) ClickHouse에서 events + 메타 컬럼이 모두 포함된 DataFrame을 한 번만 불러옵니다.
-    2) Pandas로 인터랙션 매트릭스와 상품 메타를 분리합니다.
-    3) 언어별로 LightFM 모델을 학습하고, 모델·맵·메타를 저장합니다.
+    (예전 방식) 이벤트 + 메타 컬럼 전체를 DataFrame 으로 로드하고
+    언어별 (lang, matrix, user_map, item_map, meta, seen) 를 돌려주는 iterator 를 반환합니다.
+    seen 은 SEEN_ITEM_TYPES 의 tracking_type 별 "상호작용 여부" CSR 입니다.
     """
     # 1) 전체 이벤트 + 메타 한 번에 로드
     df = load_clickhouse_events(tracking_filter=tracking_key)
@@ -21,112 +67,597 @@ def train_models_for_site(tracking_key: str) -> dict:
     # ◀ common_ts를 datetime으로 변환
     df['common_ts'] = pd.to_datetime(df['common_ts'])
 
-    # --- 상품 메타를 한 번만 뽑아서 dict로 저장 ---
-    # ① common_ts 내림차순 정렬 → 같은 product_code 중 맨 앞 행(=최신)만 남기기
-    meta_df = (
-        df
-        .sort_values(['product_code', 'common_ts'], ascending=[True, False])
-        .drop_duplicates(subset=["product_code"], keep='first')
-    )
+    def _iter():
+        # 2) 언어별 그룹핑
+        for lang, group_df in df.groupby("common_page_language"):
+            if group_df.empty:
+                continue
+
+            # ▶ 언어별 메타만 뽑아서 정렬·중복제거
+            lang_meta_df = (
+                group_df
+                .sort_values(['product_code', 'common_ts'], ascending=[True, False])
+                .drop_duplicates(subset=["product_code"], keep='first')
+            )
+            lang_meta_dict = lang_meta_df.set_index("product_code")[META_FIELDS].fillna("").to_dict(orient="index")
+
+            # 2-1) interaction matrix 변환
+            matrix, user_map, item_map = transform_interaction_matrix(group_df)
+            seen = type_interaction_csr(group_df, user_map, item_map, settings.SEEN_ITEM_TYPES)
+            yield lang, matrix, user_map, item_map, lang_meta_dict, seen
+
+    return _iter()
+
+
+def _aggregated_inputs(tracking_key: str):
+    """
+    집계를 ClickHouse 에 맡기는 경로.
+    - 인터랙션: (lang, anon_id, product_code) 별 weight·last_ts 만 받아옴
+    - 메타:     (lang, product_code) 별 최신 메타를 argMax 로 한 번에 받아옴
+    Python 쪽 처리량이 원본 이벤트 수가 아니라 고유 쌍/상품 수에 비례합니다.
+    tracking_type 이 weight 로 합쳐지므로 타입별 seen 은 없습니다. (전체 "all" 만 저장)
+    """
+    # 1) 서버 집계 결과 로드
+    pairs = load_interactions_aggregated(tracking_key)
+    if pairs.empty:
+        raise HTTPException(status_code=400, detail=f"No events for site {tracking_key}")
+    meta_df = load_item_metadata_latest(tracking_key)
+    meta_by_lang = {lang: group for lang, group in meta_df.groupby("common_page_language")}
 
+    def _iter():
+        # 2) 언어별 코드 배열 분할
+        for lang, lang_pairs in pairs.by_language():
+            # 2-1) interaction matrix 변환 (weight 포함)
+            matrix, user_map, item_map = lang_pairs.interaction_matrix()
+
+            lang_meta_df = meta_by_lang.get(lang)
+            lang_meta_dict = (
+                lang_meta_df.set_index("product_code")[META_FIELDS].fillna("").to_dict(orient="index")
+                if lang_meta_df is not None else {}
+            )
+            yield lang, matrix, user_map, item_map, lang_meta_dict, {}
+
+    return _iter()
+
+
+def _encoded_inputs(tracking_key: str):
+    """
+    필요한 컬럼만 스트리밍으로 읽어 정수 코드로 인코딩한 뒤,
+    언어별 (lang, matrix, user_map, item_map, meta, seen) 를 돌려주는 iterator 를 반환합니다.
+    상품 메타는 언어별로 ClickHouse 에서 product_code 단위로 집계해 가져옵니다.
+    """
+    # 1) 학습 컬럼만 스트리밍 + 인코딩 로드
+    events = load_clickhouse_events_encoded(tracking_filter=tracking_key)
+    if events.empty:
+        raise HTTPException(status_code=400, detail=f"No events for site {tracking_key}")
+
+    def _iter():
+        # 2) 언어별 코드 배열 분할
+        for lang, lang_events in events.by_language():
+            # 2-1) interaction matrix 변환 (코드 배열 → CSR)
+            matrix, user_map, item_map = lang_events.interaction_matrix()
+
+            meta_df = load_item_metadata_full(tracking_key, lang=lang)
+            meta_df["common_page_language"] = lang
+            lang_meta_dict = meta_df.set_index("product_code")[META_FIELDS].fillna("").to_dict(orient="index")
+            seen = lang_events.seen_by_type(settings.SEEN_ITEM_TYPES)
+            yield lang, matrix, user_map, item_map, lang_meta_dict, seen
+
+    return _iter()
+
+
+def _next_version_dir(tracking_key: str) -> tuple[str, str]:
+    """
+    다음 버전 번호를 예약하고, 학습 중에 쓸 임시 디렉터리 {site_root}/_staging/v{n} 을 만듭니다.
+    서빙·증분 학습은 {site_root}/v* 만 보므로 _publish_version 전까지 이 버전은 보이지 않습니다.
+    """
     base_dir = settings.MODEL_BASE_DIR or "/app/models/lightfm"
     site_root = os.path.join(base_dir, f"{tracking_key}")
-    os.makedirs(site_root, exist_ok=True)
+    staging_root = os.path.join(site_root, STAGING_DIR)
+    os.makedirs(staging_root, exist_ok=True)
+
+    # 버전 관리 — 학습 중인 번호까지 피해서 고름 (staging 을 먼저 읽어야 rename 도중 번호가 겹치지 않음)
+    while True:
+        taken = [
+            int(d[1:])
+            for root in (staging_root, site_root)
+            for d in os.listdir(root)
+            if d.startswith("v") and d[1:].isdigit()
+        ]
+        next_ver = max(taken) + 1 if taken else 1
+        version = f"v{next_ver}"
+        staging_dir = os.path.join(staging_root, version)
+        try:
+            os.makedirs(staging_dir)
+        except FileExistsError:
+            continue    # 동시에 시작한 학습이 같은 번호를 먼저 예약함
+        return version, staging_dir
+
+
+def _publish_version(staging_dir: str) -> str:
+    """학습이 끝난 _staging/v{n} 을 {site_root}/v{n} 으로 rename 해 한 번에 공개하고 그 경로를 돌려줍니다."""
+    site_root = os.path.dirname(os.path.dirname(staging_dir))
+    version_dir = os.path.join(site_root, os.path.basename(staging_dir))
+    os.rename(staging_dir, version_dir)
+    return version_dir
+
+
+def _discard_version(staging_dir: str) -> None:
+    """실패한 학습의 staging 버전을 지웁니다. (공개된 적이 없으므로 서빙에 영향 없음)"""
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def _published_paths(result: dict, staging_dir: str, version_dir: str) -> dict:
+    """언어별 결과 dict 의 staging 경로를 공개된 버전 경로로 바꿉니다."""
+    return {
+        k: version_dir + v[len(staging_dir):] if isinstance(v, str) and v.startswith(staging_dir) else v
+        for k, v in result.items()
+    }
+
+
+def _write_language_inputs(
+    version_dir: str,
+    lang: str,
+    user_map: dict,
+    item_map: dict,
+    lang_meta_dict: dict,
+    matrix=None,
+    seen: dict | None = None,
+) -> tuple[str, dict]:
+    """
+    언어 디렉터리에 맵·메타 pickle 을 저장합니다. matrix 를 주면 학습 프로세스에 넘길
+    인터랙션 행렬도 npz 로 기록합니다. (DataFrame 을 pickle 로 넘기지 않기 위함)
+    seen({종류: CSR}) 을 주면 서빙에서 이미 본 아이템을 거를 수 있도록 lang_dir/seen 에 저장합니다.
+    """
+    # 2-3) 언어별 디렉터리
+    lang_dir = os.path.join(version_dir, lang)
+    os.makedirs(lang_dir, exist_ok=True)
+
+    # 2-4) 맵 저장
+    _save_pickle(user_map, os.path.join(lang_dir, "user_map.pkl"))
+    _save_pickle(item_map, os.path.join(lang_dir, "item_map.pkl"))
+
+    # 2-5) 메타 저장 (item_map에 있는 코드만 필터)
+    filtered_meta = {
+        code: lang_meta_dict[code]
+        for code in item_map.keys()
+        if code in lang_meta_dict
+    }
+    _save_pickle(filtered_meta, os.path.join(lang_dir, "item_meta.pkl"))
+
+    if matrix is not None:
+        save_npz(os.path.join(lang_dir, INTERACTIONS_FILE), matrix.tocsr(), compressed=False)
+    if seen:
+        save_seen_items(lang_dir, seen)
+    return lang_dir, filtered_meta
+
+
+def _finish_language(
+    lang_dir: str,
+    version: str,
+    model,
+    user_map: dict,
+    item_map: dict,
+    filtered_meta: dict,
+    topn: int,
+    build_ann: bool | None,
+    num_threads: int = 1,
+) -> dict:
+    """학습된 모델 pickle·top-N·유사 아이템·ANN·아티팩트를 저장하고 결과 경로를 돌려줍니다."""
+    _save_pickle(model, os.path.join(lang_dir, "model.pkl"))
+
+    result = {
+        "version":        version,
+        "model_path":     os.path.join(lang_dir, "model.pkl"),
+        "user_map_path":  os.path.join(lang_dir, "user_map.pkl"),
+        "item_map_path":  os.path.join(lang_dir, "item_map.pkl"),
+        "item_meta_path": os.path.join(lang_dir, "item_meta.pkl"),
+    }
+
+    # 2-6) 사용자별 top-N 추천 테이블 저장
+    if topn and topn > 0:
+        topn_items, topn_scores = compute_topn_table(model, topn)
+        topn_items_path, _ = save_topn_table(lang_dir, topn_items, topn_scores)
+        result["topn_items_path"] = topn_items_path
+
+    # 2-6b) 아이템별 유사 아이템 테이블 (상품 상세 "함께 본 상품")
+    if settings.SIMILAR_ITEMS_SIZE > 0:
+        similar_items, similar_scores = compute_similar_items(
+            EmbeddingScorer.from_model(model), settings.SIMILAR_ITEMS_SIZE, num_threads
+        )
+        result["similar_items_path"], _ = save_similar_table(lang_dir, similar_items, similar_scores)
+
+    # 2-7) 대형 카탈로그용 ANN 인덱스
+    want_ann = build_ann
+    if want_ann is None:
+        want_ann = 0 < settings.ANN_MIN_ITEMS <= len(item_map)
+    if want_ann:
+        index = IVFIndex.build(EmbeddingScorer.from_model(model), n_lists=settings.ANN_NLIST)
+        result["ann_index_dir"] = index.save(lang_dir)
+
+    # 2-8) mmap 아티팩트 저장 (pickle 과 병행 — 마이그레이션 기간 동안 둘 다 기록)
+    #      manifest 가 마지막에 기록되므로, 모델 레지스트리는 manifest 가 보이는
+    #      시점에만 이 버전을 완성된 것으로 보고 교체합니다.
+    result["artifact_dir"] = save_model_artifacts(lang_dir, model, user_map, item_map, filtered_meta)
+    return result
+
+
+def _run_language_job(
+    lang_dir: str,
+    version: str,
+    topn: int,
+    build_ann: bool | None,
+    num_threads: int = 4,
+) -> dict:
+    """
+    학습 프로세스에서 실행되는 언어 하나의 학습 작업.
+    입력(npz 행렬, 맵·메타 pickle)은 모두 lang_dir 에서 읽습니다.
+    """
+    job_started = time.monotonic()
+    matrix_path = os.path.join(lang_dir, INTERACTIONS_FILE)
+    matrix = load_npz(matrix_path)
+    user_map = _load_pickle(os.path.join(lang_dir, "user_map.pkl"))
+    item_map = _load_pickle(os.path.join(lang_dir, "item_map.pkl"))
+    filtered_meta = _load_pickle(os.path.join(lang_dir, "item_meta.pkl"))
+
+    # 2-2) 모델 학습
+    model = train_model(matrix, num_threads=num_threads)
+    del matrix
+    os.remove(matrix_path)
+    result = _finish_language(
+        lang_dir, version, model, user_map, item_map, filtered_meta, topn, build_ann, num_threads
+    )
+    result["train_seconds"] = round(time.monotonic() - job_started, 3)
+    return result
+
 
-    # 버전 관리
+def _save_language(
+    lang: str,
+    model,
+    user_map: dict,
+    item_map: dict,
+    lang_meta_dict: dict,
+    version: str,
+    version_dir: str,
+    topn: int,
+    build_ann: bool | None,
+    num_threads: int = 1,
+    seen: dict | None = None,
+) -> dict:
+    """학습된 한 언어 모델의 pickle·top-N·ANN·seen·아티팩트를 version_dir/lang 에 저장합니다."""
+    lang_dir, filtered_meta = _write_language_inputs(
+        version_dir, lang, user_map, item_map, lang_meta_dict, seen=seen
+    )
+    return _finish_language(
+        lang_dir, version, model, user_map, item_map, filtered_meta, topn, build_ann, num_threads
+    )
+
+
+def _train_language(
+    lang: str,
+    matrix,
+    user_map: dict,
+    item_map: dict,
+    lang_meta_dict: dict,
+    version: str,
+    version_dir: str,
+    topn: int,
+    build_ann: bool | None,
+    seen: dict | None = None,
+) -> dict:
+    """한 언어의 모델을 현재 프로세스에서 학습하고 pickle·top-N·ANN·아티팩트를 저장합니다."""
+    model = train_model(matrix, num_threads=core_budget())
+    return _save_language(
+        lang, model, user_map, item_map, lang_meta_dict, version, version_dir, topn, build_ann, core_budget(),
+        seen,
+    )
+
+
+def _previous_state(tracking_key: str):
+    """가장 최근 버전과 그 train_state (없으면 None — 증분 학습 불가)"""
+    base_dir = settings.MODEL_BASE_DIR or "/app/models/lightfm"
+    site_root = os.path.join(base_dir, f"{tracking_key}")
+    if not os.path.isdir(site_root):
+        return None
     versions = [int(d[1:]) for d in os.listdir(site_root) if d.startswith("v") and d[1:].isdigit()]
-    next_ver = max(versions) + 1 if versions else 1
-    version = f"v{next_ver}"
-    version_dir = os.path.join(site_root, version)
-    os.makedirs(version_dir, exist_ok=True)
+    if not versions:
+        return None
+    version_dir = os.path.join(site_root, f"v{max(versions)}")
+    state = load_train_state(version_dir)
+    if state is None:
+        return None
+    return version_dir, state
+
+
+def _train_state(mode: str, max_ts: int | None, base_version: str | None, incremental_runs: int) -> dict:
+    """
+    train_state.json 내용.
+    - max_ts:     학습한 마지막 이벤트 시각 (ClickHouse common_ts, unix seconds)
+    - watermark:  다음 증분 학습이 읽기 시작할 시각 = max_ts - TRAIN_WATERMARK_LATENESS
+                  (학습 서버 시계가 아니라 데이터 시각 기준 — 늦게 적재된 이벤트를 놓치지 않도록)
+    - trained_at: 학습 서버 시각 (fleet 의 staleness 계산용)
+    """
+    max_ts = int(max_ts or 0)
+    return {
+        "mode": mode,
+        "watermark": max(0, max_ts - settings.TRAIN_WATERMARK_LATENESS) if max_ts else 0,
+        "max_ts": max_ts,
+        "trained_at": int(time.time()),
+        "base_version": base_version,
+        "incremental_runs": incremental_runs,
+    }
+
+
+def _load_pickle(path: str):
+    with open(path, "rb") as f:
+        return pickle.load(f)
 
+
+def _save_pickle(obj, path: str) -> None:
+    with open(path, "wb") as f:
+        pickle.dump(obj, f)
+
+
+def _train_incremental(
+    tracking_key: str,
+    prev_dir: str,
+    prev_state: dict,
+    topn: int,
+    build_ann: bool | None,
+    on_stage: Callable[[str], None] | None = None,
+) -> dict:
+    """
+    직전 버전 모델을 불러와 워터마크 이후 이벤트만으로 이어서 학습(fit_partial)하고 v{n+1} 로 저장합니다.
+    (_staging 에서 모두 저장한 뒤 한 번에 공개하고, 실패하면 staging 을 지웁니다)
+    - 새 사용자/상품은 map 뒤쪽에 추가하고 임베딩 배열을 늘립니다.
+    - 새 이벤트가 없는 언어는 이전 모델을 그대로 새 버전에 링크합니다.
+    - 이전 모델이 없는 언어는 새 이벤트만으로 처음부터 학습합니다.
+    """
+    stage = on_stage or (lambda name: None)
+
+    # 1) 워터마크 이후 이벤트만 로드 — 워터마크가 직전 max_ts 보다 앞서 있으므로 겹치는 구간이 있고,
+    #    직전 max_ts 보다 새 이벤트가 없으면 (늦게 들어온 이벤트뿐이면) 다음 실행으로 미룸
+    stage("load")
+    events = load_clickhouse_events_encoded(tracking_filter=tracking_key, since=prev_state["watermark"])
+    max_ts = int(events.ts.max()) if not events.empty else None
+    if max_ts is None or max_ts <= int(prev_state.get("max_ts") or -1):
+        logger.info(f"⏭️ 증분 학습 생략: {tracking_key} (직전 학습 이후 새 이벤트 없음)")
+        return {}
+    meta_df = load_item_metadata_latest(tracking_key)
+    meta_by_lang = {lang: group for lang, group in meta_df.groupby("common_page_language")}
+
+    version, version_dir = _next_version_dir(tracking_key)
+    try:
+        results = _train_incremental_languages(
+            tracking_key, events, meta_by_lang, prev_dir, version, version_dir, topn, build_ann, stage
+        )
+        save_train_state(version_dir, _train_state(
+            "incremental", max_ts, os.path.basename(prev_dir), int(prev_state.get("incremental_runs", 0)) + 1
+        ))
+        published_dir = _publish_version(version_dir)
+    except BaseException:
+        _discard_version(version_dir)
+        raise
+    return {lang: _published_paths(r, version_dir, published_dir) for lang, r in results.items()}
+
+
+def _train_incremental_languages(
+    tracking_key: str,
+    events,
+    meta_by_lang: dict,
+    prev_dir: str,
+    version: str,
+    version_dir: str,
+    topn: int,
+    build_ann: bool | None,
+    stage: Callable[[str], None],
+) -> dict:
+    """_train_incremental 의 언어별 학습·저장 (version_dir 은 아직 공개 전인 staging 디렉터리)"""
     results = {}
 
-    # --- 상품 메타를 한 번만 뽑아서 dict로 저장 ---
-    # drop_duplicates로 product_code별 첫 행만 남기고 to_dict
-    meta_dict = (
-        meta_df
-        .drop_duplicates(subset=["product_code"])
-        .set_index("product_code")[
-            [
-                "product_name",
-                "product_price",
-                "product_dc_price",
-                "product_sold_out",
-                "product_image_url",
-                "product_brand",
-                "product_category_1_code",
-                "product_category_1_name",
-                "product_category_2_code",
-                "product_category_2_name",
-                "product_category_3_code",
-                "product_category_3_name",
-                "product_url",
-                "tracking_type",
-                "common_page_language",
-            ]
-        ]
-        .fillna("")  # NaN 방지
-        .to_dict(orient="index")
-    )
+    # 2) 언어별 증분 학습
+    stage("train")
+    for lang, lang_events in events.by_language():
+        lang_meta_df = meta_by_lang.get(lang)
+        new_meta = (
+            lang_meta_df.set_index("product_code")[META_FIELDS].fillna("").to_dict(orient="index")
+            if lang_meta_df is not None else {}
+        )
+        local_matrix, local_users, local_items = lang_events.interaction_matrix()
+        local_seen = {SEEN_ALL: local_matrix, **lang_events.seen_by_type(settings.SEEN_ITEM_TYPES)}
 
-    # 2) 언어별 그룹핑 & 학습
-    for lang, group_df in df.groupby("common_page_language"):
-        if group_df.empty:
+        prev_lang_dir = os.path.join(prev_dir, lang)
+        if not os.path.isfile(os.path.join(prev_lang_dir, "model.pkl")):
+            results[lang] = _train_language(
+                lang, local_matrix, local_users, local_items, new_meta,
+                version, version_dir, topn, build_ann, local_seen,
+            )
             continue
 
-        # ▶ 언어별 메타만 뽑아서 정렬·중복제거
-        lang_meta_df = (
-            group_df
-            .sort_values(['product_code', 'common_ts'], ascending=[True, False])
-            .drop_duplicates(subset=["product_code"], keep='first')
+        # 2-1) 이전 모델·맵 로드 후 새 id 로 확장
+        model = _load_pickle(os.path.join(prev_lang_dir, "model.pkl"))
+        user_map = extend_id_map(_load_pickle(os.path.join(prev_lang_dir, "user_map.pkl")), local_users)
+        item_map = extend_id_map(_load_pickle(os.path.join(prev_lang_dir, "item_map.pkl")), local_items)
+        prev_meta_path = os.path.join(prev_lang_dir, "item_meta.pkl")
+        lang_meta_dict = _load_pickle(prev_meta_path) if os.path.isfile(prev_meta_path) else {}
+        lang_meta_dict.update(new_meta)
+
+        # 2-2) 임베딩 배열 확장 + 새 인터랙션으로 fit_partial
+        matrix = remap_interactions(local_matrix, local_users, local_items, user_map, item_map)
+        added_users, added_items = grow_model(model, len(user_map), len(item_map))
+        update_model(model, matrix, epochs=settings.TRAIN_INCREMENTAL_EPOCHS, num_threads=core_budget())
+        logger.info(
+            f"🔄 증분 학습: {tracking_key}/{lang} {matrix.nnz} pairs, "
+            f"+{added_users} users, +{added_items} items"
         )
-        lang_meta_dict = lang_meta_df.set_index("product_code")[
-            [
-                "product_name", "product_price", "product_dc_price",
-                "product_sold_out", "product_image_url", "product_brand",
-                "product_category_1_code", "product_category_1_name",
-                "product_category_2_code", "product_category_2_name",
-                "product_category_3_code", "product_category_3_name",
-                "product_url",
-                "tracking_type", "common_page_language",
-            ]
-        ].fillna("").to_dict(orient="index")
-
-        # 2-1) interaction matrix 변환
-        matrix, user_map, item_map = transform_interaction_matrix(group_df)
-
-        # 2-2) 모델 학습
-        model = train_model(matrix)
-
-        # 2-3) 언어별 디렉터리
-        lang_dir = os.path.join(version_dir, lang)
-        os.makedirs(lang_dir, exist_ok=True)
-
-        # 헬퍼: pickle 저장
-        def _save(obj, filename):
-            with open(os.path.join(lang_dir, filename), "wb") as f:
-                pickle.dump(obj, f)
-
-        # 2-4) 모델 및 맵 저장
-        _save(model,      "model.pkl")
-        _save(user_map,   "user_map.pkl")
-        _save(item_map,   "item_map.pkl")
-
-        # 2-5) 메타 저장 (item_map에 있는 코드만 필터)
-        filtered_meta = {
-            code: lang_meta_dict[code]
-            for code in item_map.keys()
-            if code in lang_meta_dict
-        }
-        _save(filtered_meta, "item_meta.pkl")
-
-        results[lang] = {
-            "version":        version,
-            "model_path":     os.path.join(lang_dir, "model.pkl"),
-            "user_map_path":  os.path.join(lang_dir, "user_map.pkl"),
-            "item_map_path":  os.path.join(lang_dir, "item_map.pkl"),
-            "item_meta_path": os.path.join(lang_dir, "item_meta.pkl"),
+
+        # 2-3) 이전 seen 에 새 이벤트를 더함 (이전 버전에 seen 이 없으면 다음 전체 학습까지 저장 안 함)
+        seen = None
+        prev_seen = SeenItems.load(prev_lang_dir)
+        if prev_seen is not None:
+            shape = (len(user_map), len(item_map))
+            seen = {kind: prev_seen.matrix(kind, shape) for kind in prev_seen.kinds}
+            for kind, local in local_seen.items():
+                new = remap_interactions(local, local_users, local_items, user_map, item_map)
+                seen[kind] = new if seen.get(kind) is None else seen[kind] + new
+
+        results[lang] = _save_language(
+            lang, model, user_map, item_map, lang_meta_dict,
+            version, version_dir, topn, build_ann, core_budget(), seen,
+        )
+
+    # 3) 새 이벤트가 없는 언어는 이전 모델을 그대로 이어 받음
+    stage("finalize")
+    for lang in os.listdir(prev_dir):
+        src = os.path.join(prev_dir, lang)
+        if lang not in results and os.path.isdir(src):
+            link_language_dir(src, os.path.join(version_dir, lang))
+    return results
+
+
+def _load_inputs(tracking_key: str, data_path: str):
+    if data_path == "aggregated":
+        return _aggregated_inputs(tracking_key)
+    if data_path == "encoded":
+        return _encoded_inputs(tracking_key)
+    if data_path == "dataframe":
+        return _dataframe_inputs(tracking_key)
+    raise ValueError(f"unknown data_path: {data_path}")
+
+
+def train_sites(
+    tracking_keys: list[str],
+    topn: int | None = None,
+    build_ann: bool | None = None,
+    data_path: str | None = None,
+    budget: int | None = None,
+    on_stage: Callable[[str], None] | None = None,
+    timings: dict | None = None
+) -> dict:
+    """
+    여러 사이트를 전체 학습합니다. 모든 (사이트, 언어) 학습을 하나의 프로세스 풀에서
+    코어 예산(settings.TRAIN_CPU_BUDGET) 안에서 동시에 돌립니다.
+
+    - 데이터 로드·행렬 변환은 현재 프로세스에서 사이트별로 순서대로 하고,
+      언어별 입력은 디스크(npz·pickle)에 기록해 학습 프로세스로 넘깁니다.
+    - 모든 파일은 {site_root}/_staging/v{n} 에 쓰고, 사이트의 모든 언어가 끝나면
+      v{n} 으로 rename 해 공개합니다. 실패한 사이트는 아무 버전도 남기지 않습니다.
+    - 각 학습의 LightFM num_threads 는 인터랙션 수 비율로 나눠 줍니다.
+    - on_stage 가 있으면 단계("load" → "train" → "finalize")가 바뀔 때마다 호출합니다.
+    - timings dict 를 주면 사이트별 {"load_seconds", "train_seconds"(언어 합)} 를 채웁니다.
+
+    Returns:
+        {tracking_key: {lang: 결과 dict}} — 실패한 사이트는 예외 객체
+    """
+    if topn is None:
+        topn = settings.TOPN_SIZE
+    if data_path is None:
+        data_path = settings.TRAIN_DATA_PATH
+    stage = on_stage or (lambda name: None)
+    if timings is None:
+        timings = {}
+
+    results: dict = {}
+    prepared: dict = {}
+    jobs, owners = [], []
+
+    # 1) 사이트별 데이터 로드 + 언어별 학습 입력 기록
+    stage("load")
+    for tracking_key in tracking_keys:
+        load_started = time.monotonic()
+        try:
+            max_ts = load_max_event_ts(tracking_key)   # 로드보다 먼저 — 로드 중 들어온 이벤트는 다음에 다시 읽음
+            lang_inputs = _load_inputs(tracking_key, data_path)
+            version, version_dir = _next_version_dir(tracking_key)
+            prepared[tracking_key] = (version_dir, max_ts)
+            for lang, matrix, user_map, item_map, lang_meta_dict, seen in lang_inputs:
+                lang_dir, _ = _write_language_inputs(
+                    version_dir, lang, user_map, item_map, lang_meta_dict,
+                    matrix=matrix, seen={SEEN_ALL: matrix, **seen},
+                )
+                jobs.append((matrix.nnz, _run_language_job, (lang_dir, version, topn, build_ann)))
+                owners.append((tracking_key, lang))
+        except Exception as e:
+            logger.error(f"학습 데이터 준비 실패: {tracking_key} ({e})")
+            results[tracking_key] = e
+            if tracking_key in prepared:
+                _discard_version(prepared.pop(tracking_key)[0])
+        timings[tracking_key] = {"load_seconds": round(time.monotonic() - load_started, 3), "train_seconds": 0.0}
+
+    # 2) 언어별 학습 (프로세스 풀)
+    stage("train")
+    for (tracking_key, lang), output in zip(owners, run_jobs(jobs, budget)):
+        if isinstance(results.get(tracking_key), Exception):
+            continue
+        if isinstance(output, Exception):
+            results[tracking_key] = output
+            continue
+        timings[tracking_key]["train_seconds"] += output.pop("train_seconds", 0.0)
+        results.setdefault(tracking_key, {})[lang] = output
+
+    # 3) 모든 언어가 끝난 사이트만 워터마크를 기록하고 버전을 공개 (실패한 사이트는 staging 삭제)
+    stage("finalize")
+    for tracking_key, (version_dir, max_ts) in prepared.items():
+        if isinstance(results.get(tracking_key), Exception):
+            _discard_version(version_dir)
+            continue
+        try:
+            save_train_state(version_dir, _train_state("full", max_ts, None, 0))
+            published_dir = _publish_version(version_dir)
+        except Exception as e:
+            logger.error(f"모델 버전 공개 실패: {tracking_key} ({e})")
+            results[tracking_key] = e
+            _discard_version(version_dir)
+            continue
+        results[tracking_key] = {
+            lang: _published_paths(r, version_dir, published_dir)
+            for lang, r in results.get(tracking_key, {}).items()
         }
+    return results
+
+
+def train_models_for_site(
+    tracking_key: str,
+    topn: int | None = None,
+    build_ann: bool | None = None,
+    data_path: str | None = None,
+    incremental: bool | None = None,
+    on_stage: Callable[[str], None] | None = None
+) -> dict:
+    """
+    1) ClickHouse에서 학습 데이터를 한 번만 불러옵니다.
+       - data_path="dataframe": events + 메타 컬럼이 모두 포함된 DataFrame
+       - data_path="encoded":   학습 컬럼만 스트리밍하며 정수 코드 배열로 인코딩
+       - data_path="aggregated": ClickHouse 에서 (사용자, 상품) 쌍·최신 메타로 집계한 결과만
+       (None 이면 settings.TRAIN_DATA_PATH 사용)
+    2) 언어별 인터랙션 매트릭스와 상품 메타를 만듭니다.
+    3) 언어별로 LightFM 모델을 학습하고, 모델·맵·메타를 저장합니다.
+       (언어들은 train_sites 의 프로세스 풀에서 코어 예산을 나눠 동시에 학습)
+    4) topn > 0 이면 사용자별 상위 N개 추천 테이블도 함께 저장합니다.
+       (None 이면 settings.TOPN_SIZE 사용)
+    5) build_ann 이면 내적 검색용 IVF 인덱스도 저장합니다.
+       (None 이면 아이템 수가 settings.ANN_MIN_ITEMS 이상인 언어만)
+    6) incremental 이면 직전 버전에서 이어서 학습합니다. 직전 버전이 없거나
+       증분이 settings.TRAIN_FULL_EVERY 회 이어졌으면 전체 재학습합니다.
+       (None 이면 settings.TRAIN_INCREMENTAL 사용)
+    7) on_stage 가 있으면 진행 단계 이름("load" / "train" / "finalize")으로 호출합니다.
+    """
+    if topn is None:
+        topn = settings.TOPN_SIZE
+    if incremental is None:
+        incremental = settings.TRAIN_INCREMENTAL
+
+    # 0) 증분 학습 가능 여부
+    if incremental:
+        previous = _previous_state(tracking_key)
+        if previous is None:
+            logger.info(f"증분 학습 불가 (이전 train_state 없음) → 전체 학습: {tracking_key}")
+        elif int(previous[1].get("incremental_runs", 0)) >= settings.TRAIN_FULL_EVERY:
+            logger.info(f"증분 {settings.TRAIN_FULL_EVERY}회 누적 → 전체 재학습: {tracking_key}")
+        else:
+            return _train_incremental(tracking_key, previous[0], previous[1], topn, build_ann, on_stage)
 
+    results = train_sites([tracking_key], topn, build_ann, data_path, on_stage=on_stage)[tracking_key]
+    if isinstance(results, Exception):
+        raise results
     return results
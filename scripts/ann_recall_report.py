@@ -0,0 +1,41 @@
+import sys
+import json
+import argparse
+from core.model.artifacts import load_model
+from core.model.ann import IVFIndex, recall_report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="v{n}/{lang} 모델에 대해 ANN(IVF) recall@k / 지연을 정확 검색과 비교합니다."
+    )
+    parser.add_argument("model_dir", help="예: /app/models/<tracking_key>/v3/ko")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32", help="쉼표로 구분한 n_probe 목록")
+    parser.add_argument("--nlist", type=int, default=None, help="지정하면 저장된 인덱스 대신 이 값으로 새로 빌드")
+    parser.add_argument("--users", type=int, default=1000, help="샘플 사용자 수")
+    parser.add_argument("--json", action="store_true", help="JSON 으로 출력")
+    args = parser.parse_args()
+
+    loaded = load_model(args.model_dir)
+    index = loaded.ann
+    if args.nlist is not None or index is None:
+        index = IVFIndex.build(loaded.scorer, n_lists=args.nlist or 0)
+
+    rows = recall_report(
+        loaded.scorer,
+        index,
+        k=args.k,
+        n_probes=[int(p) for p in args.nprobe.split(",") if p],
+        sample_users=args.users,
+    )
+
+    if args.json:
+        json.dump({"model_dir": args.model_dir, "n_items": loaded.scorer.n_items,
+                   "n_lists": index.n_lists, "k": args.k, "rows": rows}, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"items={loaded.scorer.n_items} n_lists={index.n_lists} k={args.k}")
+        print(f"{'n_probe':>8} {'recall':>8} {'ms/query':>10} {'candidates':>11}")
+        for r in rows:
+            label = "exact" if r["n_probe"] == 0 else str(r["n_probe"])
+            print(f"{label:>8} {r['recall']:>8.3f} {r['latency_ms']:>10.3f} {r['candidates']:>11.0f}")
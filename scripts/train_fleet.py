@@ -0,0 +1,39 @@
+import sys
+import json
+import argparse
+import logging
+from core.fleet import plan_fleet, run_fleet, write_run_summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="ClickHouse 에서 활성 tracking_key 를 찾아 staleness·새 이벤트 순으로 학습하고 실행 요약을 남깁니다."
+    )
+    parser.add_argument("--sites", default="", help="쉼표로 구분한 tracking_key 로 대상 제한")
+    parser.add_argument("--min-new-events", type=int, default=None, help="기본 settings.FLEET_MIN_NEW_EVENTS")
+    parser.add_argument("--max-staleness-hours", type=float, default=None, help="기본 settings.FLEET_MAX_STALENESS_HOURS")
+    parser.add_argument("--cpu", type=int, default=None, help="코어 예산, 기본 settings.TRAIN_CPU_BUDGET")
+    parser.add_argument("--memory-mb", type=float, default=None, help="기본 settings.FLEET_MEMORY_BUDGET_MB")
+    parser.add_argument("--incremental", action="store_true", help="직전 버전에서 이어서 학습")
+    parser.add_argument("--summary-dir", default=None, help="기본 settings.FLEET_SUMMARY_DIR")
+    parser.add_argument("--dry-run", action="store_true", help="계획만 출력하고 학습하지 않음")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    plans = plan_fleet(
+        tracking_keys=[s for s in args.sites.split(",") if s] or None,
+        min_new_events=args.min_new_events,
+        max_staleness_hours=args.max_staleness_hours,
+    )
+    if args.dry_run:
+        for p in plans:
+            if p["priority"] == float("inf"):
+                p["priority"] = None
+        json.dump(plans, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        sys.exit(0)
+
+    summary = run_fleet(plans, budget=args.cpu, memory_mb=args.memory_mb, incremental=args.incremental)
+    path = write_run_summary(summary, args.summary_dir)
+    print(f"summary: {path} {summary['counts']} {summary['duration_seconds']}s")
+    sys.exit(1 if summary["counts"]["failed"] else 0)
@@ -1,6 +1,18 @@
-from core.train_user import train_models_for_site
+import sys
+import argparse
+from core.train_user import train_sites
 
 if __name__ == "__main__":
-    site = input("Site ID to train: ")
-    result = train_models_for_site(site)
-    print("Trained:", result)
+    parser = argparse.ArgumentParser(description="지정한 사이트들을 바로 전체 학습합니다. (전체 스케줄은 scripts/train_fleet.py)")
+    parser.add_argument("sites", nargs="+", help="학습할 tracking_key")
+    args = parser.parse_args()
+
+    results = train_sites(args.sites)
+    failed = False
+    for site, result in results.items():
+        if isinstance(result, Exception):
+            failed = True
+            print(f"Failed: {site} ({result})")
+        else:
+            print(f"Trained: {site} {sorted(result)}")
+    sys.exit(1 if failed else 0)
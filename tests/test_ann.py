@@ -0,0 +1,40 @@
+import numpy as np
+
+from core.model.ann import IVFIndex
+from core.model.scorer import EmbeddingScorer
+
+N_USERS, N_ITEMS, DIM, K = 50, 300, 8, 10
+
+
+def _scorer(seed: int = 0) -> EmbeddingScorer:
+    rng = np.random.default_rng(seed)
+    return EmbeddingScorer(
+        rng.standard_normal((N_USERS, DIM)),
+        rng.standard_normal(N_USERS),
+        rng.standard_normal((N_ITEMS, DIM)),
+        rng.standard_normal(N_ITEMS),
+    )
+
+
+def test_search_users_matches_search():
+    scorer = _scorer()
+    index = IVFIndex.build(scorer, n_lists=16)
+    uids = np.arange(N_USERS)
+    items, scores = index.search_users(scorer, uids, K, n_probe=3)
+    assert items.shape == scores.shape == (N_USERS, K)
+    for uid in uids:
+        expected_items, expected_scores = index.search(scorer, int(uid), K, n_probe=3)
+        np.testing.assert_array_equal(items[uid], expected_items)
+        np.testing.assert_allclose(scores[uid], expected_scores, rtol=1e-5, atol=1e-5)
+
+
+def test_search_users_pads_when_candidates_are_short():
+    scorer = _scorer(1)
+    index = IVFIndex.build(scorer, n_lists=100)
+    items, scores = index.search_users(scorer, np.arange(5), N_ITEMS, n_probe=1)
+    for uid in range(5):
+        expected_items, _ = index.search(scorer, uid, N_ITEMS, n_probe=1)
+        n = expected_items.size
+        assert n < N_ITEMS
+        np.testing.assert_array_equal(items[uid, :n], expected_items)
+        assert (items[uid, n:] == -1).all() and np.isneginf(scores[uid, n:]).all()
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from core.model.scorer import EmbeddingScorer
+
+LightFM = pytest.importorskip("lightfm").LightFM
+
+N_USERS, N_ITEMS, K = 60, 40, 10
+
+
+@pytest.fixture(scope="module")
+def model():
+    """작은 무작위 인터랙션으로 학습한 LightFM (identity feature)"""
+    rng = np.random.default_rng(0)
+    dense = rng.random((N_USERS, N_ITEMS)) < 0.15
+    interactions = sp.coo_matrix(dense.astype(np.float32))
+    model = LightFM(no_components=8, loss="warp", random_state=42)
+    model.fit(interactions, epochs=5, num_threads=1)
+    return model
+
+
+def _predict_ranking(model, uid: int) -> np.ndarray:
+    scores = model.predict(int(uid), np.arange(N_ITEMS, dtype=np.int32), num_threads=1)
+    return np.argsort(-scores, kind="stable")[:K]
+
+
+def test_top_k_matches_predict(model):
+    scorer = EmbeddingScorer.from_model(model)
+    for uid in range(N_USERS):
+        items, scores = scorer.top_k(uid, K)
+        np.testing.assert_array_equal(items, _predict_ranking(model, uid))
+        expected = model.predict(uid, items.astype(np.int32), num_threads=1)
+        np.testing.assert_allclose(scores, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_top_k_users_matches_predict(model):
+    scorer = EmbeddingScorer.from_model(model)
+    uids = np.arange(N_USERS)
+    items, scores = scorer.top_k_users(uids, K)
+    assert items.shape == scores.shape == (N_USERS, K)
+    for uid in uids:
+        np.testing.assert_array_equal(items[uid], _predict_ranking(model, uid))
+        expected = model.predict(int(uid), items[uid], num_threads=1)
+        np.testing.assert_allclose(scores[uid], expected, rtol=1e-5, atol=1e-5)